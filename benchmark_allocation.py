@@ -0,0 +1,157 @@
+"""
+Script de mesure des performances de l'allocation des ressources
+Auteur: Projet CGénial 2025
+
+Compare l'implémentation vectorisée de allouer_ressources_glouton à l'ancienne
+implémentation ligne par ligne (apply/iterrows) sur des crises synthétiques,
+en vérifiant au passage que les deux produisent exactement les mêmes résultats.
+
+Usage: python benchmark_allocation.py [taille1 taille2 ...]
+"""
+
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Ajoute le dossier src au chemin Python
+dossier_projet = Path(__file__).parent
+sys.path.insert(0, str(dossier_projet))
+
+from src.chargement_donnees import charger_besoins
+from src.allocation_gloutonne import allouer_ressources_glouton, calculer_score_urgence, calculer_besoins_crise
+
+# Au-delà de cette taille, l'ancienne implémentation est trop lente pour être mesurée
+TAILLE_MAX_REFERENCE = 100000
+
+STOCK_EXEMPLE = {
+    'eau_potable_litres': 50000000,
+    'tentes': 10000,
+    'medicaments_doses': 500000,
+    'hopitaux_campagne': 100,
+    'generateurs': 300,
+    'vehicules_urgence': 200,
+    'personnel_medical': 3000,
+    'denrees_alimentaires_kg': 10000000
+}
+
+
+def generer_crises_synthetiques(nb_crises, df_besoins, graine=42):
+    """
+    Génère un DataFrame de crises actuelles aléatoires
+    
+    Args:
+        nb_crises (int): Nombre de crises à générer
+        df_besoins (pandas.DataFrame): DataFrame des besoins (pour les types de crise)
+        graine (int): Graine du générateur aléatoire
+    
+    Returns:
+        pandas.DataFrame: Crises synthétiques
+    """
+    generateur = np.random.default_rng(graine)
+    types = df_besoins['type_crise'].to_numpy()
+    
+    return pd.DataFrame({
+        'nom_crise': [f"Crise {i}" for i in range(nb_crises)],
+        'type_crise': types[generateur.integers(0, len(types), nb_crises)],
+        'pays': 'Synthétique',
+        'latitude': generateur.uniform(-60, 80, nb_crises).round(4),
+        'longitude': generateur.uniform(-180, 180, nb_crises).round(4),
+        'intensite': generateur.uniform(2, 10, nb_crises).round(1),
+        'date': pd.Timestamp('2025-01-01'),
+        'population_touchee': generateur.integers(1000, 10000000, nb_crises),
+        'accessibilite': generateur.uniform(0.1, 0.95, nb_crises).round(2),
+        'en_cours': True
+    })
+
+
+def allouer_ressources_reference(df_crises, df_besoins, stock_disponible):
+    """
+    Ancienne implémentation ligne par ligne de allouer_ressources_glouton (crises actuelles)
+    conservée uniquement comme référence de comparaison
+    """
+    df_allocation = df_crises[df_crises['en_cours'] == True].copy()
+    df_allocation['score_urgence'] = df_allocation.apply(calculer_score_urgence, axis=1)
+    df_allocation = df_allocation.sort_values('score_urgence', ascending=False).reset_index(drop=True)
+    ressources = [col for col in df_besoins.columns if col != 'type_crise']
+    
+    stock_reserve = {}
+    stock_allouable = {}
+    for ressource in ressources:
+        stock_reserve[ressource] = int(stock_disponible.get(ressource, 0) * 0.25)
+        stock_allouable[ressource] = int(stock_disponible.get(ressource, 0) - stock_reserve[ressource])
+    
+    for ressource in ressources:
+        df_allocation[f'allocation_{ressource}'] = 0
+        df_allocation[f'besoin_{ressource}'] = 0
+        df_allocation[f'pourcentage_satisfait_{ressource}'] = 0.0
+    
+    score_moyen = df_allocation['score_urgence'].mean()
+    df_allocation['facteur_score_urgence'] = df_allocation['score_urgence'] / score_moyen
+    
+    for idx, crise in df_allocation.iterrows():
+        besoins_crise = calculer_besoins_crise(crise, df_besoins, facteur_score=df_allocation.at[idx, 'facteur_score_urgence'])
+        for ressource in ressources:
+            df_allocation.at[idx, f'besoin_{ressource}'] = besoins_crise.get(ressource, 0)
+    
+    stock_restant = {}
+    for ressource in ressources:
+        besoin_total = df_allocation[f'besoin_{ressource}'].sum()
+        if besoin_total == 0:
+            stock_restant[ressource] = int(stock_allouable[ressource])
+            continue
+        coefficient = min(1.0, stock_allouable[ressource] / besoin_total)
+        for idx, crise in df_allocation.iterrows():
+            besoin = df_allocation.at[idx, f'besoin_{ressource}']
+            allocation = int(besoin * coefficient)
+            df_allocation.at[idx, f'allocation_{ressource}'] = allocation
+            if besoin > 0:
+                df_allocation.at[idx, f'pourcentage_satisfait_{ressource}'] = round((allocation / besoin) * 100, 2)
+        stock_restant[ressource] = int(stock_allouable[ressource] - df_allocation[f'allocation_{ressource}'].sum())
+    
+    df_allocation['score_urgence_normalise'] = (df_allocation['score_urgence'] / df_allocation['score_urgence'].max() * 100).round(2)
+    
+    return df_allocation, stock_restant, stock_reserve
+
+
+def mesurer(fonction, *args):
+    """Exécute une fonction et retourne (résultat, durée en secondes)"""
+    debut = time.perf_counter()
+    resultat = fonction(*args)
+    return resultat, time.perf_counter() - debut
+
+
+def main(tailles):
+    """
+    Lance la comparaison pour chaque taille demandée
+    
+    Args:
+        tailles (list): Nombres de crises à tester
+    """
+    df_besoins = charger_besoins()
+    
+    print("\n" + "="*70)
+    print("MESURE DES PERFORMANCES DE L'ALLOCATION")
+    print("="*70)
+    print(f"{'Crises':>10} {'Vectorisée (s)':>16} {'Référence (s)':>16} {'Accélération':>14}  Résultats")
+    
+    for taille in tailles:
+        df_crises = generer_crises_synthetiques(taille, df_besoins)
+        (df_vect, restant_vect, _), duree_vect = mesurer(allouer_ressources_glouton, df_crises, df_besoins, STOCK_EXEMPLE)
+        
+        if taille <= TAILLE_MAX_REFERENCE:
+            (df_ref, restant_ref, _), duree_ref = mesurer(allouer_ressources_reference, df_crises, df_besoins, STOCK_EXEMPLE)
+            identiques = df_vect[df_ref.columns].equals(df_ref) and restant_vect == restant_ref
+            print(f"{taille:>10,} {duree_vect:>16.3f} {duree_ref:>16.3f} {duree_ref / duree_vect:>13.0f}x  "
+                  f"{'identiques' if identiques else 'DIFFÉRENTS'}")
+        else:
+            print(f"{taille:>10,} {duree_vect:>16.3f} {'-':>16} {'-':>14}  (référence trop lente)")
+    
+    print("="*70 + "\n")
+
+
+if __name__ == "__main__":
+    tailles_demandees = [int(arg) for arg in sys.argv[1:]] or [1000, 100000, 1000000]
+    main(tailles_demandees)
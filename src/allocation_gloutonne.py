@@ -10,12 +10,76 @@ Algorithme d'allocation simple:
 - Pour chaque ressource, calcule le besoin total de toutes les crises
 - Si le stock allouable (75%) est suffisant : donne à chaque crise son besoin complet
 - Sinon : divise les allocations par un coefficient unique pour partager équitablement
+
+Modes de répartition disponibles (paramètre mode de allouer_ressources_glouton):
+- 'proportionnel' (défaut): coefficient unique par ressource, comme décrit ci-dessus
+- 'priorite': les crises sont servies par score d'urgence décroissant, chacune jusqu'à
+  son besoin complet (ou partiellement lorsque le stock s'épuise)
+- 'optimal': programme linéaire qui maximise la satisfaction pondérée par l'urgence
+  (voir allouer_ressources_optimal)
+- 'equitable': partage max-min pondéré par l'urgence (remplissage par niveau, voir repartir_equitable)
+- 'budget': comme 'optimal', en achetant en plus des ressources avec un budget
+  (voir allouer_ressources_budget)
+
+simuler_scenarios_stock évalue en une seule passe des milliers de vecteurs de stock
+(scénarios "et si") pour les modes 'proportionnel' et 'priorite'.
+
+allouer_ressources_depots répartit ensuite les quantités entre plusieurs dépôts
+(expéditions dépôt -> crise de coût de transport minimal).
+
+allouer_ressources_cache mémorise les résultats (mêmes crises, besoins, stock et mode)
+en mémoire et, en option, sur disque.
+
+Avec format_resultat='compact', le résultat est un ResultatAllocation (matrices crises ×
+ressources) dont le DataFrame large et le format long sont construits à la demande.
+
+AllocateurIncremental tient à jour l'allocation proportionnelle lorsqu'une seule crise
+est ajoutée, modifiée ou clôturée, sans tout recalculer.
 """
 
+import copy
+import heapq
+import os
+import pickle
+import hashlib
+import threading
+from collections import OrderedDict
+
 import pandas as pd
 import numpy as np
 from pathlib import Path
 
+from src.chargement_donnees import (elargir_colonnes_float32, valeurs_float64, SCHEMA_CRISES, SCHEMA_CRISES_OPTIONNEL,
+                                    concatener_morceaux_crises, EntrepotCrises, calculer_besoins_lot,
+                                    construire_matrice_besoins, empreinte_dataframe)
+from src.prediction_crises import obtenir_matrice_distances, COUTS_UNITAIRES, calculer_couts_pourcentages
+
+
+# Part de chaque ressource mise en réserve (non allouée)
+RATIO_RESERVE = 0.25
+
+# Cache des résultats d'allocation (allouer_ressources_cache), du moins au plus récemment utilisé
+# Clé: empreinte (crises, besoins, stock, mode, options) -> (df_allocation, stock_restant, stock_reserve)
+_cache_allocations = OrderedDict()
+_tailles_cache_allocations = {}
+_verrou_cache_allocations = threading.Lock()
+TAILLE_MAX_CACHE_ALLOCATIONS = 64 * 1024 * 1024  # octets
+DOSSIER_CACHE_ALLOCATIONS = Path(__file__).parent.parent / 'outputs' / 'cache_allocations'
+# Version du calcul et du format des résultats mis en cache: à incrémenter à chaque changement
+# de l'algorithme ou de ResultatAllocation pour ne pas relire des résultats périmés sur disque
+VERSION_CACHE_ALLOCATIONS = 3
+
+# Colonnes stockées en float32 par le schéma des crises
+COLONNES_FLOAT32_CRISES = [colonne for colonne, type_colonne in SCHEMA_CRISES.items() if type_colonne == 'float32']
+
+# Nombre maximal de crises limitantes nommées par ressource dans les attributs du résultat
+# (les attrs sont copiés à chaque opération pandas: ils doivent rester petits)
+NB_MAX_CRISES_LIMITANTES = 20
+
+# Exports par morceaux (CSV, Excel, Parquet): lignes traitées à la fois et limite de lignes d'une feuille Excel
+TAILLE_MORCEAU_EXPORT = 50_000
+NB_LIGNES_MAX_EXCEL = 1_048_576
+
 
 def calculer_score_urgence(crise):
     """
@@ -41,138 +105,1793 @@ def calculer_score_urgence(crise):
     return score
 
 
-def allouer_ressources_glouton(df_crises, df_besoins, stock_disponible, seulement_actuelles=True):
+def calculer_scores_urgence(df_crises):
     """
-    Alloue les ressources disponibles aux crises selon une logique simple :
-    - 25% des ressources sont réservées (non utilisées)
-    - 75% des ressources sont allouables
-    - Calcule les besoins en fonction du type de crise et du score d'urgence (pas de l'intensité seule)
-    - Pour chaque ressource, calcule le besoin total de toutes les crises
-    - Si le stock allouable est suffisant : donne à chaque crise son besoin complet
-    - Sinon : divise les allocations par un coefficient unique pour partager équitablement
+    Calcule le score d'urgence de toutes les crises en une seule opération
+    (version vectorisée de calculer_score_urgence)
     
     Args:
         df_crises (pandas.DataFrame): DataFrame des crises
-        df_besoins (pandas.DataFrame): DataFrame des besoins par type de crise
-        stock_disponible (dict): Dictionnaire des ressources disponibles
-                                 Ex: {'eau_potable_litres': 10000000, 'tentes': 5000, ...}
-        seulement_actuelles (bool): Si True, ne considère que les crises en cours
     
     Returns:
-        tuple: (df_allocation, stock_restant, stock_reserve) - DataFrame avec allocations, stocks restants et stocks réservés
+        numpy.ndarray: Score d'urgence de chaque crise
     """
+    # Valeurs décimales d'origine (et non les float32 stockés): mêmes scores qu'à partir du CSV
+    intensite = valeurs_float64(df_crises['intensite'])
+    population = valeurs_float64(df_crises['population_touchee'])
+    accessibilite = valeurs_float64(df_crises['accessibilite'])
+    
+    return intensite * population * (1 - accessibilite)
+
+
+def repartir_proportionnel(besoins, stock_allouable):
+    """
+    Répartit le stock allouable entre les crises avec un coefficient unique par ressource:
+    - si le stock suffit, chaque crise reçoit son besoin complet
+    - sinon, chaque besoin est multiplié par stock_allouable / besoin_total
+    
+    Args:
+        besoins (numpy.ndarray): Besoins entiers, dimensions (nb_crises, nb_ressources)
+        stock_allouable (numpy.ndarray): Stock allouable de chaque ressource (nb_ressources)
+    
+    Returns:
+        numpy.ndarray: Allocations entières, dimensions (nb_crises, nb_ressources)
+    """
+    besoin_total = besoins.sum(axis=0)
+    stock_allouable = np.asarray(stock_allouable, dtype=np.float64)
+    
+    # Coefficient 1.0 si le stock suffit (ou si aucun besoin), sinon stock / besoin total
+    coefficient = np.ones(len(besoin_total))
+    insuffisant = stock_allouable < besoin_total
+    coefficient[insuffisant] = stock_allouable[insuffisant] / besoin_total[insuffisant]
+    
+    return np.trunc(besoins * coefficient).astype(np.int64)
+
+
+def calculer_pourcentages_satisfaits(allocations, besoins):
+    """
+    Calcule le pourcentage de besoin satisfait (arrondi à 2 décimales) de chaque crise
+    et chaque ressource, 0 lorsque le besoin est nul
+    
+    Args:
+        allocations (numpy.ndarray): Allocations, dimensions (nb_crises, nb_ressources)
+        besoins (numpy.ndarray): Besoins, dimensions (nb_crises, nb_ressources)
+    
+    Returns:
+        numpy.ndarray: Pourcentages satisfaits, dimensions (nb_crises, nb_ressources)
+    """
+    pourcentages = np.zeros(besoins.shape)
+    positif = besoins > 0
+    pourcentages[positif] = np.round(allocations[positif] / besoins[positif] * 100, 2)
+    return pourcentages
+
+
+def repartir_par_priorite(besoins, stock_allouable, scores=None, top_k=None):
+    """
+    Sert les crises par ordre de priorité: chaque crise reçoit son besoin complet tant
+    que le stock le permet, la première crise qui épuise le stock est servie partiellement
+    et les suivantes ne reçoivent rien (indépendamment pour chaque ressource)
+    
+    Le coût est celui du tri des scores (O(n log n)), puis d'une somme cumulée par ressource.
+    
+    Args:
+        besoins (numpy.ndarray): Besoins entiers, dimensions (nb_crises, nb_ressources)
+        stock_allouable (numpy.ndarray): Stock allouable de chaque ressource (nb_ressources)
+        scores (numpy.ndarray): Scores d'urgence (nb_crises). Si None, les lignes de besoins
+                                sont supposées déjà triées par priorité décroissante.
+        top_k (int): Si fourni, seules les top_k crises les plus prioritaires sont servies
+    
+    Returns:
+        numpy.ndarray: Allocations entières, dimensions (nb_crises, nb_ressources)
+    """
+    nb_crises = besoins.shape[0]
+    nb_servies = nb_crises if top_k is None else max(0, min(int(top_k), nb_crises))
+    
+    # Détermine l'ordre de service (uniquement pour les top_k crises si demandé)
+    if scores is None:
+        ordre = np.arange(nb_servies)
+    elif nb_servies < nb_crises:
+        candidates = np.argpartition(-scores, nb_servies - 1)[:nb_servies] if nb_servies > 0 else np.empty(0, dtype=np.intp)
+        ordre = candidates[np.argsort(-scores[candidates], kind='stable')]
+    else:
+        ordre = np.argsort(-scores, kind='stable')
+    
+    # Quantité déjà servie avant chaque crise, puis part restante du stock pour cette crise
+    besoins_ordonnes = besoins[ordre]
+    servi_avant = np.cumsum(besoins_ordonnes, axis=0) - besoins_ordonnes
+    reste = np.asarray(stock_allouable, dtype=np.int64) - servi_avant
+    allocations_ordonnees = np.clip(reste, 0, besoins_ordonnes)
+    
+    allocations = np.zeros_like(besoins, dtype=np.int64)
+    allocations[ordre] = allocations_ordonnees
+    return allocations
+
+
+def repartir_equitable(besoins, stock_allouable, poids=None):
+    """
+    Répartit chaque ressource par remplissage par niveau (water-filling): maximise le plus petit
+    pourcentage satisfait divisé par le poids de la crise
+    
+    Chaque crise i reçoit min(100%, λ × poids_i) de son besoin, où le niveau λ de chaque ressource
+    est le plus grand niveau compatible avec le stock. Sans poids, tous les pourcentages sont égaux
+    (même partage que repartir_proportionnel); avec les scores d'urgence, les crises les plus
+    urgentes sont couvertes en priorité sans qu'aucune ne soit privée de ressources. Les unités
+    laissées par la troncature à l'entier sont ensuite données aux crises dont la part tronquée
+    est la plus grande, pour utiliser tout le stock.
+    
+    Le coût est celui d'un tri unique des poids (O(n log n)), commun aux ressources, puis de
+    sommes cumulées vectorisées sur toutes les ressources.
+    
+    Args:
+        besoins (numpy.ndarray): Besoins entiers, dimensions (nb_crises, nb_ressources)
+        stock_allouable (numpy.ndarray): Stock allouable de chaque ressource (nb_ressources)
+        poids (numpy.ndarray): Poids de chaque crise (nb_crises), par ex. scores d'urgence. Défaut: égaux
+    
+    Returns:
+        numpy.ndarray: Allocations entières, dimensions (nb_crises, nb_ressources)
+    """
+    nb_crises, nb_ressources = besoins.shape
+    if nb_crises == 0:
+        return np.zeros((0, nb_ressources), dtype=np.int64)
+    stock = np.asarray(stock_allouable, dtype=np.float64)
+    
+    poids = np.ones(nb_crises) if poids is None else np.asarray(poids, dtype=np.float64)
+    poids_max = poids.max()
+    poids = poids / poids_max if poids_max > 0 else np.ones(nb_crises)
+    # Un poids nul ne reçoit que ce qui reste une fois toutes les autres crises couvertes
+    poids = np.where(poids > 0, poids, 1e-9)
+    
+    # Les crises atteignent 100% dans l'ordre des poids décroissants (niveau 1 / poids_i)
+    ordre = np.argsort(-poids, kind='stable')
+    besoins_ordonnes = besoins[ordre].astype(np.float64)
+    poids_ordonnes = poids[ordre]
+    
+    # Stock nécessaire pour que les k premières crises soient couvertes à 100%:
+    # Σ_{j<k} besoin_j + (1 / poids_k) × Σ_{j>=k} poids_j × besoin_j
+    servi_couvertes = np.vstack([np.zeros(nb_ressources), np.cumsum(besoins_ordonnes, axis=0)])
+    besoins_ponderes = besoins_ordonnes * poids_ordonnes[:, None]
+    reste_pondere = np.vstack([np.cumsum(besoins_ponderes[::-1], axis=0)[::-1], np.zeros(nb_ressources)])
+    stock_necessaire = servi_couvertes[:-1] + reste_pondere[:-1] / poids_ordonnes[:, None]
+    
+    # Nombre de crises couvertes à 100% et niveau λ de chaque ressource
+    nb_couvertes = (stock_necessaire <= stock).sum(axis=0)
+    colonnes = np.arange(nb_ressources)
+    niveau = np.divide(stock - servi_couvertes[nb_couvertes, colonnes], reste_pondere[nb_couvertes, colonnes],
+                       out=np.full(nb_ressources, np.inf), where=reste_pondere[nb_couvertes, colonnes] > 0)
+    
+    fractions = np.minimum(1.0, niveau[None, :] * poids_ordonnes[:, None])
+    parts = besoins_ordonnes * fractions
+    allocations_ordonnees = np.minimum(np.trunc(parts), besoins_ordonnes)
+    
+    # Distribue les unités perdues par la troncature (plus forts restes, sans dépasser les besoins)
+    restes = np.clip(np.minimum(stock, besoins_ordonnes.sum(axis=0)) - allocations_ordonnees.sum(axis=0), 0, nb_crises)
+    for j in np.flatnonzero(restes >= 1):
+        nb_unites = int(restes[j])
+        priorite = np.where(allocations_ordonnees[:, j] < besoins_ordonnes[:, j], parts[:, j] - allocations_ordonnees[:, j], -1.0)
+        gagnantes = np.argpartition(-priorite, nb_unites - 1)[:nb_unites]
+        allocations_ordonnees[gagnantes[priorite[gagnantes] >= 0], j] += 1
+    
+    allocations = np.zeros((nb_crises, nb_ressources), dtype=np.int64)
+    allocations[ordre] = allocations_ordonnees.astype(np.int64)
+    return allocations
+
+
+class EtatAllocationOptimale:
+    """
+    Mémorise la dernière solution de repartir_optimal pour repartir de celle-ci (démarrage à chaud)
+    lorsque seuls le stock ou quelques crises changent
+    
+    Attributes:
+        identifiants (numpy.ndarray): Identifiant de chaque crise de la dernière résolution
+        besoins (numpy.ndarray): Besoins utilisés, dimensions (nb_crises, nb_ressources)
+        poids (numpy.ndarray): Poids d'urgence utilisés (nb_crises)
+        plafonds (numpy.ndarray): Plafonds de satisfaction utilisés (nb_crises)
+        satisfaction (numpy.ndarray): Fraction du besoin satisfaite de chaque crise (nb_crises)
+        prix (numpy.ndarray): Valeur marginale d'une unité de chaque ressource (variables duales)
+        a_chaud (bool): True si la dernière résolution a pu réutiliser la solution précédente
+    """
+    
+    def __init__(self):
+        self.identifiants = None
+        self.besoins = None
+        self.poids = None
+        self.plafonds = None
+        self.satisfaction = None
+        self.prix = None
+        self.a_chaud = False
+
+
+def _resoudre_lp_satisfaction(besoins, poids, plafonds, stock):
+    """
+    Résout max Σ poids_i × s_i  sous  Σ_i s_i × besoin_ir <= stock_r  et  0 <= s_i <= plafond_i
+    avec le solveur HiGHS (scipy)
+    
+    Args:
+        besoins (numpy.ndarray): Besoins, dimensions (nb_crises, nb_ressources)
+        poids (numpy.ndarray): Poids d'urgence (nb_crises)
+        plafonds (numpy.ndarray): Satisfaction maximale de chaque crise (nb_crises)
+        stock (numpy.ndarray): Stock disponible de chaque ressource (nb_ressources)
+    
+    Returns:
+        tuple: (satisfaction, prix) - fraction satisfaite de chaque crise et variable duale
+               (valeur marginale d'une unité) de chaque ressource
+    """
+    from scipy.optimize import linprog
+    
+    nb_crises, nb_ressources = besoins.shape
+    satisfaction = np.zeros(nb_crises)
+    prix = np.zeros(nb_ressources)
+    if nb_crises == 0:
+        return satisfaction, prix
+    
+    stock = np.maximum(np.asarray(stock, dtype=np.float64), 0.0)
+    
+    # Une contrainte par ressource demandée, normalisée par son stock (ou par le besoin total
+    # si la ressource est épuisée) pour un problème bien conditionné
+    besoin_total = besoins.sum(axis=0)
+    lignes = np.flatnonzero(besoin_total > 0)
+    echelle = np.where(stock[lignes] > 0, stock[lignes], besoin_total[lignes])
+    contraintes = besoins[:, lignes].T / echelle[:, None]
+    
+    resultat = linprog(
+        -poids,
+        A_ub=contraintes if len(lignes) else None,
+        b_ub=stock[lignes] / echelle if len(lignes) else None,
+        bounds=np.column_stack([np.zeros(nb_crises), plafonds]),
+        method='highs'
+    )
+    if resultat.status != 0:
+        raise RuntimeError(f"Échec de l'optimisation de l'allocation: {resultat.message}")
+    
+    satisfaction = np.clip(resultat.x, 0.0, plafonds)
+    if len(lignes):
+        prix[lignes] = -resultat.ineqlin.marginals / echelle
+    return satisfaction, prix
+
+
+def repartir_optimal(besoins, stock_allouable, poids, plafonds=None, etat=None, identifiants=None, diagnostics=None):
+    """
+    Répartit le stock en maximisant la satisfaction totale pondérée par l'urgence
+    
+    Chaque crise i reçoit la même fraction s_i de son besoin pour toutes les ressources
+    (une crise ne peut utiliser des tentes sans eau ni personnel), et le programme linéaire
+    maximise Σ poids_i × s_i sous les contraintes de stock et 0 <= s_i <= plafond_i.
+    Contrairement au coefficient unique, le stock n'est pas gaspillé sur des ressources
+    qu'une crise ne pourra pas utiliser faute des autres.
+    
+    Le stock que cette fraction commune laisse libre (ressources non limitantes, unités perdues
+    à l'arrondi) est ensuite distribué par urgence décroissante aux besoins restants, dans la
+    limite des plafonds (comme repartir_par_priorite): aucune unité ne reste inutilisée tant
+    qu'une crise non plafonnée en manque.
+    
+    Si un état est fourni, la solution précédente sert de point de départ: les crises
+    inchangées qui étaient à l'une de leurs bornes (0 ou plafond) sont fixées et seul
+    le reste est re-optimisé. L'optimalité du résultat est vérifiée avec les variables
+    duales; en cas d'échec, le problème complet est résolu.
+    
+    Args:
+        besoins (numpy.ndarray): Besoins entiers, dimensions (nb_crises, nb_ressources)
+        stock_allouable (numpy.ndarray): Stock allouable de chaque ressource (nb_ressources)
+        poids (numpy.ndarray): Poids d'urgence de chaque crise (nb_crises)
+        plafonds (numpy.ndarray ou float): Fraction maximale du besoin accordée à chaque crise (défaut: 1.0)
+        etat (EtatAllocationOptimale): État de la résolution précédente, mis à jour (optionnel)
+        identifiants (array-like): Identifiant de chaque crise, pour retrouver les crises
+                                   inchangées d'une résolution à l'autre (défaut: position)
+        diagnostics (dict): Si fourni, reçoit 'prix' (variables duales: valeur d'une unité de
+                            chaque ressource) et 'satisfaction' (fraction accordée à chaque crise)
+    
+    Returns:
+        numpy.ndarray: Allocations entières, dimensions (nb_crises, nb_ressources)
+    """
+    nb_crises = besoins.shape[0]
+    besoins_reels = besoins.astype(np.float64)
+    poids = np.asarray(poids, dtype=np.float64)
+    plafonds = np.broadcast_to(np.asarray(1.0 if plafonds is None else plafonds, dtype=np.float64), (nb_crises,)).copy()
+    stock = np.asarray(stock_allouable, dtype=np.float64)
+    identifiants = np.arange(nb_crises) if identifiants is None else np.asarray(identifiants)
+    
+    solution = None
+    if etat is not None and etat.satisfaction is not None:
+        solution = _resoudre_a_chaud(etat, identifiants, besoins_reels, poids, plafonds, stock)
+    
+    if solution is None:
+        satisfaction, prix = _resoudre_lp_satisfaction(besoins_reels, poids, plafonds, stock)
+    else:
+        satisfaction, prix = solution
+    
+    if etat is not None:
+        etat.identifiants = identifiants
+        etat.besoins = besoins_reels
+        etat.poids = poids
+        etat.plafonds = plafonds
+        etat.satisfaction = satisfaction
+        etat.prix = prix
+        etat.a_chaud = solution is not None
+    if diagnostics is not None:
+        diagnostics['prix'] = prix
+        diagnostics['satisfaction'] = satisfaction
+    
+    # Arrondit à l'unité inférieure pour ne jamais dépasser le stock
+    allocations = np.minimum(np.floor(besoins_reels * satisfaction[:, None] + 1e-9).astype(np.int64), besoins)
+    
+    # Second passage: le stock resté libre va aux besoins restants, par urgence décroissante
+    maximums = np.minimum(np.floor(besoins_reels * plafonds[:, None] + 1e-9).astype(np.int64), besoins)
+    stock_libre = np.maximum(np.trunc(stock).astype(np.int64) - allocations.sum(axis=0), 0)
+    allocations += repartir_par_priorite(np.maximum(maximums - allocations, 0), stock_libre, poids)
+    return allocations
+
+
+def _resoudre_a_chaud(etat, identifiants, besoins, poids, plafonds, stock, tolerance=1e-9):
+    """
+    Tente de réutiliser la solution précédente: fixe les crises inchangées qui étaient à une
+    borne, ré-optimise les autres, puis vérifie l'optimalité globale par les coûts réduits
+    
+    Returns:
+        tuple ou None: (satisfaction, prix) si la solution obtenue est prouvée optimale, sinon None
+    """
+    # Retrouve chaque crise dans la résolution précédente
+    positions_precedentes = pd.Index(etat.identifiants)
+    if not positions_precedentes.is_unique:
+        return None
+    anciennes = positions_precedentes.get_indexer(identifiants)
+    connues = anciennes >= 0
+    
+    inchangees = np.zeros(len(identifiants), dtype=bool)
+    inchangees[connues] = (
+        (etat.besoins[anciennes[connues]] == besoins[connues]).all(axis=1)
+        & (etat.poids[anciennes[connues]] == poids[connues])
+        & (etat.plafonds[anciennes[connues]] == plafonds[connues])
+    )
+    
+    # Crises inchangées restées sur une borne: candidates à être fixées
+    satisfaction_precedente = np.zeros(len(identifiants))
+    satisfaction_precedente[connues] = etat.satisfaction[anciennes[connues]]
+    au_minimum = inchangees & (satisfaction_precedente <= tolerance)
+    au_plafond = inchangees & (satisfaction_precedente >= plafonds - tolerance)
+    fixees = au_minimum | au_plafond
+    if not fixees.any():
+        return None
+    
+    # Le stock consommé par les crises fixées au plafond n'est plus disponible pour les autres
+    satisfaction = np.where(au_plafond, plafonds, 0.0)
+    stock_reduit = stock - satisfaction @ besoins
+    if (stock_reduit < -tolerance * np.maximum(stock, 1)).any():
+        return None
+    
+    libres = ~fixees
+    satisfaction_libres, prix = _resoudre_lp_satisfaction(
+        besoins[libres], poids[libres], plafonds[libres], np.maximum(stock_reduit, 0)
+    )
+    satisfaction[libres] = satisfaction_libres
+    
+    # Vérifie les conditions d'optimalité des variables fixées avec les prix du sous-problème
+    couts_reduits = poids - besoins @ prix
+    echelle = tolerance * np.maximum(np.abs(poids), 1)
+    if (couts_reduits[au_plafond] < -echelle[au_plafond]).any() or (couts_reduits[au_minimum] > echelle[au_minimum]).any():
+        return None
+    
+    return satisfaction, prix
+
+
+def _repartir_optimal_crises(besoins, stock_allouable, scores, crises=None, plafonds=None, etat=None,
+                             diagnostics=None, **options):
+    """
+    Adapte repartir_optimal au DataFrame des crises: poids = scores d'urgence normalisés,
+    identifiants = noms des crises, plafonds donnés par un nombre ou un dict {nom_crise: fraction}
+    """
+    score_max = scores.max() if len(scores) else 0
+    poids = scores / score_max if score_max > 0 else np.ones(len(scores))
+    
+    identifiants = crises['nom_crise'].astype(str).to_numpy() if crises is not None else None
+    if isinstance(plafonds, dict):
+        plafonds = crises['nom_crise'].astype(str).map(plafonds).fillna(1.0).to_numpy(dtype=np.float64)
+    
+    return repartir_optimal(besoins, stock_allouable, poids, plafonds=plafonds, etat=etat, identifiants=identifiants,
+                            diagnostics=diagnostics)
+
+
+def _resoudre_lp_budget(besoins, poids, plafonds, stock, couts, budget):
+    """
+    Résout max Σ poids_i × s_i avec achat de ressources:
+    Σ_i s_i × besoin_ir <= stock_r + achat_r,  Σ_r coût_r × achat_r <= budget,  0 <= s_i <= plafond_i
+    
+    Sans stock physique, le problème est un sac à dos fractionnaire (une seule contrainte de
+    budget) résolu exactement en servant les crises par poids / coût décroissant; sinon le
+    programme linéaire est résolu par HiGHS (scipy).
+    
+    Args:
+        besoins (numpy.ndarray): Besoins, dimensions (nb_crises, nb_ressources)
+        poids (numpy.ndarray): Poids d'urgence (nb_crises)
+        plafonds (numpy.ndarray): Satisfaction maximale de chaque crise (nb_crises)
+        stock (numpy.ndarray): Stock physique allouable de chaque ressource (nb_ressources)
+        couts (numpy.ndarray): Coût unitaire de chaque ressource, np.inf si elle ne peut être achetée
+        budget (float): Budget d'achat
+    
+    Returns:
+        tuple: (satisfaction, prix, prix_budget) - fraction satisfaite de chaque crise, valeur
+               marginale d'une unité physique de chaque ressource et d'une unité de budget
+    """
+    nb_crises, nb_ressources = besoins.shape
+    prix = np.zeros(nb_ressources)
+    if nb_crises == 0:
+        return np.zeros(0), prix, 0.0
+    stock = np.maximum(np.asarray(stock, dtype=np.float64), 0.0)
+    budget = max(float(budget), 0.0)
+    achetables = np.isfinite(couts)
+    
+    if not stock.any():
+        # Sac à dos fractionnaire: coût complet de chaque crise, infini si elle a besoin d'une ressource non achetable
+        avec_besoin = besoins > 0
+        cout_crises = np.where(avec_besoin, besoins * np.where(achetables, couts, 0.0), 0.0).sum(axis=1)
+        cout_crises[(avec_besoin & ~achetables).any(axis=1)] = np.inf
+        ratio = np.divide(poids, cout_crises, out=np.full(nb_crises, np.inf), where=cout_crises > 0)
+        ordre = np.argsort(-ratio, kind='stable')
+        
+        cout_plafonne = np.where(np.isfinite(cout_crises), cout_crises * plafonds, 0.0)[ordre]
+        depense_avant = np.cumsum(cout_plafonne) - cout_plafonne
+        reste = budget - depense_avant
+        fraction = np.divide(np.clip(reste, 0, None), cout_plafonne, out=np.ones(nb_crises), where=cout_plafonne > 0)
+        satisfaction = np.zeros(nb_crises)
+        satisfaction[ordre] = np.where(np.isfinite(cout_crises[ordre]), np.minimum(fraction, 1.0) * plafonds[ordre], 0.0)
+        
+        # Valeur d'une unité de budget: rapport poids / coût de la meilleure crise encore servable
+        # (nulle si le budget n'est pas épuisé); une unité physique économise son coût d'achat
+        servables = np.isfinite(cout_crises) & (cout_crises > 0) & (satisfaction < plafonds - 1e-12)
+        budget_epuise = np.where(np.isfinite(cout_crises), cout_crises * satisfaction, 0.0).sum() >= budget * (1 - 1e-9)
+        prix_budget = ratio[servables].max() if servables.any() and budget_epuise else 0.0
+        prix = np.where(achetables, couts, 0.0) * prix_budget
+        return satisfaction, prix, float(prix_budget)
+    
+    from scipy.optimize import linprog
+    
+    # Variables: s_i (nb_crises) puis achat_r exprimé en fraction du besoin total de r
+    besoin_total = besoins.sum(axis=0).astype(np.float64)
+    lignes = np.flatnonzero(besoin_total > 0)
+    echelle = besoin_total[lignes]
+    
+    contraintes_ressources = np.hstack([
+        besoins[:, lignes].T / echelle[:, None],
+        -np.eye(len(lignes))
+    ])
+    cout_achat = np.where(achetables[lignes], couts[lignes], 0.0) * echelle
+    contrainte_budget = np.concatenate([np.zeros(nb_crises), cout_achat / budget if budget > 0 else cout_achat])
+    
+    bornes_achats = np.column_stack([np.zeros(len(lignes)), np.where(achetables[lignes] & (budget > 0), np.inf, 0.0)])
+    resultat = linprog(
+        np.concatenate([-poids, np.zeros(len(lignes))]),
+        A_ub=np.vstack([contraintes_ressources, contrainte_budget]),
+        b_ub=np.concatenate([stock[lignes] / echelle, [1.0 if budget > 0 else 0.0]]),
+        bounds=np.vstack([np.column_stack([np.zeros(nb_crises), plafonds]), bornes_achats]),
+        method='highs'
+    )
+    if resultat.status != 0:
+        raise RuntimeError(f"Échec de l'optimisation de l'allocation sous budget: {resultat.message}")
+    
+    duales = -resultat.ineqlin.marginals
+    prix[lignes] = duales[:len(lignes)] / echelle
+    prix_budget = duales[-1] / budget if budget > 0 else 0.0
+    return np.clip(resultat.x[:nb_crises], 0.0, plafonds), prix, float(prix_budget)
+
+
+def _repartir_budget_crises(besoins, stock_allouable, scores, crises=None, ressources=None, budget=0.0,
+                            couts_unitaires=None, plafonds=None, diagnostics=None, **options):
+    """
+    Mode 'budget': chaque crise reçoit la même fraction de son besoin pour toutes les ressources,
+    les quantités manquantes étant achetées dans la limite du budget (coûts de COUTS_UNITAIRES)
+    """
+    if ressources is None:
+        raise ValueError("Le mode 'budget' nécessite la liste des ressources")
+    couts_unitaires = COUTS_UNITAIRES if couts_unitaires is None else couts_unitaires
+    couts = np.array([couts_unitaires.get(ressource, np.inf) for ressource in ressources], dtype=np.float64)
+    
+    score_max = scores.max() if len(scores) else 0
+    poids = scores / score_max if score_max > 0 else np.ones(len(scores))
+    if isinstance(plafonds, dict):
+        plafonds = crises['nom_crise'].astype(str).map(plafonds).fillna(1.0).to_numpy(dtype=np.float64)
+    plafonds = np.broadcast_to(np.asarray(1.0 if plafonds is None else plafonds, dtype=np.float64), (len(besoins),))
+    
+    satisfaction, prix, prix_budget = _resoudre_lp_budget(besoins.astype(np.float64), poids, plafonds,
+                                                          stock_allouable, couts, budget)
+    if diagnostics is not None:
+        diagnostics['prix'] = prix
+        diagnostics['prix_budget'] = prix_budget
+        diagnostics['satisfaction'] = satisfaction
+    
+    # Arrondit à l'unité inférieure: les achats nécessaires ne dépassent jamais le budget
+    allocations = np.floor(besoins * satisfaction[:, None] + 1e-9).astype(np.int64)
+    allocations = np.minimum(allocations, besoins)
+    if diagnostics is not None:
+        # Quantités prises dans le stock physique et quantités achetées (le reste), avec leur coût
+        totaux = allocations.sum(axis=0)
+        pris_stock = np.minimum(totaux, np.maximum(np.asarray(stock_allouable), 0))
+        achats = totaux - pris_stock
+        diagnostics['pris_stock'] = pris_stock
+        diagnostics['achats'] = achats
+        diagnostics['cout_achats'] = float(np.where(achats > 0, achats * np.where(np.isfinite(couts), couts, 0.0), 0.0).sum())
+    return allocations
+
+
+# Fonctions de répartition par mode d'allocation
+# Chaque fonction reçoit (besoins, stock_allouable, scores, crises=..., ressources=..., **options)
+# et retourne la matrice des allocations; les options inutiles à un mode sont ignorées
+MODES_ALLOCATION = {
+    'proportionnel': lambda besoins, stock_allouable, scores, **options: repartir_proportionnel(besoins, stock_allouable),
+    'priorite': lambda besoins, stock_allouable, scores, top_k=None, **options: repartir_par_priorite(
+        besoins, stock_allouable, scores, top_k),
+    'optimal': _repartir_optimal_crises,
+    'equitable': lambda besoins, stock_allouable, scores, ponderation_urgence=True, **options: repartir_equitable(
+        besoins, stock_allouable, scores if ponderation_urgence else None),
+    'budget': _repartir_budget_crises,
+}
+
+
+def calculer_prix_ombre(mode, besoins, stock_allouable, scores, allocations, diagnostics=None, top_k=None,
+                        ponderation_urgence=True):
+    """
+    Calcule le prix d'ombre de chaque ressource: gain de bénéfice pondéré par l'urgence
+    (Σ score_i / score_max × fraction satisfaite de la crise i) apporté par une unité de plus
+    de cette ressource, ainsi que les crises qui limitent ce gain
+    
+    Les prix sont obtenus sans relancer l'allocation: par dérivation de la règle de partage pour
+    les modes 'proportionnel', 'priorite' et 'equitable', par les variables duales du programme
+    linéaire pour les modes 'optimal' et 'budget' (diagnostics remplis par le mode).
+    
+    Args:
+        mode (str): Mode d'allocation utilisé
+        besoins (numpy.ndarray): Besoins entiers, dimensions (nb_crises, nb_ressources)
+        stock_allouable (numpy.ndarray): Stock allouable de chaque ressource (nb_ressources)
+        scores (numpy.ndarray): Scores d'urgence (nb_crises)
+        allocations (numpy.ndarray): Allocations obtenues, dimensions (nb_crises, nb_ressources)
+        diagnostics (dict): Diagnostics du mode ('prix', 'satisfaction'), modes 'optimal' et 'budget'
+        top_k (int): Nombre de crises servies, mode 'priorite'
+        ponderation_urgence (bool): Pondération du partage, mode 'equitable'
+    
+    Returns:
+        tuple: (prix, limitantes) - prix d'ombre de chaque ressource (nb_ressources) et, pour
+               chaque ressource, les positions des crises dont la satisfaction varierait avec le stock
+    """
+    nb_crises, nb_ressources = besoins.shape
+    prix = np.zeros(nb_ressources)
+    limitantes = [np.empty(0, dtype=np.intp)] * nb_ressources
+    if nb_crises == 0:
+        return prix, limitantes
+    
+    score_max = scores.max()
+    urgence = scores / score_max if score_max > 0 else np.ones(nb_crises)
+    stock = np.asarray(stock_allouable, dtype=np.float64)
+    avec_besoin = besoins > 0
+    
+    if mode in ('optimal', 'budget'):
+        # Variables duales des contraintes de stock; les crises limitantes sont celles dont la
+        # satisfaction n'est pas sur une borne (les seules que le solveur ferait varier)
+        diagnostics = diagnostics or {}
+        if 'prix' not in diagnostics:
+            return prix, limitantes
+        prix = np.maximum(np.asarray(diagnostics['prix'], dtype=np.float64), 0.0)
+        satisfaction = diagnostics['satisfaction']
+        interieures = (satisfaction > 1e-9) & (allocations < besoins).any(axis=1)
+        for j in np.flatnonzero(prix > 0):
+            limitantes[j] = np.flatnonzero(interieures & avec_besoin[:, j])
+        return prix, limitantes
+    
+    if mode == 'priorite':
+        nb_servies = nb_crises if top_k is None else max(0, min(int(top_k), nb_crises))
+        ordre = np.argsort(-scores, kind='stable')[:nb_servies]
+    
+    for j in range(nb_ressources):
+        besoin_total = besoins[:, j].sum()
+        if stock[j] >= besoin_total:
+            continue
+        
+        if mode == 'proportionnel':
+            # Coefficient unique stock / besoin_total: chaque crise avec besoin gagne 1 / besoin_total
+            limitantes[j] = np.flatnonzero(avec_besoin[:, j])
+            prix[j] = urgence[limitantes[j]].sum() / besoin_total
+        elif mode == 'priorite':
+            # Seule la première crise non entièrement servie (dans l'ordre de service) reçoit l'unité
+            non_servies = ordre[allocations[ordre, j] < besoins[ordre, j]]
+            if len(non_servies):
+                k = non_servies[0]
+                limitantes[j] = np.array([k])
+                prix[j] = urgence[k] / besoins[k, j]
+        elif mode == 'equitable':
+            # Les crises non couvertes reçoivent λ × poids_i: dλ/dstock = 1 / Σ poids_i × besoin_i
+            poids = urgence if ponderation_urgence and score_max > 0 else np.ones(nb_crises)
+            poids = np.where(poids > 0, poids, 1e-9)
+            limitantes[j] = np.flatnonzero(allocations[:, j] < besoins[:, j])
+            denominateur = (poids[limitantes[j]] * besoins[limitantes[j], j]).sum()
+            if denominateur > 0:
+                prix[j] = (urgence[limitantes[j]] * poids[limitantes[j]]).sum() / denominateur
+    
+    return prix, limitantes
+
+
+def _selectionner_crises(df_crises, seulement_actuelles):
+    """
+    Rassemble les crises à traiter (DataFrame, entrepôt indexé ou morceaux lus en flux)
+    et ne garde que les crises en cours si demandé
+    
+    Returns:
+        pandas.DataFrame ou None: Crises sélectionnées, None si aucune crise actuelle n'a été trouvée
+    """
+    # Entrepôt indexé: les crises actuelles sont lues directement dans l'index des statuts
+    if isinstance(df_crises, EntrepotCrises):
+        df_crises = df_crises.par_statut(True) if seulement_actuelles else df_crises.df
+    
+    # Morceaux d'un catalogue lu en flux: ne garde que les lignes utiles avant de les rassembler
+    if not isinstance(df_crises, pd.DataFrame):
+        if seulement_actuelles:
+            df_crises = (morceau[morceau['en_cours'] == True] if 'en_cours' in morceau.columns else morceau
+                         for morceau in df_crises)
+        df_crises = concatener_morceaux_crises(df_crises)
+    
     # Filtre les crises actuelles si demandé
     if seulement_actuelles:
         if 'en_cours' in df_crises.columns:
             df_crises_filtre = df_crises[df_crises['en_cours'] == True].copy()
             if len(df_crises_filtre) == 0:
                 print("⚠ Aucune crise actuelle trouvée. Vérifiez la colonne 'en_cours' dans les données.")
-                # Calcule le stock réservé (25%)
-                stock_reserve = {k: int(v * 0.25) for k, v in stock_disponible.items()}
-                return pd.DataFrame(), stock_disponible, stock_reserve
+                return None
         else:
             print("⚠ Colonne 'en_cours' non trouvée. Toutes les crises seront considérées.")
             df_crises_filtre = df_crises.copy()
     else:
         df_crises_filtre = df_crises.copy()
     
-    # Crée une copie du DataFrame des crises pour ne pas modifier l'original
-    df_allocation = df_crises_filtre.copy()
+    return df_crises_filtre
+
+
+def _calculer_besoins_urgence(df_allocation, df_besoins):
+    """
+    Calcule les besoins de chaque crise ajustés par son score d'urgence (colonne score_urgence)
+    
+    Returns:
+        tuple: (besoins, facteur_score_urgence) - matrice entière (nb_crises, nb_ressources)
+               et facteur appliqué à chaque crise
+    """
+    # Normalise les scores d'urgence pour les utiliser comme facteur d'ajustement des besoins
+    # On normalise par rapport au score moyen pour avoir un facteur autour de 1.0
+    score_moyen = df_allocation['score_urgence'].mean()
+    if score_moyen > 0:
+        facteur_score_urgence = df_allocation['score_urgence'].to_numpy() / score_moyen
+    else:
+        facteur_score_urgence = np.ones(len(df_allocation))
     
-    if len(df_allocation) == 0:
+    besoins, _ = calculer_besoins_lot(df_allocation['type_crise'], facteur_score_urgence, df_besoins)
+    return besoins, facteur_score_urgence
+
+
+class ResultatAllocation:
+    """
+    Résultat d'allocation compact: matrices entières crises × ressources, indexées par la position
+    de la crise (ordre d'urgence décroissant) et par celle de la ressource, au lieu de trois
+    colonnes par ressource ajoutées à une copie complète des crises
+    
+    Les colonnes descriptives ne sont pas copiées: le DataFrame large de allouer_ressources_glouton
+    est reconstruit à la demande à partir des crises d'origine (puis gardé), et le format long ne
+    contient que les couples crise × ressource avec un besoin ou une allocation.
+    
+    Attributes:
+        crises (pandas.DataFrame): nom_crise, type_crise et score_urgence des crises, triées par
+                                   score d'urgence décroissant
+        ressources (list): Noms des ressources, dans l'ordre des colonnes des matrices
+        allocations (numpy.ndarray): Allocations entières, dimensions (nb_crises, nb_ressources)
+        besoins (numpy.ndarray): Besoins entiers, dimensions (nb_crises, nb_ressources)
+        facteur_score_urgence (numpy.ndarray): Facteur appliqué aux besoins de chaque crise
+        attrs (dict): Informations sur l'allocation (prix_ombre, crises_limitantes, ...)
+    
+    Les matrices sont en int32 lorsque toutes les quantités le permettent (voir compacter).
+    """
+    
+    def __init__(self, source, ordre, crises, ressources, allocations, besoins, facteur_score_urgence, attrs=None):
+        """
+        Args:
+            source (pandas.DataFrame): Crises d'origine (toutes colonnes), non triées
+            ordre (numpy.ndarray): Position dans source de chaque crise du résultat
+            crises, ressources, allocations, besoins, facteur_score_urgence, attrs: voir Attributes
+        """
+        self._source = source
+        self._ordre = ordre
+        self.crises = crises
+        self.ressources = list(ressources)
+        self.allocations = allocations
+        self.besoins = besoins
+        self.facteur_score_urgence = facteur_score_urgence
+        self.attrs = dict(attrs or {})
+        self._dataframe_large = None
+    
+    def __len__(self):
+        return len(self.crises)
+    
+    @property
+    def nbytes(self):
+        """Mémoire occupée (octets), crises d'origine et DataFrame large éventuellement construit compris"""
+        taille = int(self._source.memory_usage(deep=True).sum()) + int(self.crises.memory_usage(deep=True).sum())
+        taille += self._ordre.nbytes + self.allocations.nbytes + self.besoins.nbytes + self.facteur_score_urgence.nbytes
+        if self._dataframe_large is not None:
+            taille += int(self._dataframe_large.memory_usage(deep=True).sum())
+        return taille
+    
+    def compacter(self):
+        """Passe les matrices en int32 si toutes les quantités y tiennent (moitié moins de mémoire)"""
+        maximum = max(self.besoins.max(initial=0), self.allocations.max(initial=0))
+        if maximum <= np.iinfo(np.int32).max and min(self.besoins.min(initial=0), self.allocations.min(initial=0)) >= 0:
+            self.besoins = self.besoins.astype(np.int32, copy=False)
+            self.allocations = self.allocations.astype(np.int32, copy=False)
+        return self
+    
+    def copy(self):
+        """Copie dont les matrices et attributs peuvent être modifiés sans toucher l'original"""
+        return ResultatAllocation(self._source, self._ordre, self.crises.copy(), self.ressources,
+                                  self.allocations.copy(), self.besoins.copy(), self.facteur_score_urgence.copy(),
+                                  copy.deepcopy(self.attrs))
+    
+    def en_dataframe_large(self, lignes=None):
+        """
+        Construit le DataFrame au format de allouer_ressources_glouton: colonnes des crises puis
+        allocation_*, besoin_* et pourcentage_satisfait_* de chaque ressource
+        
+        Args:
+            lignes (slice ou array-like): Positions des crises à inclure (défaut: toutes, et le
+                                          DataFrame construit est gardé pour les appels suivants)
+        
+        Returns:
+            pandas.DataFrame: Allocation au format large
+        """
+        if lignes is None and self._dataframe_large is not None:
+            return self._dataframe_large
+        
+        selection = slice(None) if lignes is None else lignes
+        allocations = self.allocations[selection].astype(np.int64, copy=False)
+        besoins = self.besoins[selection].astype(np.int64, copy=False)
+        pourcentages = calculer_pourcentages_satisfaits(allocations, besoins)
+        
+        # Colonnes d'origine des crises (types du schéma conservés), puis score d'urgence
+        df_allocation = self._source.iloc[self._ordre[selection]]
+        df_allocation.index = pd.RangeIndex(len(self.crises))[selection]
+        df_allocation['score_urgence'] = self.crises['score_urgence'].to_numpy()[selection]
+        
+        # Ajoute les colonnes allocation/besoin/pourcentage de chaque ressource en une seule fois
+        colonnes = {}
+        for j, ressource in enumerate(self.ressources):
+            colonnes[f'allocation_{ressource}'] = allocations[:, j]
+            colonnes[f'besoin_{ressource}'] = besoins[:, j]
+            colonnes[f'pourcentage_satisfait_{ressource}'] = pourcentages[:, j]
+        colonnes['facteur_score_urgence'] = self.facteur_score_urgence[selection]
+        
+        # Ajoute une colonne avec le score d'urgence normalisé (pour affichage)
+        score_max = self.crises['score_urgence'].max()
+        if score_max > 0:
+            colonnes['score_urgence_normalise'] = (df_allocation['score_urgence'] / score_max * 100).round(2).to_numpy()
+        else:
+            colonnes['score_urgence_normalise'] = np.zeros(len(df_allocation), dtype=np.int64)
+        
+        df_allocation = pd.concat([df_allocation, pd.DataFrame(colonnes, index=df_allocation.index)], axis=1)
+        df_allocation.attrs = dict(self.attrs)
+        if lignes is None:
+            self._dataframe_large = df_allocation
+        return df_allocation
+    
+    def en_format_long(self, inclure_zeros=False):
+        """
+        Construit le tableau long: une ligne par couple crise × ressource
+        
+        Args:
+            inclure_zeros (bool): Si False, omet les couples sans besoin ni allocation
+        
+        Returns:
+            pandas.DataFrame: Colonnes id_crise (position dans crises), nom_crise, ressource
+                              (catégorielle), allocation, besoin et pourcentage_satisfait
+        """
+        if inclure_zeros:
+            positions, indices = np.indices(self.besoins.shape).reshape(2, -1)
+        else:
+            positions, indices = np.nonzero((self.besoins > 0) | (self.allocations > 0))
+        allocations = self.allocations[positions, indices]
+        besoins = self.besoins[positions, indices]
+        
+        return pd.DataFrame({
+            'id_crise': positions,
+            'nom_crise': self.crises['nom_crise'].to_numpy()[positions],
+            'ressource': pd.Categorical.from_codes(indices, categories=self.ressources),
+            'allocation': allocations,
+            'besoin': besoins,
+            'pourcentage_satisfait': calculer_pourcentages_satisfaits(allocations, besoins),
+        })
+    
+    def en_dict(self):
+        """
+        Sérialise le format long en colonnes (listes de types Python natifs) pour une réponse JSON;
+        les noms des crises et des ressources ne sont écrits qu'une fois
+        
+        Returns:
+            dict: crises et ressources (noms), puis id_crise, id_ressource, allocation et besoin
+        """
+        positions, indices = np.nonzero((self.besoins > 0) | (self.allocations > 0))
+        return {
+            'crises': self.crises['nom_crise'].astype(str).tolist(),
+            'ressources': list(self.ressources),
+            'id_crise': positions.tolist(),
+            'id_ressource': indices.tolist(),
+            'allocation': self.allocations[positions, indices].tolist(),
+            'besoin': self.besoins[positions, indices].tolist(),
+        }
+
+
+def _resultat_allocation_vide(df_crises, ressources):
+    """ResultatAllocation sans crise"""
+    crises = pd.DataFrame({'nom_crise': pd.Series(dtype=object), 'type_crise': pd.Series(dtype=object),
+                           'score_urgence': pd.Series(dtype=np.float64)})
+    vide = np.zeros((0, len(ressources)), dtype=np.int64)
+    return ResultatAllocation(df_crises, np.zeros(0, dtype=np.intp), crises, ressources, vide, vide.copy(), np.zeros(0))
+
+
+def allouer_ressources_glouton(df_crises, df_besoins, stock_disponible, seulement_actuelles=True,
+                               mode='proportionnel', format_resultat='large', **options):
+    """
+    Alloue les ressources disponibles aux crises selon une logique simple :
+    - 25% des ressources sont réservées (non utilisées)
+    - 75% des ressources sont allouables
+    - Calcule les besoins en fonction du type de crise et du score d'urgence (pas de l'intensité seule)
+    - Pour chaque ressource, calcule le besoin total de toutes les crises
+    - Si le stock allouable est suffisant : donne à chaque crise son besoin complet
+    - Sinon : divise les allocations par un coefficient unique pour partager équitablement
+    
+    Args:
+        df_crises (pandas.DataFrame, EntrepotCrises ou iterable): DataFrame des crises,
+            entrepôt indexé, ou morceaux produits par iterer_crises
+        df_besoins (pandas.DataFrame): DataFrame des besoins par type de crise
+        stock_disponible (dict): Dictionnaire des ressources disponibles
+                                 Ex: {'eau_potable_litres': 10000000, 'tentes': 5000, ...}
+        seulement_actuelles (bool): Si True, ne considère que les crises en cours
+        mode (str): Mode de répartition, une clé de MODES_ALLOCATION:
+                    - 'proportionnel': même coefficient de réduction pour toutes les crises
+                    - 'priorite': crises servies par urgence décroissante
+                    - 'optimal': programme linéaire maximisant la satisfaction pondérée par l'urgence
+                    - 'equitable': remplissage par niveau (maximise le plus petit pourcentage satisfait)
+                    - 'budget': achète ce qui manque au stock avec un budget monétaire
+        **options: Options propres au mode:
+                   - top_k (int), mode 'priorite': nombre de crises les plus urgentes servies
+                   - plafonds (float ou dict), etat (EtatAllocationOptimale), mode 'optimal':
+                     voir allouer_ressources_optimal
+                   - ponderation_urgence (bool), mode 'equitable': pondère le partage par le
+                     score d'urgence (défaut: True; False = pourcentages égaux)
+                   - budget (float), mode 'budget': montant disponible pour les achats (défaut: 0);
+                     couts_unitaires (dict) et plafonds: voir allouer_ressources_budget
+        format_resultat (str): 'large' (défaut) pour le DataFrame décrit ci-dessous, 'compact'
+                               pour un ResultatAllocation (matrices crises × ressources, sans
+                               colonnes par ressource; DataFrame large construit à la demande)
+    
+    Returns:
+        tuple: (df_allocation, stock_restant, stock_reserve) - DataFrame avec allocations, stocks restants et stocks réservés.
+               df_allocation.attrs contient 'prix_ombre' ({ressource: valeur d'une unité de plus}),
+               'crises_limitantes' ({ressource: [noms des NB_MAX_CRISES_LIMITANTES plus urgentes]}),
+               'nb_crises_limitantes' ({ressource: nombre}) et, en mode 'budget', 'prix_budget'
+    """
+    if mode not in MODES_ALLOCATION:
+        raise ValueError(f"Mode d'allocation inconnu: '{mode}'. Modes disponibles: {list(MODES_ALLOCATION)}")
+    if format_resultat not in ('large', 'compact'):
+        raise ValueError(f"Format de résultat inconnu: '{format_resultat}'. Formats disponibles: ['large', 'compact']")
+    
+    # Liste des ressources (colonnes du tableau des besoins)
+    ressources = [col for col in df_besoins.columns if col != 'type_crise']
+    
+    df_crises_filtre = _selectionner_crises(df_crises, seulement_actuelles)
+    if df_crises_filtre is None:
+        # Calcule le stock réservé (25%)
+        stock_reserve = {k: int(v * RATIO_RESERVE) for k, v in stock_disponible.items()}
+        if format_resultat == 'compact':
+            return _resultat_allocation_vide(pd.DataFrame(), ressources), stock_disponible, stock_reserve
+        return pd.DataFrame(), stock_disponible, stock_reserve
+    
+    if len(df_crises_filtre) == 0:
         print("⚠ Aucune crise à traiter.")
         # Calcule le stock réservé (25%)
-        stock_reserve = {k: int(v * 0.25) for k, v in stock_disponible.items()}
-        return df_allocation, stock_disponible, stock_reserve
+        stock_reserve = {k: int(v * RATIO_RESERVE) for k, v in stock_disponible.items()}
+        if format_resultat == 'compact':
+            return _resultat_allocation_vide(df_crises_filtre, ressources), stock_disponible, stock_reserve
+        return df_crises_filtre, stock_disponible, stock_reserve
+    
+    # Calcule le score d'urgence de toutes les crises (gardé pour l'affichage)
+    score_urgence = calculer_scores_urgence(df_crises_filtre)
+    
+    # Trie les crises par score d'urgence décroissant (pour l'affichage); seules les colonnes utiles
+    # au calcul sont copiées, les autres sont reprises à la construction du DataFrame large
+    ordre = pd.Series(score_urgence).sort_values(ascending=False).index.to_numpy()
+    df_allocation = df_crises_filtre[['nom_crise', 'type_crise']].iloc[ordre].reset_index(drop=True)
+    df_allocation['score_urgence'] = score_urgence[ordre]
+    
+    # Calcule le stock réservé (25% de chaque ressource) et le stock allouable (75%)
+    stock_total = np.array([stock_disponible.get(ressource, 0) for ressource in ressources], dtype=np.float64)
+    stock_reserve_tableau = np.trunc(stock_total * RATIO_RESERVE)
+    stock_allouable_tableau = np.trunc(stock_total - stock_reserve_tableau).astype(np.int64)
+    stock_reserve = {ressource: int(quantite) for ressource, quantite in zip(ressources, stock_reserve_tableau)}
+    
+    # Calcule les besoins de toutes les crises en une fois en utilisant le score d'urgence
+    besoins, facteur_score_urgence = _calculer_besoins_urgence(df_allocation, df_besoins)
+    
+    # Répartit chaque ressource selon le mode choisi (matrice crises × ressources)
+    scores = df_allocation['score_urgence'].to_numpy()
+    diagnostics = {}
+    allocations = MODES_ALLOCATION[mode](
+        besoins, stock_allouable_tableau, scores, crises=df_allocation,
+        ressources=ressources, diagnostics=diagnostics, **options
+    )
+    
+    # Calcule le stock restant (dans les 75% allouables; le mode 'budget' peut allouer plus grâce aux achats)
+    stock_restant_tableau = np.maximum(stock_allouable_tableau - allocations.sum(axis=0), 0)
+    stock_restant = {ressource: int(quantite) for ressource, quantite in zip(ressources, stock_restant_tableau)}
+    
+    # Valeur marginale d'une unité de chaque ressource et crises qui la limitent
+    prix, limitantes = calculer_prix_ombre(
+        mode, besoins, stock_allouable_tableau, scores, allocations, diagnostics=diagnostics,
+        top_k=options.get('top_k'), ponderation_urgence=options.get('ponderation_urgence', True)
+    )
+    noms = df_allocation['nom_crise'].to_numpy()
+    attrs = {
+        'prix_ombre': {ressource: float(p) for ressource, p in zip(ressources, prix)},
+        'crises_limitantes': {ressource: noms[positions[:NB_MAX_CRISES_LIMITANTES]].tolist()
+                              for ressource, positions in zip(ressources, limitantes)},
+        'nb_crises_limitantes': {ressource: len(positions) for ressource, positions in zip(ressources, limitantes)},
+    }
+    if 'prix_budget' in diagnostics:
+        attrs['prix_budget'] = float(diagnostics['prix_budget'])
+    
+    resultat = ResultatAllocation(df_crises_filtre, ordre, df_allocation, ressources, allocations, besoins,
+                                  facteur_score_urgence, attrs)
+    if format_resultat == 'compact':
+        return resultat.compacter(), stock_restant, stock_reserve
+    return resultat.en_dataframe_large(), stock_restant, stock_reserve
+
+
+def allouer_ressources_optimal(df_crises, df_besoins, stock_disponible, seulement_actuelles=True,
+                               plafonds=None, etat=None):
+    """
+    Alloue les ressources en résolvant un programme linéaire (solveur HiGHS local via scipy):
+    - 25% des ressources sont réservées, comme pour l'allocation gloutonne
+    - chaque crise reçoit la même fraction s de son besoin pour toutes les ressources
+    - maximise Σ score_urgence × s sous les contraintes de stock allouable (75%)
+      et de plafond par crise (s <= plafond)
+    
+    Args:
+        df_crises (pandas.DataFrame, EntrepotCrises ou iterable): Crises (voir allouer_ressources_glouton)
+        df_besoins (pandas.DataFrame): DataFrame des besoins par type de crise
+        stock_disponible (dict): Dictionnaire des ressources disponibles
+        seulement_actuelles (bool): Si True, ne considère que les crises en cours
+        plafonds (float ou dict): Fraction maximale du besoin accordée à chaque crise,
+                                  commune (float) ou par nom de crise (dict). Défaut: 1.0
+        etat (EtatAllocationOptimale): Si fourni, la solution précédente qu'il contient sert de
+                                       démarrage à chaud, puis il est mis à jour avec la nouvelle
+    
+    Returns:
+        tuple: (df_allocation, stock_restant, stock_reserve) - même format que allouer_ressources_glouton
+    """
+    return allouer_ressources_glouton(
+        df_crises, df_besoins, stock_disponible, seulement_actuelles=seulement_actuelles,
+        mode='optimal', plafonds=plafonds, etat=etat
+    )
+
+
+def allouer_ressources_budget(df_crises, df_besoins, budget, stock_disponible=None, seulement_actuelles=True,
+                              plafonds=None, couts_unitaires=None):
+    """
+    Alloue les ressources en achetant ce qui manque avec un budget monétaire:
+    - le stock physique éventuel garde sa réserve de 25%, les achats sont alloués en totalité
+    - chaque crise reçoit la même fraction de son besoin pour toutes les ressources
+    - maximise Σ score_urgence × fraction sous les contraintes de stock + achats et de budget
+    
+    Args:
+        df_crises (pandas.DataFrame, EntrepotCrises ou iterable): Crises (voir allouer_ressources_glouton)
+        df_besoins (pandas.DataFrame): DataFrame des besoins par type de crise
+        budget (float): Budget disponible pour les achats
+        stock_disponible (dict): Stock physique déjà disponible (défaut: aucun)
+        seulement_actuelles (bool): Si True, ne considère que les crises en cours
+        plafonds (float ou dict): Fraction maximale du besoin accordée à chaque crise (défaut: 1.0)
+        couts_unitaires (dict): Coût unitaire de chaque ressource (défaut: COUTS_UNITAIRES);
+                                une ressource sans coût ne peut pas être achetée
+    
+    Returns:
+        tuple: (df_allocation, stock_restant, stock_reserve, achats)
+               - df_allocation, stock_restant, stock_reserve: même format que allouer_ressources_glouton
+               - achats: coûts des quantités achetées, au format de calculer_couts_pourcentages
+                 ({ressource: {'quantite', 'cout', 'pourcentage'}, 'cout_total', 'pourcentage_total'})
+    """
+    stock_disponible = {} if stock_disponible is None else stock_disponible
+    couts_unitaires = COUTS_UNITAIRES if couts_unitaires is None else couts_unitaires
+    ressources = [col for col in df_besoins.columns if col != 'type_crise']
+    stock_complet = {ressource: stock_disponible.get(ressource, 0) for ressource in ressources}
+    
+    df_allocation, stock_restant, stock_reserve = allouer_ressources_glouton(
+        df_crises, df_besoins, stock_complet, seulement_actuelles=seulement_actuelles, mode='budget',
+        budget=budget, couts_unitaires=couts_unitaires, plafonds=plafonds
+    )
+    
+    achats = calculer_achats_budget(df_allocation, stock_complet, stock_reserve, budget, couts_unitaires)
+    
+    return df_allocation, stock_restant, stock_reserve, achats
+
+
+def calculer_achats_budget(df_allocation, stock_disponible, stock_reserve, budget, couts_unitaires=None):
+    """
+    Calcule les quantités achetées par une allocation du mode 'budget' (ce qui est alloué
+    au-delà du stock physique allouable) et leurs coûts
+    
+    Args:
+        df_allocation (pandas.DataFrame ou ResultatAllocation): Résultat de l'allocation
+        stock_disponible (dict): Stock physique disponible
+        stock_reserve (dict): Stock réservé
+        budget (float): Budget d'achat (base des pourcentages)
+        couts_unitaires (dict): Coût unitaire de chaque ressource (défaut: COUTS_UNITAIRES)
+    
+    Returns:
+        dict: Coûts au format de calculer_couts_pourcentages
+    """
+    if isinstance(df_allocation, ResultatAllocation):
+        df_allocation = pd.DataFrame(df_allocation.allocations.sum(axis=0, keepdims=True),
+                                     columns=[f'allocation_{ressource}' for ressource in df_allocation.ressources])
+    
+    quantites_achetees = {}
+    for colonne in df_allocation.columns:
+        if colonne.startswith('allocation_'):
+            ressource = colonne[len('allocation_'):]
+            allouable = stock_disponible.get(ressource, 0) - stock_reserve.get(ressource, 0)
+            quantites_achetees[ressource] = max(int(df_allocation[colonne].sum()) - int(allouable), 0)
+    
+    return calculer_couts_pourcentages(quantites_achetees, budget if budget > 0 else 1,
+                                       couts_unitaires=couts_unitaires)
+
+
+def _cle_cache_allocation(df_crises, df_besoins, stock_disponible, seulement_actuelles, mode, options):
+    """Construit la clé de cache d'une allocation (hash des entrées)"""
+    sha1 = hashlib.sha1()
+    for partie in (str(VERSION_CACHE_ALLOCATIONS), empreinte_dataframe(df_crises),
+                   empreinte_dataframe(df_besoins),
+                   repr(sorted((str(ressource), float(quantite)) for ressource, quantite in stock_disponible.items())),
+                   repr(bool(seulement_actuelles)), mode,
+                   repr(sorted((cle, repr(valeur)) for cle, valeur in options.items()))):
+        sha1.update(partie.encode())
+        sha1.update(b'\0')
+    return sha1.hexdigest()
+
+
+def _copier_resultat_allocation(resultat):
+    """Copie un résultat d'allocation pour que l'appelant ne modifie pas celui du cache"""
+    df_allocation, stock_restant, stock_reserve = resultat
+    return df_allocation.copy(), dict(stock_restant), dict(stock_reserve)
+
+
+def allouer_ressources_cache(df_crises, df_besoins, stock_disponible, seulement_actuelles=True,
+                             mode='proportionnel', persistance=False, **options):
+    """
+    Comme allouer_ressources_glouton, mais réutilise le résultat d'un appel précédent
+    avec les mêmes crises, besoins, stock, mode et options
+    
+    Les résultats sont gardés en mémoire (les moins récemment utilisés sont retirés au-delà de
+    TAILLE_MAX_CACHE_ALLOCATIONS octets) et, si persistance=True, écrits dans
+    DOSSIER_CACHE_ALLOCATIONS pour être retrouvés après un redémarrage (la clé inclut
+    VERSION_CACHE_ALLOCATIONS). Les crises lues en flux (itérateur) et l'option etat du mode
+    'optimal' ne sont pas mises en cache.
+    
+    Args:
+        df_crises (pandas.DataFrame ou EntrepotCrises): Crises (voir allouer_ressources_glouton)
+        df_besoins (pandas.DataFrame): DataFrame des besoins par type de crise
+        stock_disponible (dict): Dictionnaire des ressources disponibles
+        seulement_actuelles (bool): Si True, ne considère que les crises en cours
+        mode (str): Mode de répartition, une clé de MODES_ALLOCATION
+        persistance (bool): Si True, lit et écrit aussi les résultats sur disque
+        **options: Options propres au mode (voir allouer_ressources_glouton)
     
-    # Calcule le score d'urgence pour chaque crise (gardé pour l'affichage)
-    df_allocation['score_urgence'] = df_allocation.apply(calculer_score_urgence, axis=1)
+    Returns:
+        tuple: (df_allocation, stock_restant, stock_reserve) - même format que allouer_ressources_glouton
+    """
+    if not isinstance(df_crises, (pd.DataFrame, EntrepotCrises)) or 'etat' in options:
+        return allouer_ressources_glouton(df_crises, df_besoins, stock_disponible, seulement_actuelles, mode, **options)
+    
+    cle = _cle_cache_allocation(df_crises, df_besoins, stock_disponible, seulement_actuelles, mode, options)
+    with _verrou_cache_allocations:
+        resultat = _cache_allocations.get(cle)
+        if resultat is not None:
+            _cache_allocations.move_to_end(cle)
+            return _copier_resultat_allocation(resultat)
+    
+    chemin = DOSSIER_CACHE_ALLOCATIONS / f'{cle}.pkl'
+    resultat = None
+    if persistance and chemin.exists():
+        try:
+            with open(chemin, 'rb') as fichier:
+                resultat = pickle.load(fichier)
+        except Exception as e:
+            print(f"⚠ Cache d'allocation illisible, recalcul: {e}")
+    
+    if resultat is None:
+        resultat = allouer_ressources_glouton(df_crises, df_besoins, stock_disponible, seulement_actuelles,
+                                              mode, **options)
+        if persistance:
+            # Écriture atomique: un fichier temporaire remplace le fichier final une fois complet
+            DOSSIER_CACHE_ALLOCATIONS.mkdir(parents=True, exist_ok=True)
+            chemin_temporaire = chemin.with_name(f'{chemin.name}.{os.getpid()}.tmp')
+            with open(chemin_temporaire, 'wb') as fichier:
+                pickle.dump(resultat, fichier, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(chemin_temporaire, chemin)
+    
+    # Ajoute le résultat en mémoire puis retire les plus anciens si la taille maximale est dépassée
+    if isinstance(resultat[0], ResultatAllocation):
+        taille = resultat[0].nbytes
+    else:
+        taille = int(resultat[0].memory_usage(deep=True).sum())
+    with _verrou_cache_allocations:
+        if cle not in _cache_allocations and taille <= TAILLE_MAX_CACHE_ALLOCATIONS:
+            _cache_allocations[cle] = resultat
+            _tailles_cache_allocations[cle] = taille
+            while sum(_tailles_cache_allocations.values()) > TAILLE_MAX_CACHE_ALLOCATIONS:
+                ancienne, _ = _cache_allocations.popitem(last=False)
+                del _tailles_cache_allocations[ancienne]
+    
+    return _copier_resultat_allocation(resultat)
+
+
+def vider_cache_allocations(disque=False):
+    """
+    Vide le cache des résultats d'allocation
+    
+    Args:
+        disque (bool): Si True, supprime aussi les résultats écrits dans DOSSIER_CACHE_ALLOCATIONS
+    """
+    with _verrou_cache_allocations:
+        _cache_allocations.clear()
+        _tailles_cache_allocations.clear()
+    if disque and DOSSIER_CACHE_ALLOCATIONS.exists():
+        for chemin in DOSSIER_CACHE_ALLOCATIONS.glob('*.pkl'):
+            chemin.unlink()
+
+
+def simuler_scenarios_stock(df_crises, df_besoins, stocks, ratios_reserve=None, seulement_actuelles=True,
+                            mode='proportionnel', taille_bloc=4_000_000):
+    """
+    Évalue l'allocation pour de nombreux scénarios de stock en une seule passe:
+    les besoins des crises sont calculés une fois, puis tous les scénarios sont
+    répartis par diffusion (broadcasting) sur la matrice des besoins
     
-    # Trie les crises par score d'urgence décroissant (pour l'affichage)
-    df_allocation = df_allocation.sort_values('score_urgence', ascending=False).reset_index(drop=True)
+    Chaque scénario donne exactement les mêmes quantités qu'un appel à
+    allouer_ressources_glouton avec le même stock, mais seul un résumé est conservé.
+    
+    Args:
+        df_crises (pandas.DataFrame, EntrepotCrises ou iterable): Crises (voir allouer_ressources_glouton)
+        df_besoins (pandas.DataFrame): DataFrame des besoins par type de crise
+        stocks (list, numpy.ndarray ou pandas.DataFrame): Scénarios de stock, soit une liste de dicts
+                {ressource: quantité} (ressources absentes = 0), soit une matrice
+                (nb_scenarios, nb_ressources) dans l'ordre des colonnes de df_besoins
+        ratios_reserve (float ou array-like): Part mise en réserve, commune, par scénario (nb_scenarios)
+                                              ou par scénario et ressource. Défaut: RATIO_RESERVE (25%)
+        seulement_actuelles (bool): Si True, ne considère que les crises en cours
+        mode (str): 'proportionnel' ou 'priorite'
+        taille_bloc (int): Nombre maximal d'éléments crises × scénarios × ressources traités à la fois
+    
+    Returns:
+        pandas.DataFrame: Une ligne par scénario avec, pour chaque ressource:
+                          stock_reserve_*, stock_restant_* (dans la part allouable) et
+                          pourcentage_satisfait_* (part du besoin total couverte), puis
+                          nb_crises_satisfaites (besoin complet pour toutes les ressources),
+                          satisfaction_moyenne (pourcentage moyen par crise et ressource) et
+                          prix_ombre_* (voir calculer_prix_ombre)
+    """
+    if mode not in ('proportionnel', 'priorite'):
+        raise ValueError(f"Mode de simulation inconnu: '{mode}'. Modes disponibles: ['proportionnel', 'priorite']")
     
-    # Initialise les colonnes d'allocation pour chaque type de ressource
     ressources = [col for col in df_besoins.columns if col != 'type_crise']
     
-    # Calcule le stock réservé (25% de chaque ressource)
-    stock_reserve = {}
-    stock_allouable = {}
-    for ressource in ressources:
-        if ressource in stock_disponible:
-            stock_reserve[ressource] = int(stock_disponible[ressource] * 0.25)
-            stock_allouable[ressource] = int(stock_disponible[ressource] - stock_reserve[ressource])
+    # Matrice des stocks (nb_scenarios, nb_ressources)
+    if isinstance(stocks, pd.DataFrame):
+        stocks = stocks.reindex(columns=ressources, fill_value=0).to_numpy(dtype=np.float64)
+    elif len(stocks) > 0 and isinstance(stocks[0], dict):
+        stocks = np.array([[stock.get(ressource, 0) for ressource in ressources] for stock in stocks], dtype=np.float64)
+    stocks = np.asarray(stocks, dtype=np.float64).reshape(-1, len(ressources))
+    if (stocks < 0).any():
+        raise ValueError("Les stocks des scénarios doivent être positifs")
+    nb_scenarios = len(stocks)
+    
+    # Ratios de réserve diffusés en (nb_scenarios, nb_ressources)
+    ratios = np.asarray(RATIO_RESERVE if ratios_reserve is None else ratios_reserve, dtype=np.float64)
+    if ratios.ndim == 1:
+        ratios = ratios[:, None]
+    ratios = np.broadcast_to(ratios, stocks.shape)
+    if ((ratios < 0) | (ratios > 1)).any():
+        raise ValueError("Les ratios de réserve doivent être compris entre 0 et 1")
+    
+    stock_reserve = np.trunc(stocks * ratios)
+    stock_allouable = np.trunc(stocks - stock_reserve).astype(np.int64)
+    
+    # Besoins des crises, calculés une seule fois pour tous les scénarios
+    df_crises_filtre = _selectionner_crises(df_crises, seulement_actuelles)
+    if df_crises_filtre is None or len(df_crises_filtre) == 0:
+        besoins = np.zeros((0, len(ressources)), dtype=np.int64)
+        urgence = np.zeros(0)
+    else:
+        df_allocation = df_crises_filtre.copy()
+        df_allocation['score_urgence'] = calculer_scores_urgence(df_allocation)
+        df_allocation = df_allocation.sort_values('score_urgence', ascending=False).reset_index(drop=True)
+        besoins, _ = _calculer_besoins_urgence(df_allocation, df_besoins)
+        scores = df_allocation['score_urgence'].to_numpy()
+        urgence = scores / scores.max() if scores.max() > 0 else np.ones(len(scores))
+    nb_crises = len(besoins)
+    besoin_total = besoins.sum(axis=0)
+    
+    if mode == 'proportionnel':
+        # Coefficient de chaque scénario et ressource (1.0 si le stock suffit)
+        coefficients = np.minimum(1.0, stock_allouable / np.where(besoin_total > 0, besoin_total, 1))
+        coefficients[:, besoin_total == 0] = 1.0
+    else:
+        # Les crises sont déjà triées par urgence: quantité servie avant chaque crise
+        servi_avant = np.cumsum(besoins, axis=0) - besoins
+    
+    alloue_total = np.zeros((nb_scenarios, len(ressources)), dtype=np.int64)
+    nb_crises_satisfaites = np.zeros(nb_scenarios, dtype=np.int64)
+    somme_pourcentages = np.zeros(nb_scenarios)
+    besoin_positif = besoins > 0
+    
+    # Traite les scénarios par blocs pour borner la mémoire du tableau (scénarios, crises, ressources)
+    taille = max(1, taille_bloc // max(1, nb_crises * len(ressources)))
+    for debut in range(0, nb_scenarios, taille):
+        bloc = slice(debut, debut + taille)
+        if mode == 'proportionnel':
+            allocations = np.trunc(besoins[None, :, :] * coefficients[bloc, None, :]).astype(np.int64)
         else:
-            stock_reserve[ressource] = 0
-            stock_allouable[ressource] = 0
+            reste = stock_allouable[bloc, None, :] - servi_avant[None, :, :]
+            allocations = np.clip(reste, 0, besoins[None, :, :])
+        
+        alloue_total[bloc] = allocations.sum(axis=1)
+        nb_crises_satisfaites[bloc] = (allocations >= besoins).all(axis=2).sum(axis=1)
+        pourcentages = np.where(besoin_positif, allocations / np.where(besoin_positif, besoins, 1) * 100, 0.0)
+        somme_pourcentages[bloc] = pourcentages.sum(axis=(1, 2))
     
-    # Initialise toutes les allocations et besoins à 0
-    for ressource in ressources:
-        df_allocation[f'allocation_{ressource}'] = 0
-        df_allocation[f'besoin_{ressource}'] = 0
-        df_allocation[f'pourcentage_satisfait_{ressource}'] = 0.0
+    # Résumé compact par scénario
+    colonnes = {}
+    for j, ressource in enumerate(ressources):
+        colonnes[f'stock_reserve_{ressource}'] = stock_reserve[:, j].astype(np.int64)
+    for j, ressource in enumerate(ressources):
+        colonnes[f'stock_restant_{ressource}'] = stock_allouable[:, j] - alloue_total[:, j]
+    for j, ressource in enumerate(ressources):
+        if besoin_total[j] > 0:
+            colonnes[f'pourcentage_satisfait_{ressource}'] = np.round(alloue_total[:, j] / besoin_total[j] * 100, 2)
+        else:
+            colonnes[f'pourcentage_satisfait_{ressource}'] = np.zeros(nb_scenarios)
+    colonnes['nb_crises_satisfaites'] = nb_crises_satisfaites
+    nb_cellules = nb_crises * len(ressources)
+    colonnes['satisfaction_moyenne'] = np.round(somme_pourcentages / nb_cellules, 2) if nb_cellules else np.zeros(nb_scenarios)
     
-    # Normalise les scores d'urgence pour les utiliser comme facteur d'ajustement des besoins
-    # On normalise par rapport au score moyen pour avoir un facteur autour de 1.0
-    score_moyen = df_allocation['score_urgence'].mean()
-    if score_moyen > 0:
-        df_allocation['facteur_score_urgence'] = df_allocation['score_urgence'] / score_moyen
+    # Prix d'ombre de chaque scénario et ressource (nul si le stock couvre tous les besoins)
+    penurie = stock_allouable < besoin_total
+    if mode == 'proportionnel':
+        urgence_avec_besoin = urgence @ besoin_positif
+        prix = np.where(penurie, urgence_avec_besoin / np.where(besoin_total > 0, besoin_total, 1), 0.0)
     else:
-        df_allocation['facteur_score_urgence'] = 1.0
-    
-    # Calcule les besoins pour chaque crise en utilisant le score d'urgence
-    for idx, crise in df_allocation.iterrows():
-        besoins_crise = calculer_besoins_crise(crise, df_besoins, facteur_score=df_allocation.at[idx, 'facteur_score_urgence'])
-        for ressource in ressources:
-            besoin = besoins_crise.get(ressource, 0)
-            df_allocation.at[idx, f'besoin_{ressource}'] = besoin
-    
-    # Pour chaque ressource, calcule l'allocation selon la nouvelle logique
-    stock_restant = {}
-    for ressource in ressources:
-        if ressource not in stock_allouable:
-            stock_restant[ressource] = 0
-            continue
+        # Première crise servie partiellement: la somme cumulée des besoins dépasse le stock
+        prix = np.zeros(stocks.shape)
+        cumul = np.cumsum(besoins, axis=0)
+        for j in range(len(ressources)):
+            k = np.searchsorted(cumul[:, j], stock_allouable[:, j], side='right')
+            partielles = penurie[:, j] & (k < nb_crises)
+            prix[partielles, j] = urgence[k[partielles]] / besoins[k[partielles], j]
+    for j, ressource in enumerate(ressources):
+        colonnes[f'prix_ombre_{ressource}'] = prix[:, j]
+    
+    return pd.DataFrame(colonnes)
+
+
+def _repartir_reserve_depots(stocks_depots, ratio_reserve=RATIO_RESERVE):
+    """
+    Calcule le stock allouable de chaque dépôt de sorte que leur somme soit exactement
+    le stock allouable global (stock total moins trunc(stock total × ratio_reserve))
+    
+    Args:
+        stocks_depots (numpy.ndarray): Stocks entiers, dimensions (nb_depots, nb_ressources)
+    
+    Returns:
+        numpy.ndarray: Stocks allouables entiers, dimensions (nb_depots, nb_ressources)
+    """
+    stock_total = stocks_depots.sum(axis=0)
+    allouable_total = stock_total - np.trunc(stock_total * ratio_reserve)
+    
+    # Part proportionnelle au stock de chaque dépôt, arrondie à l'unité par la méthode des plus forts restes
+    parts = stocks_depots * np.divide(allouable_total, stock_total, out=np.zeros(len(stock_total)),
+                                      where=stock_total > 0)
+    allouable = np.floor(parts)
+    restes = allouable_total - allouable.sum(axis=0)
+    rangs = np.argsort(np.argsort(allouable - parts, axis=0, kind='stable'), axis=0)
+    allouable += rangs < restes
+    
+    return allouable.astype(np.int64)
+
+
+def _planifier_transport(cibles, offres, couts):
+    """
+    Résout le problème de transport d'une ressource: chaque crise reçoit exactement sa cible,
+    aucun dépôt n'expédie plus que son offre, et le coût total Σ coût × quantité est minimal
+    
+    Args:
+        cibles (numpy.ndarray): Quantité à livrer à chaque crise (nb_crises)
+        offres (numpy.ndarray): Quantité disponible dans chaque dépôt (nb_depots)
+        couts (numpy.ndarray): Coût unitaire de transport, dimensions (nb_depots, nb_crises)
+    
+    Returns:
+        numpy.ndarray: Quantités expédiées entières, dimensions (nb_depots, nb_crises)
+    """
+    from scipy.optimize import linprog
+    from scipy.sparse import coo_matrix
+    
+    nb_depots, nb_crises = couts.shape
+    expeditions = np.zeros((nb_depots, nb_crises), dtype=np.int64)
+    servies = np.flatnonzero(cibles > 0)
+    if len(servies) == 0:
+        return expeditions
+    if nb_depots == 1:
+        expeditions[0, servies] = cibles[servies]
+        return expeditions
+    
+    # Variable (dépôt d, crise k) à la position d × n + k
+    n = len(servies)
+    depots_variables = np.repeat(np.arange(nb_depots), n)
+    crises_variables = np.tile(np.arange(n), nb_depots)
+    colonnes = np.arange(nb_depots * n)
+    uns = np.ones(nb_depots * n)
+    
+    resultat = linprog(
+        couts[:, servies].ravel(),
+        A_ub=coo_matrix((uns, (depots_variables, colonnes)), shape=(nb_depots, nb_depots * n)).tocsr(),
+        b_ub=offres.astype(np.float64),
+        A_eq=coo_matrix((uns, (crises_variables, colonnes)), shape=(n, nb_depots * n)).tocsr(),
+        b_eq=cibles[servies].astype(np.float64),
+        bounds=(0, None),
+        method='highs'
+    )
+    if resultat.status != 0:
+        raise RuntimeError(f"Échec de la planification du transport: {resultat.message}")
+    
+    # Offres et cibles entières: la solution (sommet du polyèdre) est entière aux erreurs numériques près
+    quantites = np.rint(resultat.x).astype(np.int64).reshape(nb_depots, n)
+    
+    # Corrige les écarts d'arrondi crise par crise: une unité en trop est retirée du dépôt qui
+    # expédie le plus, une unité manquante vient du dépôt le plus proche ayant encore du stock
+    ecarts = cibles[servies] - quantites.sum(axis=0)
+    for k in np.flatnonzero(ecarts):
+        ecart = int(ecarts[k])
+        if ecart < 0:
+            for d in np.argsort(-quantites[:, k], kind='stable'):
+                retrait = min(-ecart, int(quantites[d, k]))
+                quantites[d, k] -= retrait
+                ecart += retrait
+                if ecart == 0:
+                    break
+        else:
+            capacites = np.trunc(offres).astype(np.int64) - quantites.sum(axis=1)
+            for d in np.argsort(couts[:, servies[k]], kind='stable'):
+                ajout = min(ecart, max(int(capacites[d]), 0))
+                quantites[d, k] += ajout
+                ecart -= ajout
+                if ecart == 0:
+                    break
+        if ecart != 0:
+            raise RuntimeError("Échec de la planification du transport: offre des dépôts insuffisante")
+    expeditions[:, servies] = quantites
+    return expeditions
+
+
+def allouer_ressources_depots(df_crises, df_besoins, depots, seulement_actuelles=True, mode='proportionnel',
+                              critere='distance', **options):
+    """
+    Alloue les ressources de plusieurs dépôts aux crises:
+    - les quantités de chaque crise sont calculées comme avec allouer_ressources_glouton
+      sur le stock cumulé des dépôts (le mode choisi fixe la priorité par urgence)
+    - 25% du stock total est réservé, réparti entre les dépôts au prorata de leur stock
+    - pour chaque ressource, les expéditions dépôt -> crise minimisent la distance
+      orthodromique (ou la durée) totale parcourue par les unités expédiées
+    
+    Args:
+        df_crises (pandas.DataFrame, EntrepotCrises ou iterable): Crises (voir allouer_ressources_glouton)
+        df_besoins (pandas.DataFrame): DataFrame des besoins par type de crise
+        depots (list): Liste de dépôts, chacun un dict:
+                       {'nom': str, 'latitude': float, 'longitude': float,
+                        'stock': {ressource: quantité}, 'vitesse_kmh': float (pour critere='temps')}
+        seulement_actuelles (bool): Si True, ne considère que les crises en cours
+        mode (str): Mode de répartition (voir allouer_ressources_glouton), sauf 'budget': les
+                    unités achetées ne sont stockées dans aucun dépôt
+        critere (str): 'distance' (km) ou 'temps' (heures, distance / vitesse_kmh du dépôt)
+        **options: Options propres au mode (voir allouer_ressources_glouton)
+    
+    Returns:
+        tuple: (df_allocation, df_expeditions, stock_restant_depots)
+               - df_allocation: même format que allouer_ressources_glouton
+               - df_expeditions: une ligne par expédition (depot, nom_crise, ressource,
+                 quantite, distance_km et duree_h si critere='temps')
+               - stock_restant_depots: {nom du dépôt: {ressource: stock allouable restant}}
+    """
+    if len(depots) == 0:
+        raise ValueError("Au moins un dépôt est nécessaire")
+    if mode == 'budget':
+        raise ValueError("Le mode 'budget' n'est pas disponible avec des dépôts (les achats n'ont pas de dépôt "
+                         "d'origine): utiliser allouer_ressources_budget")
+    if critere not in ('distance', 'temps'):
+        raise ValueError(f"Critère inconnu: '{critere}'. Critères disponibles: ['distance', 'temps']")
+    if critere == 'temps' and any(depot.get('vitesse_kmh', 0) <= 0 for depot in depots):
+        raise ValueError("Le critère 'temps' nécessite une vitesse_kmh positive pour chaque dépôt")
+    
+    ressources = [col for col in df_besoins.columns if col != 'type_crise']
+    noms_depots = [depot.get('nom', f'Dépôt {i + 1}') for i, depot in enumerate(depots)]
+    stocks_depots = np.array([[depot.get('stock', {}).get(ressource, 0) for ressource in ressources]
+                              for depot in depots], dtype=np.float64)
+    if (stocks_depots < 0).any():
+        raise ValueError("Les stocks des dépôts doivent être positifs")
+    stocks_depots = np.trunc(stocks_depots)
+    
+    # Quantités par crise sur le stock cumulé de tous les dépôts
+    stock_global = {ressource: int(quantite) for ressource, quantite in zip(ressources, stocks_depots.sum(axis=0))}
+    df_allocation, _, _ = allouer_ressources_glouton(
+        df_crises, df_besoins, stock_global, seulement_actuelles=seulement_actuelles, mode=mode, **options
+    )
+    
+    allouable_depots = _repartir_reserve_depots(stocks_depots)
+    colonnes_expeditions = ['depot', 'nom_crise', 'ressource', 'quantite', 'distance_km']
+    if critere == 'temps':
+        colonnes_expeditions.append('duree_h')
+    
+    if len(df_allocation) == 0:
+        stock_restant_depots = {nom: dict(zip(ressources, allouable.tolist()))
+                                for nom, allouable in zip(noms_depots, allouable_depots)}
+        return df_allocation, pd.DataFrame(columns=colonnes_expeditions), stock_restant_depots
+    
+    # Distances dépôts × crises (réutilisées d'un appel à l'autre pour les mêmes coordonnées)
+    distances = obtenir_matrice_distances(
+        [depot['latitude'] for depot in depots], [depot['longitude'] for depot in depots],
+        df_allocation['latitude'].to_numpy(), df_allocation['longitude'].to_numpy()
+    )
+    if critere == 'temps':
+        vitesses = np.array([depot['vitesse_kmh'] for depot in depots], dtype=np.float64)
+        couts = distances / vitesses[:, None]
+    else:
+        couts = distances
+    
+    # Planifie les expéditions ressource par ressource
+    lignes_expeditions = []
+    expedie = np.zeros(allouable_depots.shape, dtype=np.int64)
+    for j, ressource in enumerate(ressources):
+        cibles = df_allocation[f'allocation_{ressource}'].to_numpy(dtype=np.int64)
+        quantites = _planifier_transport(cibles, allouable_depots[:, j], couts)
+        expedie[:, j] = quantites.sum(axis=1)
+        
+        indices_depots, indices_crises = np.nonzero(quantites)
+        lignes_expeditions.append(pd.DataFrame({
+            'depot': np.array(noms_depots, dtype=object)[indices_depots],
+            'nom_crise': df_allocation['nom_crise'].to_numpy()[indices_crises],
+            'ressource': ressource,
+            'quantite': quantites[indices_depots, indices_crises],
+            'distance_km': np.round(distances[indices_depots, indices_crises], 1),
+            **({'duree_h': np.round(couts[indices_depots, indices_crises], 2)} if critere == 'temps' else {})
+        }))
+    
+    df_expeditions = pd.concat(lignes_expeditions, ignore_index=True)
+    stock_restant_depots = {nom: dict(zip(ressources, restant.tolist()))
+                            for nom, restant in zip(noms_depots, allouable_depots - expedie)}
+    
+    return df_allocation, df_expeditions, stock_restant_depots
+
+
+def _elargir_champs(crise):
+    """
+    Copie les champs d'une crise en ramenant les colonnes float32 du schéma à cette précision puis
+    en float64 décimaux, comme AllocateurIncremental.resynchroniser (même score pour les deux chemins)
+    """
+    champs = dict(crise)
+    colonnes = [colonne for colonne in COLONNES_FLOAT32_CRISES if champs.get(colonne) is not None]
+    if colonnes:
+        valeurs = valeurs_float64(np.array([champs[colonne] for colonne in colonnes], dtype=np.float32))
+        champs.update(zip(colonnes, valeurs.tolist()))
+    return champs
+
+
+class AllocateurIncremental:
+    """
+    Allocation proportionnelle tenue à jour crise par crise
+    
+    Le besoin d'une crise vaut besoin_base[type] × score / score_moyen, donc le besoin
+    total d'une ressource s'écrit Σ_type besoin_base[type] × somme_scores[type] / score_moyen.
+    L'allocateur conserve la somme des scores et le nombre de crises par type: ajouter,
+    modifier ou retirer une crise met à jour ces sommes, le score moyen et les coefficients
+    en O(nb_types × nb_ressources), plus O(log n) amorti pour le classement par urgence
+    (tas dont les entrées des crises retirées ou modifiées sont écartées au fil des lectures).
+    
+    Entre deux resynchronisations, les besoins totaux sont des sommes continues (sans la
+    troncature à l'unité de chaque besoin): ils dépassent légèrement la somme des besoins
+    entiers, et une allocation peut être inférieure de quelques unités à celle d'un
+    recalcul complet (écart relatif au plus nb_crises / besoin_total). resynchroniser()
+    recalcule les totaux exacts; juste après, allocation() donne les mêmes quantités
+    qu'allouer_ressources_glouton.
+    
+    Attributes:
+        ressources (list): Noms des ressources
+        stock_allouable (numpy.ndarray): Stock allouable de chaque ressource (après réserve)
+        stock_reserve (dict): Stock réservé de chaque ressource
+        score_moyen (float): Score d'urgence moyen des crises suivies
+        coefficients (numpy.ndarray): Coefficient de répartition de chaque ressource
+    """
+    
+    def __init__(self, df_besoins, stock_disponible, df_crises=None, seulement_actuelles=True,
+                 colonne_identifiant='nom_crise'):
+        """
+        Args:
+            df_besoins (pandas.DataFrame): DataFrame des besoins par type de crise
+            stock_disponible (dict): Dictionnaire des ressources disponibles
+            df_crises (pandas.DataFrame, EntrepotCrises ou iterable): Crises initiales (optionnel)
+            seulement_actuelles (bool): Si True, seules les crises en cours reçoivent des ressources
+            colonne_identifiant (str): Colonne identifiant une crise de façon unique
+        """
+        self.types, self.ressources, matrice = construire_matrice_besoins(df_besoins)
+        # Dernière ligne de zéros pour les types absents du tableau des besoins
+        self._matrice = np.vstack([matrice, np.zeros((1, len(self.ressources)))])
+        self._lignes_types = {type_crise: ligne for ligne, type_crise in enumerate(self.types)}
+        self.seulement_actuelles = seulement_actuelles
+        self.colonne_identifiant = colonne_identifiant
         
-        # Calcule le besoin total pour cette ressource (somme de tous les besoins)
-        besoin_total = df_allocation[f'besoin_{ressource}'].sum()
-        stock_allouable_ressource = stock_allouable[ressource]
+        stock_total = np.array([stock_disponible.get(ressource, 0) for ressource in self.ressources], dtype=np.float64)
+        stock_reserve_tableau = np.trunc(stock_total * RATIO_RESERVE)
+        self.stock_allouable = np.trunc(stock_total - stock_reserve_tableau).astype(np.int64)
+        self.stock_reserve = {ressource: int(quantite) for ressource, quantite in zip(self.ressources, stock_reserve_tableau)}
         
-        if besoin_total == 0:
-            # Aucun besoin pour cette ressource, tout le stock allouable reste disponible
-            stock_restant[ressource] = int(stock_allouable_ressource)
-            continue
+        self._crises = {}        # identifiant -> (ligne du type, score) des crises suivies
+        self._inactives = {}     # identifiant -> champs des crises clôturées (pour une réouverture)
+        self._champs = {}        # identifiant -> champs des crises suivies
+        self._ordre = []         # tas de (-score, identifiant, numéro): classement par urgence décroissante
+        self._entrees = {}       # identifiant -> numéro de son entrée valide dans le tas
+        self.resynchroniser(df_crises)
+    
+    def __len__(self):
+        return len(self._crises)
+    
+    def __contains__(self, identifiant):
+        return identifiant in self._crises
+    
+    def _ligne_type(self, type_crise):
+        return self._lignes_types.get(str(type_crise), len(self.types))
+    
+    def _calculer_parametres(self):
+        """Met à jour le score moyen et les coefficients à partir des sommes par type"""
+        nb_crises = len(self._crises)
+        self.score_moyen = self._somme_scores / nb_crises if nb_crises else 0.0
         
-        # Détermine le coefficient de réduction si nécessaire
-        if stock_allouable_ressource >= besoin_total:
-            # Stock allouable suffisant : on peut donner à chaque crise son besoin complet
-            coefficient = 1.0
+        if self._totaux_exacts is not None:
+            besoin_total = self._totaux_exacts
+        elif self.score_moyen > 0:
+            besoin_total = self._somme_scores_type @ self._matrice / self.score_moyen
         else:
-            # Stock allouable insuffisant : on divise par un coefficient unique
-            coefficient = stock_allouable_ressource / besoin_total
-        
-        # Alloue à chaque crise selon le coefficient
-        for idx, crise in df_allocation.iterrows():
-            besoin = df_allocation.at[idx, f'besoin_{ressource}']
-            allocation = int(besoin * coefficient)
-            df_allocation.at[idx, f'allocation_{ressource}'] = allocation
-            
-            # Calcule le pourcentage de besoin satisfait
-            if besoin > 0:
-                pourcentage = (allocation / besoin) * 100
-                df_allocation.at[idx, f'pourcentage_satisfait_{ressource}'] = round(pourcentage, 2)
-        
-        # Calcule le stock restant (dans les 75% allouables)
-        allocation_totale = df_allocation[f'allocation_{ressource}'].sum()
-        stock_restant[ressource] = int(stock_allouable_ressource - allocation_totale)
-    
-    # Ajoute une colonne avec le score d'urgence normalisé (pour affichage)
-    score_max = df_allocation['score_urgence'].max()
-    if score_max > 0:
-        df_allocation['score_urgence_normalise'] = (df_allocation['score_urgence'] / score_max * 100).round(2)
-    else:
-        df_allocation['score_urgence_normalise'] = 0
+            besoin_total = self._nb_type @ self._matrice
+        
+        # Même règle que repartir_proportionnel
+        self.coefficients = np.ones(len(self.ressources))
+        insuffisant = self.stock_allouable < besoin_total
+        self.coefficients[insuffisant] = self.stock_allouable[insuffisant] / besoin_total[insuffisant]
+        self._besoin_total = besoin_total
+    
+    def _besoins(self, ligne, score):
+        facteur = score / self.score_moyen if self.score_moyen > 0 else 1.0
+        return np.trunc(self._matrice[ligne] * facteur).astype(np.int64)
+    
+    def resynchroniser(self, df_crises=None):
+        """
+        Recalcule entièrement les sommes par type et les besoins totaux exacts
+        
+        Args:
+            df_crises (pandas.DataFrame, EntrepotCrises ou iterable): Si fourni, remplace
+                                                                     l'ensemble des crises suivies
+        """
+        if df_crises is not None:
+            self._crises, self._champs, self._inactives = {}, {}, {}
+            df_selection = _selectionner_crises(df_crises, False)
+            if df_selection is not None and len(df_selection) > 0:
+                # Même conversion que inserer: précision du schéma, puis float64 décimaux (0.4 et non 0.40000000596)
+                df_selection = elargir_colonnes_float32(df_selection.astype(
+                    {colonne: np.float32 for colonne in COLONNES_FLOAT32_CRISES if colonne in df_selection.columns}
+                ))
+                if self.seulement_actuelles and 'en_cours' in df_selection.columns:
+                    suivies = (df_selection['en_cours'] == True).to_numpy()
+                else:
+                    suivies = np.ones(len(df_selection), dtype=bool)
+                
+                # Les crises clôturées sont gardées pour pouvoir être réouvertes (la dernière l'emporte)
+                for champs in df_selection[~suivies].to_dict('records'):
+                    self._inactives[champs[self.colonne_identifiant]] = champs
+                
+                df_suivies = df_selection[suivies]
+                if not df_suivies[self.colonne_identifiant].is_unique:
+                    raise ValueError(f"La colonne '{self.colonne_identifiant}' doit identifier les crises de façon unique")
+                scores = calculer_scores_urgence(df_suivies).tolist()
+                lignes = [self._ligne_type(type_crise) for type_crise in df_suivies['type_crise']]
+                for champs, ligne, score in zip(df_suivies.to_dict('records'), lignes, scores):
+                    identifiant = champs[self.colonne_identifiant]
+                    self._champs[identifiant] = champs
+                    self._crises[identifiant] = (ligne, score)
+        
+        identifiants = list(self._crises)
+        lignes = np.array([self._crises[identifiant][0] for identifiant in identifiants], dtype=np.intp)
+        scores = np.array([self._crises[identifiant][1] for identifiant in identifiants], dtype=np.float64)
+        
+        nb_lignes = len(self._matrice)
+        self._somme_scores_type = np.bincount(lignes, weights=scores, minlength=nb_lignes)
+        self._nb_type = np.bincount(lignes, minlength=nb_lignes).astype(np.float64)
+        self._somme_scores = scores.sum()
+        numeros = range(len(identifiants))
+        self._entrees = dict(zip(identifiants, numeros))
+        self._ordre = sorted(zip(-scores, identifiants, numeros))
+        self._prochain_numero = len(identifiants)
+        
+        # Besoins totaux et quantités allouées exacts, valables jusqu'au prochain changement
+        self._totaux_exacts = None
+        self._alloue_exact = None
+        self._calculer_parametres()
+        if len(identifiants):
+            facteurs = scores / self.score_moyen if self.score_moyen > 0 else np.ones(len(scores))
+            besoins = np.trunc(self._matrice[lignes] * facteurs[:, None])
+            self._totaux_exacts = besoins.sum(axis=0)
+            self._calculer_parametres()
+            self._alloue_exact = np.trunc(besoins * self.coefficients).astype(np.int64).sum(axis=0)
+    
+    def allocation(self, identifiant):
+        """
+        Retourne l'allocation courante d'une crise suivie
+        
+        Égale à celle d'allouer_ressources_glouton juste après resynchroniser(),
+        approximative après des changements incrémentaux.
+        
+        Returns:
+            dict: {ressource: quantité allouée}
+        """
+        ligne, score = self._crises[identifiant]
+        allocations = np.trunc(self._besoins(ligne, score) * self.coefficients).astype(np.int64)
+        return {ressource: int(quantite) for ressource, quantite in zip(self.ressources, allocations)}
+    
+    def besoins(self, identifiant):
+        """Retourne les besoins courants d'une crise suivie ({ressource: quantité})"""
+        ligne, score = self._crises[identifiant]
+        return {ressource: int(quantite) for ressource, quantite in zip(self.ressources, self._besoins(ligne, score))}
+    
+    def plus_urgentes(self, k=5):
+        """Retourne les identifiants des k crises les plus urgentes"""
+        # Dépile jusqu'à k entrées valides (les entrées périmées sont abandonnées) puis les remet
+        gardees = []
+        while self._ordre and len(gardees) < k:
+            entree = heapq.heappop(self._ordre)
+            if self._entrees.get(entree[1]) == entree[2]:
+                gardees.append(entree)
+        for entree in gardees:
+            heapq.heappush(self._ordre, entree)
+        return [identifiant for _, identifiant, _ in gardees]
+    
+    def stock_restant(self):
+        """
+        Retourne le stock allouable restant ({ressource: quantité}): exact juste après
+        resynchroniser(), estimé à partir des besoins totaux continus ensuite
+        """
+        if self._alloue_exact is not None:
+            restant = self.stock_allouable - self._alloue_exact
+        else:
+            restant = np.maximum(self.stock_allouable - self.coefficients * self._besoin_total, 0)
+        return {ressource: int(quantite) for ressource, quantite in zip(self.ressources, restant)}
+    
+    def _ajouter(self, identifiant, champs):
+        ligne, score = self._ligne_type(champs['type_crise']), calculer_score_urgence(champs)
+        self._crises[identifiant] = (ligne, score)
+        self._champs[identifiant] = champs
+        self._somme_scores_type[ligne] += score
+        self._nb_type[ligne] += 1
+        self._somme_scores += score
+        self._entrees[identifiant] = self._prochain_numero
+        heapq.heappush(self._ordre, (-score, identifiant, self._prochain_numero))
+        self._prochain_numero += 1
+    
+    def _enlever(self, identifiant):
+        ligne, score = self._crises.pop(identifiant)
+        champs = self._champs.pop(identifiant)
+        self._somme_scores_type[ligne] -= score
+        self._nb_type[ligne] -= 1
+        self._somme_scores -= score
+        # Suppression paresseuse: l'entrée reste dans le tas mais n'est plus valide
+        del self._entrees[identifiant]
+        if len(self._ordre) > 2 * len(self._crises) + 64:
+            self._ordre = [entree for entree in self._ordre if self._entrees.get(entree[1]) == entree[2]]
+            heapq.heapify(self._ordre)
+        return champs
     
-    return df_allocation, stock_restant, stock_reserve
+    def _appliquer(self, ajouter=None, enlever=None):
+        """Applique un changement et retourne le delta des allocations"""
+        ancien_rapport = self.coefficients / self.score_moyen if self.score_moyen > 0 else self.coefficients.copy()
+        
+        retirees = []
+        if enlever is not None:
+            champs = self._enlever(enlever)
+            if ajouter is None:
+                retirees.append(enlever)
+                if self.seulement_actuelles and champs.get('en_cours', True) != True:
+                    self._inactives[enlever] = champs
+        if ajouter is not None:
+            self._ajouter(*ajouter)
+        
+        self._totaux_exacts = None
+        self._alloue_exact = None
+        self._calculer_parametres()
+        nouveau_rapport = self.coefficients / self.score_moyen if self.score_moyen > 0 else self.coefficients
+        multiplicateurs = np.divide(nouveau_rapport, ancien_rapport, out=np.ones(len(self.ressources)),
+                                    where=ancien_rapport > 0)
+        
+        return {
+            'modifiees': {ajouter[0]: self.allocation(ajouter[0])} if ajouter is not None else {},
+            'retirees': retirees,
+            'multiplicateurs': dict(zip(self.ressources, multiplicateurs.tolist())),
+            'coefficients': dict(zip(self.ressources, self.coefficients.tolist())),
+            'score_moyen': float(self.score_moyen)
+        }
+    
+    def inserer(self, crise):
+        """
+        Ajoute une crise (ou la remplace si son identifiant est déjà suivi)
+        
+        Args:
+            crise (dict ou pandas.Series): Champs de la crise (type_crise, intensite,
+                                           population_touchee, accessibilite, en_cours, ...)
+        
+        Returns:
+            dict: Delta des allocations:
+                  - 'modifiees': {identifiant: {ressource: quantité}} des crises ajoutées ou modifiées
+                  - 'retirees': identifiants des crises qui ne reçoivent plus de ressources
+                  - 'multiplicateurs': {ressource: facteur} appliqué aux allocations de toutes les
+                    autres crises (rapport coefficient / score moyen nouveau sur ancien)
+                  - 'coefficients', 'score_moyen': nouveaux paramètres de la répartition
+        
+        Les quantités du delta reposent sur les besoins totaux continus: elles sont
+        approximatives (quelques unités d'écart possibles avec allouer_ressources_glouton)
+        jusqu'au prochain appel à resynchroniser().
+        """
+        champs = _elargir_champs(crise)
+        identifiant = champs[self.colonne_identifiant]
+        self._inactives.pop(identifiant, None)
+        
+        if self.seulement_actuelles and champs.get('en_cours', True) != True:
+            if identifiant in self._crises:
+                self._champs[identifiant] = champs
+                return self._appliquer(enlever=identifiant)
+            self._inactives[identifiant] = champs
+            return self._appliquer()
+        
+        enlever = identifiant if identifiant in self._crises else None
+        return self._appliquer(ajouter=(identifiant, champs), enlever=enlever)
+    
+    def mettre_a_jour(self, identifiant, **changements):
+        """
+        Modifie les champs d'une crise (par ex. intensite, population_touchee, en_cours)
+        
+        Passer en_cours=False retire la crise de l'allocation, en_cours=True la réintègre.
+        Comme pour inserer, le delta est approximatif jusqu'à resynchroniser().
+        
+        Returns:
+            dict: Delta des allocations (voir inserer)
+        """
+        if identifiant in self._champs:
+            champs = self._champs[identifiant]
+        elif identifiant in self._inactives:
+            champs = self._inactives[identifiant]
+        else:
+            raise KeyError(f"Crise inconnue: '{identifiant}'")
+        return self.inserer({**champs, **changements})
+    
+    def retirer(self, identifiant):
+        """
+        Retire une crise de l'allocation (par ex. crise terminée)
+        
+        Comme pour inserer, le delta est approximatif jusqu'à resynchroniser().
+        
+        Returns:
+            dict: Delta des allocations (voir inserer)
+        """
+        if identifiant not in self._crises:
+            raise KeyError(f"Crise non suivie: '{identifiant}'")
+        return self._appliquer(enlever=identifiant)
 
 
 def calculer_besoins_crise(crise, df_besoins, facteur_score=1.0):
@@ -216,51 +1935,187 @@ def calculer_besoins_crise(crise, df_besoins, facteur_score=1.0):
     return besoins_ajustes
 
 
-def exporter_allocation_csv(df_allocation, chemin_fichier=None):
+def _chemin_export_defaut(nom_fichier):
+    """Chemin par défaut d'un export dans le dossier outputs du projet (créé si besoin)"""
+    dossier_projet = Path(__file__).parent.parent
+    dossier_outputs = dossier_projet / "outputs"
+    dossier_outputs.mkdir(exist_ok=True)
+    return dossier_outputs / nom_fichier
+
+
+def iterer_morceaux_allocation(df_allocation, taille_morceau=TAILLE_MORCEAU_EXPORT):
     """
-    Exporte les résultats d'allocation dans un fichier CSV
+    Découpe un résultat d'allocation au format large en morceaux de taille_morceau lignes
+    
+    Un ResultatAllocation n'est jamais converti en entier: chaque morceau est construit à la
+    demande, si bien que la mémoire utilisée ne dépend que de la taille des morceaux.
     
     Args:
-        df_allocation (pandas.DataFrame): DataFrame avec les allocations
+        df_allocation (pandas.DataFrame, ResultatAllocation ou iterable): Résultat de l'allocation,
+            ou morceaux déjà découpés (DataFrames avec les mêmes colonnes)
+        taille_morceau (int): Nombre de lignes par morceau
+    
+    Yields:
+        pandas.DataFrame: Morceaux successifs au format large
+    """
+    taille_morceau = max(1, int(taille_morceau))
+    if isinstance(df_allocation, ResultatAllocation):
+        for debut in range(0, len(df_allocation), taille_morceau):
+            yield df_allocation.en_dataframe_large(slice(debut, debut + taille_morceau))
+    elif isinstance(df_allocation, pd.DataFrame):
+        for debut in range(0, len(df_allocation), taille_morceau):
+            yield df_allocation.iloc[debut:debut + taille_morceau]
+    else:
+        yield from df_allocation
+
+
+def exporter_allocation_csv(df_allocation, chemin_fichier=None, taille_morceau=TAILLE_MORCEAU_EXPORT):
+    """
+    Exporte les résultats d'allocation dans un fichier CSV, par morceaux de taille_morceau lignes
+    (mémoire bornée, même pour des millions de crises)
+    
+    Args:
+        df_allocation (pandas.DataFrame, ResultatAllocation ou iterable): Allocations
+            (voir iterer_morceaux_allocation)
         chemin_fichier (str): Chemin du fichier de sortie. Si None, utilise un nom par défaut.
+        taille_morceau (int): Nombre de lignes écrites à la fois
     """
     if chemin_fichier is None:
-        dossier_projet = Path(__file__).parent.parent
-        dossier_outputs = dossier_projet / "outputs"
-        dossier_outputs.mkdir(exist_ok=True)
-        chemin_fichier = dossier_outputs / "allocation_ressources.csv"
+        chemin_fichier = _chemin_export_defaut("allocation_ressources.csv")
     
-    # Exporte le DataFrame en CSV
-    df_allocation.to_csv(chemin_fichier, index=False, encoding='utf-8-sig')
+    # Écrit l'en-tête avec le premier morceau, puis ajoute les suivants au même fichier
+    with open(chemin_fichier, 'w', encoding='utf-8-sig', newline='') as fichier:
+        en_tete = True
+        for morceau in iterer_morceaux_allocation(df_allocation, taille_morceau):
+            morceau.to_csv(fichier, index=False, header=en_tete)
+            en_tete = False
     print(f"✓ Allocation exportée vers {chemin_fichier}")
     
     return chemin_fichier
 
 
-def exporter_allocation_excel(df_allocation, chemin_fichier=None):
+def exporter_allocation_excel(df_allocation, chemin_fichier=None, taille_morceau=TAILLE_MORCEAU_EXPORT):
     """
     Exporte les résultats d'allocation dans un fichier Excel
     
+    Le classeur est écrit en mode "write-only" d'openpyxl (lignes écrites au fil de l'eau, mémoire
+    constante) à partir de morceaux de taille_morceau lignes. Au-delà de la limite d'Excel
+    (1 048 576 lignes), les lignes suivantes sont écrites dans de nouvelles feuilles.
+    
+    Chaque morceau est converti en valeurs Python en une opération, mais openpyxl sérialise
+    ensuite les cellules une à une (de l'ordre de 10⁵ à 10⁶ cellules par seconde): au-delà de
+    quelques centaines de milliers de lignes, préférer exporter_allocation_parquet ou
+    exporter_allocation_csv, plusieurs dizaines de fois plus rapides.
+    
     Args:
-        df_allocation (pandas.DataFrame): DataFrame avec les allocations
+        df_allocation (pandas.DataFrame, ResultatAllocation ou iterable): Allocations
+            (voir iterer_morceaux_allocation)
         chemin_fichier (str): Chemin du fichier de sortie. Si None, utilise un nom par défaut.
+        taille_morceau (int): Nombre de lignes converties à la fois
     """
     try:
         # Importe openpyxl pour l'export Excel (nécessite: pip install openpyxl)
-        import openpyxl
+        from openpyxl import Workbook
+    except ImportError:
+        raise ImportError("openpyxl n'est pas installé (nécessaire pour l'export Excel): pip install openpyxl") from None
+    
+    if chemin_fichier is None:
+        chemin_fichier = _chemin_export_defaut("allocation_ressources.xlsx")
+    
+    classeur = Workbook(write_only=True)
+    feuille = None
+    nb_lignes_feuille = 0
+    for morceau in iterer_morceaux_allocation(df_allocation, taille_morceau):
+        # openpyxl écrit les float32 en double précision: écriture décimale rétablie (7.3)
+        morceau = elargir_colonnes_float32(morceau)
+        # Conversion du morceau entier en valeurs Python (None pour les valeurs manquantes)
+        lignes = morceau.astype(object).where(morceau.notna(), None).to_numpy().tolist()
+        for ligne in lignes:
+            # Nouvelle feuille (avec en-tête) au début et lorsque la feuille courante est pleine
+            if feuille is None or nb_lignes_feuille >= NB_LIGNES_MAX_EXCEL:
+                feuille = classeur.create_sheet(f"Sheet{len(classeur.worksheets) + 1}")
+                feuille.append([str(colonne) for colonne in morceau.columns])
+                nb_lignes_feuille = 1
+            feuille.append(ligne)
+            nb_lignes_feuille += 1
+    if feuille is None:
+        classeur.create_sheet("Sheet1")
+    
+    classeur.save(chemin_fichier)
+    print(f"✓ Allocation exportée vers {chemin_fichier}")
+    
+    return chemin_fichier
+
+
+def _completer_schema_parquet(schema):
+    """
+    Remplace le type null (colonne vide dans le premier morceau) par le type connu de la colonne:
+    SCHEMA_CRISES pour les colonnes des crises, entiers pour les allocations et besoins, réels pour
+    les pourcentages et le score d'urgence, texte pour les autres colonnes
+    
+    Args:
+        schema (pyarrow.Schema): Schéma déduit du premier morceau
+    
+    Returns:
+        pyarrow.Schema: Schéma sans type null
+    """
+    import pyarrow as pa
+    
+    types_schema = {'str': pa.string(), 'category': pa.string(), 'float32': pa.float32(), 'entier': pa.int64(),
+                    'datetime': pa.timestamp('ns'), 'bool': pa.bool_()}
+    schema_crises = {**SCHEMA_CRISES, **SCHEMA_CRISES_OPTIONNEL}
+    for i, champ in enumerate(schema):
+        if not pa.types.is_null(champ.type):
+            continue
+        if champ.name in schema_crises:
+            type_champ = types_schema[schema_crises[champ.name]]
+        elif champ.name.startswith(('allocation_', 'besoin_')):
+            type_champ = pa.int64()
+        elif champ.name.startswith('pourcentage_') or champ.name == 'score_urgence':
+            type_champ = pa.float64()
+        else:
+            type_champ = pa.string()
+        schema = schema.set(i, pa.field(champ.name, type_champ))
+    return schema
+
+
+def exporter_allocation_parquet(df_allocation, chemin_fichier=None, taille_morceau=TAILLE_MORCEAU_EXPORT):
+    """
+    Exporte les résultats d'allocation dans un fichier Parquet (colonnes typées et compressées),
+    un groupe de lignes par morceau de taille_morceau lignes (mémoire bornée)
+    
+    Args:
+        df_allocation (pandas.DataFrame, ResultatAllocation ou iterable): Allocations
+            (voir iterer_morceaux_allocation)
+        chemin_fichier (str): Chemin du fichier de sortie. Si None, utilise un nom par défaut.
+        taille_morceau (int): Nombre de lignes écrites à la fois
+    """
+    try:
+        # Importe pyarrow pour l'export Parquet (nécessite: pip install pyarrow)
+        import pyarrow as pa
+        import pyarrow.parquet as pq
     except ImportError:
-        print("⚠ openpyxl n'est pas installé. Installation de openpyxl...")
-        import subprocess
-        subprocess.check_call(["pip", "install", "openpyxl"])
+        raise ImportError("pyarrow n'est pas installé (nécessaire pour l'export Parquet): pip install pyarrow") from None
     
     if chemin_fichier is None:
-        dossier_projet = Path(__file__).parent.parent
-        dossier_outputs = dossier_projet / "outputs"
-        dossier_outputs.mkdir(exist_ok=True)
-        chemin_fichier = dossier_outputs / "allocation_ressources.xlsx"
+        chemin_fichier = _chemin_export_defaut("allocation_ressources.parquet")
     
-    # Exporte le DataFrame en Excel
-    df_allocation.to_excel(chemin_fichier, index=False, engine='openpyxl')
+    # Le schéma est fixé dès le premier morceau: les colonnes encore entièrement vides (type null)
+    # prennent leur type connu (voir _completer_schema_parquet), et les morceaux suivants y sont convertis
+    ecrivain = None
+    schema = None
+    try:
+        for morceau in iterer_morceaux_allocation(df_allocation, taille_morceau):
+            if ecrivain is None:
+                schema = _completer_schema_parquet(pa.Table.from_pandas(morceau, preserve_index=False).schema)
+                ecrivain = pq.ParquetWriter(chemin_fichier, schema)
+            ecrivain.write_table(pa.Table.from_pandas(morceau, schema=schema, preserve_index=False))
+        
+        if ecrivain is None:
+            pq.write_table(pa.table({}), chemin_fichier)
+    finally:
+        if ecrivain is not None:
+            ecrivain.close()
     print(f"✓ Allocation exportée vers {chemin_fichier}")
     
     return chemin_fichier
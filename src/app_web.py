@@ -11,12 +11,14 @@ import json
 import os
 
 # Import des modules du projet
-from src.chargement_donnees import charger_crises, charger_besoins, afficher_statistiques_crises
-from src.allocation_gloutonne import allouer_ressources_glouton, exporter_allocation_csv, exporter_allocation_excel
+from src.chargement_donnees import (charger_crises, charger_besoins, afficher_statistiques_crises,
+                                    elargir_float32, elargir_colonnes_float32, obtenir_entrepot_crises)
+from src.allocation_gloutonne import (allouer_ressources_cache, exporter_allocation_csv, exporter_allocation_excel,
+                                      simuler_scenarios_stock, calculer_achats_budget)
 from src.visualisation_carte import creer_carte_interactive, exporter_carte_html
 from src.prediction_crises import (charger_donnees_pays, rechercher_pays, obtenir_types_risques,
                                    calculer_besoins_ressources, calculer_couts_pourcentages,
-                                   calculer_probabilite_evenement)
+                                   calculer_probabilite_evenement, obtenir_index_spatial)
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'cgenial-2025-secret-key'
@@ -32,6 +34,18 @@ app.static_folder = str(dossier_projet / 'static')
 (dossier_projet / 'static' / 'maps').mkdir(exist_ok=True, parents=True)
 (dossier_projet / 'static' / 'js').mkdir(exist_ok=True, parents=True)
 
+# Stock utilisé pour les ressources non fournies dans les requêtes d'allocation
+STOCK_DEFAUT = {
+    'eau_potable_litres': 50000000,
+    'tentes': 10000,
+    'medicaments_doses': 500000,
+    'hopitaux_campagne': 100,
+    'generateurs': 300,
+    'vehicules_urgence': 200,
+    'personnel_medical': 3000,
+    'denrees_alimentaires_kg': 10000000
+}
+
 
 @app.route('/')
 def index():
@@ -44,10 +58,11 @@ def api_crises():
     """API pour obtenir les données des crises"""
     try:
         seulement_actuelles = request.args.get('actuelles', 'false').lower() == 'true'
-        crises = charger_crises(seulement_actuelles=seulement_actuelles)
+        entrepot = obtenir_entrepot_crises()
+        crises = entrepot.par_statut(True) if seulement_actuelles else entrepot.df
         
         # Convertit les dates en chaînes de caractères pour la sérialisation JSON
-        crises_copy = crises.copy()
+        crises_copy = elargir_colonnes_float32(crises).copy()
         if 'date' in crises_copy.columns:
             crises_copy['date'] = crises_copy['date'].apply(
                 lambda x: x.strftime('%Y-%m-%d') if pd.notna(x) else None
@@ -110,25 +125,31 @@ def api_besoins():
 def api_statistiques():
     """API pour obtenir les statistiques des crises"""
     try:
-        crises = charger_crises()
-        crises_actuelles = charger_crises(seulement_actuelles=True)
-        
+        entrepot = obtenir_entrepot_crises()
+        crises = entrepot.df
+        crises_actuelles = entrepot.par_statut(True)
+        intensites = crises['intensite'].astype(np.float64)
+        # Pour le JSON: minimum et maximum retrouvent leur écriture décimale (7.3), moyennes arrondies
+        intensite_min, intensite_max = elargir_float32([crises['intensite'].min(), crises['intensite'].max()])
+        
+        # Les catégories sans crise (effectif nul) sont écartées des répartitions
         stats = {
             'total_crises': len(crises),
             'crises_actuelles': len(crises_actuelles),
             'crises_passees': len(crises) - len(crises_actuelles),
-            'par_type': crises['type_crise'].value_counts().to_dict(),
-            'par_pays': crises['pays'].value_counts().head(10).to_dict(),
-            'intensite_moyenne': float(crises['intensite'].mean()),
-            'intensite_min': float(crises['intensite'].min()),
-            'intensite_max': float(crises['intensite'].max()),
+            'par_type': entrepot.compter_par_type(),
+            'par_pays': crises['pays'].value_counts().loc[lambda effectifs: effectifs > 0].head(10).to_dict(),
+            'intensite_moyenne': round(float(intensites.mean()), 4),
+            'intensite_min': float(intensite_min),
+            'intensite_max': float(intensite_max),
             'population_totale': int(crises['population_touchee'].sum())
         }
         
         # Statistiques des crises actuelles
         if len(crises_actuelles) > 0:
-            stats['par_type_actuelles'] = crises_actuelles['type_crise'].value_counts().to_dict()
-            stats['intensite_moyenne_actuelles'] = float(crises_actuelles['intensite'].mean())
+            intensites_actuelles = crises_actuelles['intensite'].astype(np.float64)
+            stats['par_type_actuelles'] = crises_actuelles['type_crise'].value_counts().loc[lambda effectifs: effectifs > 0].to_dict()
+            stats['intensite_moyenne_actuelles'] = round(float(intensites_actuelles.mean()), 4)
             stats['population_totale_actuelles'] = int(crises_actuelles['population_touchee'].sum())
         
         return jsonify({'success': True, 'data': stats})
@@ -143,33 +164,46 @@ def api_allocation():
         data = request.json or {}
         stock = data.get('stock', {})
         seulement_actuelles = data.get('seulement_actuelles', True)  # Par défaut, seulement actuelles
+        mode = data.get('mode', 'proportionnel')
+        # 'large': une ligne par crise avec 3 colonnes par ressource; 'long': couples crise × ressource non nuls
+        format_allocation = data.get('format', 'large')
+        if format_allocation not in ('large', 'long'):
+            return jsonify({'success': False, 'error': f"Format inconnu: '{format_allocation}'. Formats disponibles: ['large', 'long']"}), 400
         
-        crises = charger_crises()
+        crises = obtenir_entrepot_crises()
         besoins = charger_besoins()
         
-        # Valeurs par défaut si non fournies
-        stock_defaut = {
-            'eau_potable_litres': 50000000,
-            'tentes': 10000,
-            'medicaments_doses': 500000,
-            'hopitaux_campagne': 100,
-            'generateurs': 300,
-            'vehicules_urgence': 200,
-            'personnel_medical': 3000,
-            'denrees_alimentaires_kg': 10000000
-        }
-        
         # Fusionne avec les valeurs par défaut
-        stock_final = {**stock_defaut, **stock}
-        
-        allocation, stock_restant, stock_reserve = allouer_ressources_glouton(
-            crises, besoins, stock_final, 
-            seulement_actuelles=seulement_actuelles
-        )
+        stock_final = {**STOCK_DEFAUT, **stock}
+        
+        try:
+            # Options numériques lues ici: une valeur invalide donne une erreur 400
+            options = {}
+            if data.get('top_k') not in (None, ''):
+                options['top_k'] = int(data['top_k'])
+            if data.get('budget') not in (None, ''):
+                options['budget'] = float(data['budget'])
+            if format_allocation == 'long':
+                options['format_resultat'] = 'compact'
+            
+            # Même jeu de données, besoins, stock et mode qu'un appel précédent: résultat réutilisé
+            allocation, stock_restant, stock_reserve = allouer_ressources_cache(
+                crises, besoins, stock_final, 
+                seulement_actuelles=seulement_actuelles,
+                mode=mode, **options
+            )
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
         
         # Convertit les dates et types pour la sérialisation JSON
         if len(allocation) > 0:
-            allocation_copy = allocation.copy()
+            # Format long: seules les 5 crises les plus urgentes sont construites au format large
+            if format_allocation == 'long':
+                allocation_copy = allocation.en_dataframe_large(slice(0, 5))
+            else:
+                allocation_copy = allocation.copy()
+            # Les colonnes float32 des crises retrouvent leur écriture décimale (7.3) pour le JSON
+            allocation_copy = elargir_colonnes_float32(allocation_copy)
             for col in allocation_copy.columns:
                 if pd.api.types.is_datetime64_any_dtype(allocation_copy[col]):
                     allocation_copy[col] = allocation_copy[col].dt.strftime('%Y-%m-%d')
@@ -215,14 +249,71 @@ def api_allocation():
             else:
                 stock_reserve_clean[key] = val
         
-        return jsonify({
+        reponse = {
             'success': True,
-            'allocation': allocation_dict,
+            'allocation': allocation.en_dict() if format_allocation == 'long' else allocation_dict,
             'stock_restant': stock_restant_clean,
             'stock_reserve': stock_reserve_clean,
             'top5': top5_dict,
             'nb_crises_traitees': len(allocation),
-            'seulement_actuelles': seulement_actuelles
+            'seulement_actuelles': seulement_actuelles,
+            'mode': mode,
+            'format': format_allocation,
+            # Valeur d'une unité de plus de chaque ressource et crises qui la limitent
+            'prix_ombre': allocation.attrs.get('prix_ombre', {}),
+            'crises_limitantes': allocation.attrs.get('crises_limitantes', {}),
+            'nb_crises_limitantes': allocation.attrs.get('nb_crises_limitantes', {})
+        }
+        
+        # Mode budget: quantités achetées et leurs coûts
+        if mode == 'budget':
+            reponse['achats'] = calculer_achats_budget(allocation, stock_final, stock_reserve, options.get('budget', 0))
+            reponse['prix_budget'] = allocation.attrs.get('prix_budget', 0.0)
+        
+        return jsonify(reponse)
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@app.route('/api/allocation/scenarios', methods=['POST'])
+def api_allocation_scenarios():
+    """
+    API pour évaluer de nombreux scénarios de stock en un seul appel
+    
+    Corps JSON: {'stocks': [{ressource: quantité}, ...], 'ratios_reserve': nombre ou liste (optionnel),
+                 'seulement_actuelles': bool, 'mode': 'proportionnel' ou 'priorite'}
+    Les ressources absentes d'un scénario prennent la valeur du stock par défaut.
+    """
+    try:
+        data = request.json or {}
+        stocks = data.get('stocks', [])
+        if not isinstance(stocks, list) or len(stocks) == 0:
+            return jsonify({'success': False, 'error': "Le champ 'stocks' doit être une liste non vide"}), 400
+        seulement_actuelles = data.get('seulement_actuelles', True)
+        mode = data.get('mode', 'proportionnel')
+        
+        crises = obtenir_entrepot_crises()
+        besoins = charger_besoins()
+        
+        try:
+            resume = simuler_scenarios_stock(
+                crises, besoins, [{**STOCK_DEFAUT, **stock} for stock in stocks],
+                ratios_reserve=data.get('ratios_reserve'),
+                seulement_actuelles=seulement_actuelles, mode=mode
+            )
+        except (ValueError, TypeError, AttributeError) as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        
+        # Résumé par colonnes (une liste de valeurs par indicateur) pour limiter la taille de la réponse
+        return jsonify({
+            'success': True,
+            'nb_scenarios': len(resume),
+            'ressources': [col for col in besoins.columns if col != 'type_crise'],
+            'resume': resume.to_dict(orient='list'),
+            'seulement_actuelles': seulement_actuelles,
+            'mode': mode
         })
     except Exception as e:
         import traceback
@@ -235,7 +326,8 @@ def api_carte():
     """API pour générer la carte interactive"""
     try:
         seulement_actuelles = request.args.get('actuelles', 'false') == 'true'
-        crises = charger_crises(seulement_actuelles=seulement_actuelles)
+        entrepot = obtenir_entrepot_crises()
+        crises = entrepot.par_statut(True) if seulement_actuelles else entrepot.df
         allocation = None
         
         # Vérifie si on doit inclure les allocations
@@ -243,17 +335,7 @@ def api_carte():
         
         if include_allocation:
             besoins = charger_besoins()
-            stock = {
-                'eau_potable_litres': 50000000,
-                'tentes': 10000,
-                'medicaments_doses': 500000,
-                'hopitaux_campagne': 100,
-                'generateurs': 300,
-                'vehicules_urgence': 200,
-                'personnel_medical': 3000,
-                'denrees_alimentaires_kg': 10000000
-            }
-            allocation, _, _ = allouer_ressources_glouton(crises, besoins, stock, seulement_actuelles=True)
+            allocation, _, _ = allouer_ressources_cache(entrepot, besoins, STOCK_DEFAUT, seulement_actuelles=True)
         
         carte = creer_carte_interactive(crises, allocation)
         dossier_maps = dossier_projet / 'maps'
@@ -283,9 +365,13 @@ def api_carte_heatmap():
         type_crise = request.args.get('type_crise', 'Séisme')
         intensite = float(request.args.get('intensite', 7.0))
         resolution = float(request.args.get('resolution', 3.0))  # Résolution de la grille
+        # 'image' (une seule image de la grille, page légère) ou 'cercles' (un cercle par point)
+        rendu = request.args.get('rendu', 'image')
+        if rendu not in ('image', 'cercles'):
+            return jsonify({'success': False, 'error': "Paramètre 'rendu' invalide (attendu: 'image' ou 'cercles')"}), 400
         
-        # Charge toutes les crises historiques pour le calcul de probabilité
-        crises = charger_crises(seulement_actuelles=False)
+        # Utilise toutes les crises historiques (indexées) pour le calcul de probabilité
+        crises = obtenir_entrepot_crises()
         
         # Crée la carte avec heatmap
         carte = creer_carte_avec_heatmap(
@@ -293,7 +379,8 @@ def api_carte_heatmap():
             type_crise=type_crise, 
             intensite=intensite,
             resolution=resolution,
-            titre="Carte de Probabilité de Crise"
+            titre="Carte de Probabilité de Crise",
+            rendu=rendu
         )
         
         # Sauvegarde la carte
@@ -318,6 +405,54 @@ def api_carte_heatmap():
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
+@app.route('/api/crises-proches')
+def api_crises_proches():
+    """API pour obtenir les crises historiques les plus proches d'un point (index spatial)"""
+    try:
+        try:
+            lat = float(request.args['lat'])
+            lon = float(request.args['lon'])
+            k = int(request.args.get('k', 10))
+            rayon = request.args.get('rayon')
+            rayon = float(rayon) if rayon is not None else None
+        except (KeyError, ValueError):
+            return jsonify({'success': False, 'error': 'Paramètres lat et lon requis (k et rayon numériques)'}), 400
+        if not (-90 <= lat <= 90 and -180 <= lon <= 180) or k < 0 or (rayon is not None and rayon < 0):
+            return jsonify({'success': False, 'error': 'Paramètres hors limites'}), 400
+        type_crise = request.args.get('type')
+        
+        entrepot = obtenir_entrepot_crises()
+        index = obtenir_index_spatial(entrepot, type_crise)
+        
+        # Les k plus proches, ou toutes les crises du rayon (limitées aux k plus proches)
+        if rayon is None:
+            distances, indices = index.plus_proches(lat, lon, k)
+        else:
+            distances, indices = index.dans_rayon(lat, lon, rayon)
+        nb_dans_rayon = len(distances) if rayon is not None else None
+        distances, indices = distances[:k], indices[:k]
+        
+        colonnes = [c for c in ['nom_crise', 'type_crise', 'pays', 'latitude', 'longitude', 'intensite', 'en_cours']
+                    if c in entrepot.df.columns]
+        lignes = elargir_colonnes_float32(entrepot.df.iloc[index.positions[indices]][colonnes])
+        crises = []
+        for (_, ligne), distance in zip(lignes.iterrows(), distances):
+            crise = {col: (val.item() if isinstance(val, np.generic) else val) for col, val in ligne.items()}
+            crise['distance_km'] = round(float(distance), 1)
+            crises.append(crise)
+        
+        return jsonify({
+            'success': True,
+            'data': crises,
+            'nb_crises_indexees': len(index),
+            'nb_dans_rayon': nb_dans_rayon
+        })
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
 @app.route('/api/pays')
 def api_pays():
     """API pour rechercher un pays"""
@@ -362,7 +497,7 @@ def api_prediction():
         # Charge les données
         df_pays = charger_donnees_pays()
         df_besoins = charger_besoins()
-        df_crises = charger_crises()
+        df_crises = obtenir_entrepot_crises()
         
         # Recherche le pays
         donnees_pays = rechercher_pays(nom_pays, df_pays)
@@ -4,35 +4,343 @@ Auteur: Projet CGénial 2025
 """
 
 import pandas as pd
+import numpy as np
 import os
+import hashlib
+import threading
 from pathlib import Path
 from datetime import datetime
 
 
-def charger_crises(chemin_fichier=None, seulement_actuelles=False):
+# Schéma typé du DataFrame des crises (colonne -> type pandas)
+# 'entier' désigne le plus petit entier signé capable de contenir les valeurs
+SCHEMA_CRISES = {
+    'nom_crise': 'str',
+    'type_crise': 'category',
+    'pays': 'category',
+    'latitude': 'float32',
+    'longitude': 'float32',
+    'intensite': 'float32',
+    'date': 'datetime',
+    'population_touchee': 'entier',
+    'accessibilite': 'float32',
+}
+
+# Colonnes facultatives: typées si présentes
+SCHEMA_CRISES_OPTIONNEL = {
+    'description': 'str',
+    'en_cours': 'bool',
+    'date_fin': 'datetime',
+}
+
+# Bornes de validation (min, max) des colonnes numériques
+BORNES_CRISES = {
+    'latitude': (-90.0, 90.0),
+    'longitude': (-180.0, 180.0),
+    'intensite': (0.0, 10.0),
+    'accessibilite': (0.0, 1.0),
+    'population_touchee': (0, None),
+}
+
+
+# Cache des jeux de données partagé par tout le processus
+# Clé: chemin absolu du fichier -> (empreinte du fichier, DataFrame chargé)
+_cache_donnees = {}
+_verrou_cache = threading.Lock()
+
+# Entrepôts indexés construits à partir des jeux de données en cache
+# Clé: chemin absolu du fichier -> EntrepotCrises (qui connaît sa version)
+_cache_entrepots = {}
+
+# Version du format des snapshots binaires (.npz): un snapshot d'un autre format est reconstruit
+FORMAT_SNAPSHOT = 3
+
+
+def empreinte_fichier(chemin_fichier):
     """
-    Charge les données des crises depuis un fichier CSV
+    Calcule l'empreinte d'un fichier (date de modification, taille et hash du contenu)
+    
+    Le hash n'est recalculé que si la date de modification ou la taille ont changé
+    depuis le dernier chargement mis en cache.
     
     Args:
-        chemin_fichier (str): Chemin vers le fichier CSV. Si None, utilise le fichier par défaut.
-        seulement_actuelles (bool): Si True, ne charge que les crises en cours (en_cours=True)
+        chemin_fichier (str): Chemin vers le fichier
     
     Returns:
-        pandas.DataFrame: DataFrame contenant les données des crises
+        tuple: (mtime_ns, taille, hash_sha1) identifiant la version du fichier
     """
-    # Si aucun chemin n'est fourni, utilise le fichier par défaut dans le dossier data
-    if chemin_fichier is None:
-        # Obtient le chemin du répertoire parent (racine du projet)
-        dossier_projet = Path(__file__).parent.parent
-        chemin_fichier = dossier_projet / "data" / "Base_Crises_TresTres_Enrichie_CGenial.csv"
+    infos = os.stat(chemin_fichier)
+    cle = str(Path(chemin_fichier).resolve())
     
-    # Vérifie que le fichier existe
-    if not os.path.exists(chemin_fichier):
-        raise FileNotFoundError(f"Le fichier {chemin_fichier} n'existe pas.")
+    # Réutilise le hash déjà calculé si le fichier n'a pas bougé
+    entree = _cache_donnees.get(cle)
+    if entree is not None:
+        mtime_ns, taille, hash_contenu = entree[0]
+        if mtime_ns == infos.st_mtime_ns and taille == infos.st_size:
+            return entree[0]
+    
+    sha1 = hashlib.sha1()
+    with open(chemin_fichier, 'rb') as fichier:
+        for bloc in iter(lambda: fichier.read(1 << 20), b''):
+            sha1.update(bloc)
+    
+    return (infos.st_mtime_ns, infos.st_size, sha1.hexdigest())
+
+
+def empreinte_dataframe(df):
+    """
+    Calcule une empreinte du contenu d'un DataFrame (colonnes, types, index et valeurs)
+    
+    Deux DataFrames de même contenu ont la même empreinte. Un EntrepotCrises construit à
+    partir d'un fichier est identifié directement par la version (hash) de ce fichier.
+    
+    Args:
+        df (pandas.DataFrame ou EntrepotCrises): Données à identifier
+    
+    Returns:
+        str: Empreinte hexadécimale (sha1)
+    """
+    if isinstance(df, EntrepotCrises):
+        if df.version is not None:
+            return f'fichier:{df.version}'
+        df = df.df
+    
+    sha1 = hashlib.sha1()
+    sha1.update(repr([(str(colonne), str(type_colonne)) for colonne, type_colonne in df.dtypes.items()]).encode())
+    sha1.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    return sha1.hexdigest()
+
+
+def _charger_avec_cache(chemin_fichier, fonction_chargement):
+    """
+    Retourne le DataFrame mis en cache pour ce fichier, en le rechargeant
+    uniquement si le fichier a changé sur le disque
+    
+    Args:
+        chemin_fichier (str): Chemin vers le fichier source
+        fonction_chargement (callable): Fonction (chemin, empreinte) qui lit et prépare le fichier
+    
+    Returns:
+        tuple: (DataFrame partagé, version (hash) du fichier correspondant,
+                True si le fichier vient d'être (re)chargé)
+    """
+    cle = str(Path(chemin_fichier).resolve())
+    
+    with _verrou_cache:
+        empreinte = empreinte_fichier(chemin_fichier)
+        entree = _cache_donnees.get(cle)
+        
+        # Compare uniquement le hash: un simple "touch" ne force pas de rechargement
+        if entree is not None and entree[0][2] == empreinte[2]:
+            _cache_donnees[cle] = (empreinte, entree[1])
+            return entree[1], empreinte[2], False
+        
+        df = fonction_chargement(chemin_fichier, empreinte)
+        _cache_donnees[cle] = (empreinte, df)
+        return df, empreinte[2], True
+
+
+def vider_cache_donnees():
+    """
+    Vide le cache des jeux de données (force un rechargement au prochain appel)
+    """
+    with _verrou_cache:
+        _cache_donnees.clear()
+        _cache_entrepots.clear()
+
+
+def _chemin_snapshot(chemin_fichier):
+    """
+    Retourne le chemin du snapshot binaire (.npz) associé à un fichier CSV
+    
+    Args:
+        chemin_fichier (str): Chemin vers le fichier CSV source
+    
+    Returns:
+        pathlib.Path: Chemin du snapshot, à côté du CSV (même nom, extension .npz)
+    """
+    return Path(chemin_fichier).with_suffix('.npz')
+
+
+def _encoder_textes(valeurs):
+    """
+    Encode des textes en un seul tableau d'octets UTF-8, textes séparés par le caractère nul
+    
+    Args:
+        valeurs (array-like): Textes (sans valeur manquante)
+    
+    Returns:
+        numpy.ndarray: Octets (uint8)
+    
+    Raises:
+        ValueError: Si un texte contient le caractère nul
+    """
+    textes = [str(valeur) for valeur in valeurs]
+    contenu = '\x00'.join(textes)
+    if contenu.count('\x00') != max(len(textes) - 1, 0):
+        raise ValueError("texte contenant le caractère nul")
+    return np.frombuffer(contenu.encode('utf-8'), dtype=np.uint8)
+
+
+def _decoder_textes(octets, nombre):
+    """
+    Décode un tableau écrit par _encoder_textes
+    
+    Args:
+        octets (numpy.ndarray): Octets (uint8)
+        nombre (int): Nombre de textes
+    
+    Returns:
+        list: Textes
+    """
+    if nombre == 0:
+        return []
+    return octets.tobytes().decode('utf-8').split('\x00')
+
+
+def _ecrire_snapshot(df, chemin_snapshot, empreinte):
+    """
+    Écrit un DataFrame déjà typé dans un snapshot NumPy (.npz) en colonnes
+    
+    Les colonnes numériques, booléennes et de dates sont stockées telles quelles, les catégories
+    par leurs codes et la liste des catégories, les colonnes texte en un seul tableau d'octets
+    UTF-8 accompagné d'un masque des valeurs manquantes. La taille et le hash du fichier source
+    sont enregistrés pour vérifier que le snapshot lui correspond.
+    
+    Args:
+        df (pandas.DataFrame): DataFrame à sauvegarder
+        chemin_snapshot (pathlib.Path): Chemin du fichier .npz à écrire
+        empreinte (tuple): Empreinte du fichier source (voir empreinte_fichier)
+    """
+    tableaux = {
+        '__format__': np.array(FORMAT_SNAPSHOT),
+        '__source__': np.array([str(empreinte[1]), empreinte[2]]),
+        '__colonnes__': np.array(df.columns, dtype=str),
+    }
+    
+    for i, colonne in enumerate(df.columns):
+        serie = df[colonne]
+        if isinstance(serie.dtype, pd.CategoricalDtype):
+            tableaux[f'c{i}'] = serie.cat.codes.to_numpy()
+            tableaux[f'k{i}'] = _encoder_textes(serie.cat.categories)
+            tableaux[f'n{i}'] = np.array(len(serie.cat.categories))
+        elif pd.api.types.is_numeric_dtype(serie) or pd.api.types.is_datetime64_any_dtype(serie):
+            tableaux[f'c{i}'] = serie.to_numpy()
+        else:
+            manquants = serie.isna().to_numpy()
+            tableaux[f'c{i}'] = _encoder_textes(serie.to_numpy()[~manquants])
+            tableaux[f'm{i}'] = manquants
+    
+    # Écrit dans un fichier temporaire puis renomme, pour ne jamais laisser un snapshot partiel
+    chemin_temporaire = chemin_snapshot.with_name(chemin_snapshot.name + '.tmp')
+    with open(chemin_temporaire, 'wb') as fichier:
+        np.savez(fichier, **tableaux)
+    os.replace(chemin_temporaire, chemin_snapshot)
+
+
+def _lire_snapshot(chemin_snapshot, empreinte):
+    """
+    Relit un snapshot écrit par _ecrire_snapshot
+    
+    Args:
+        chemin_snapshot (pathlib.Path): Chemin du fichier .npz
+        empreinte (tuple): Empreinte du fichier source (voir empreinte_fichier)
+    
+    Returns:
+        pandas.DataFrame: DataFrame reconstruit avec ses types, ou None si le snapshot
+                          ne correspond pas au fichier source (ou à un autre format)
+    """
+    with np.load(chemin_snapshot, allow_pickle=False) as archive:
+        if '__format__' not in archive.files or int(archive['__format__']) != FORMAT_SNAPSHOT:
+            return None
+        if archive['__source__'].tolist() != [str(empreinte[1]), empreinte[2]]:
+            return None
+        
+        colonnes = archive['__colonnes__'].tolist()
+        donnees = {}
+        for i, colonne in enumerate(colonnes):
+            valeurs = archive[f'c{i}']
+            if f'k{i}' in archive.files:
+                # Catégorie: codes et liste des catégories
+                categories = _decoder_textes(archive[f'k{i}'], int(archive[f'n{i}']))
+                donnees[colonne] = pd.Categorical.from_codes(valeurs, categories)
+            elif f'm{i}' in archive.files:
+                # Colonne texte: restaure les valeurs manquantes
+                manquants = archive[f'm{i}']
+                textes = np.empty(len(manquants), dtype=object)
+                textes[~manquants] = _decoder_textes(valeurs, int((~manquants).sum()))
+                textes[manquants] = None
+                donnees[colonne] = pd.Series(textes.tolist())
+            else:
+                donnees[colonne] = valeurs
+    
+    return pd.DataFrame(donnees, columns=colonnes)
+
+
+def _charger_avec_snapshot(chemin_fichier, fonction_lecture_csv, empreinte):
+    """
+    Charge un jeu de données depuis son snapshot binaire s'il correspond au fichier source,
+    sinon lit le CSV et (re)construit le snapshot
+    
+    Le snapshot est à jour si la taille et le hash du CSV source enregistrés dans le snapshot
+    sont ceux du CSV actuel (les dates de modification ne sont pas utilisées: un CSV remplacé
+    par un fichier plus ancien est bien détecté).
+    
+    Args:
+        chemin_fichier (str): Chemin vers le fichier CSV source
+        fonction_lecture_csv (callable): Fonction qui lit et type le CSV
+        empreinte (tuple): Empreinte du fichier source (voir empreinte_fichier)
+    
+    Returns:
+        pandas.DataFrame: DataFrame chargé
+    """
+    chemin_snapshot = _chemin_snapshot(chemin_fichier)
+    
+    if chemin_snapshot.exists():
+        try:
+            df = _lire_snapshot(chemin_snapshot, empreinte)
+            if df is not None:
+                return df
+        except (OSError, ValueError, KeyError) as e:
+            print(f"⚠ Snapshot illisible ({e}), reconstruction depuis {chemin_fichier}")
     
+    df = fonction_lecture_csv(chemin_fichier)
+    
+    try:
+        _ecrire_snapshot(df, chemin_snapshot, empreinte)
+    except (OSError, ValueError) as e:
+        # Dossier en lecture seule par exemple: on continue sans snapshot
+        print(f"⚠ Impossible d'écrire le snapshot {chemin_snapshot}: {e}")
+    
+    return df
+
+
+def _lire_csv_crises(chemin_fichier):
+    """
+    Lit le fichier CSV des crises et convertit les colonnes de dates et de statut
+    
+    Args:
+        chemin_fichier (str): Chemin vers le fichier CSV
+    
+    Returns:
+        pandas.DataFrame: DataFrame complet des crises
+    """
     # Charge le fichier CSV dans un DataFrame pandas
     df_crises = pd.read_csv(chemin_fichier, encoding='utf-8')
     
+    return _convertir_colonnes_crises(df_crises)
+
+
+def _convertir_colonnes_crises(df_crises):
+    """
+    Convertit les colonnes de dates et de statut d'un DataFrame de crises brut
+    
+    Args:
+        df_crises (pandas.DataFrame): DataFrame tel que lu depuis le CSV
+    
+    Returns:
+        pandas.DataFrame: Le même DataFrame avec les colonnes converties
+    """
     # Convertit la colonne date en format datetime pour faciliter les manipulations
     df_crises['date'] = pd.to_datetime(df_crises['date'])
     
@@ -44,6 +352,63 @@ def charger_crises(chemin_fichier=None, seulement_actuelles=False):
     if 'date_fin' in df_crises.columns:
         df_crises['date_fin'] = pd.to_datetime(df_crises['date_fin'], errors='coerce')
     
+    return df_crises
+
+
+def charger_crises(chemin_fichier=None, seulement_actuelles=False):
+    """
+    Charge les données des crises depuis un fichier CSV
+    
+    Le fichier n'est lu qu'une fois par processus: les appels suivants réutilisent
+    le DataFrame en cache tant que le fichier n'a pas changé sur le disque.
+    Les colonnes sont validées et typées selon SCHEMA_CRISES (catégories, float32).
+    Le DataFrame retourné est une copie: le modifier ne touche pas le cache.
+    
+    Args:
+        chemin_fichier (str): Chemin vers le fichier CSV. Si None, utilise le fichier par défaut.
+        seulement_actuelles (bool): Si True, ne charge que les crises en cours (en_cours=True)
+    
+    Returns:
+        pandas.DataFrame: DataFrame contenant les données des crises
+    """
+    df_crises, version = _charger_crises_versionnees(chemin_fichier, seulement_actuelles)
+    return df_crises
+
+
+def _charger_crises_versionnees(chemin_fichier=None, seulement_actuelles=False):
+    """
+    Charge les crises comme charger_crises et retourne aussi la version du fichier lu
+    
+    Le DataFrame et la version proviennent de la même entrée du cache (lue sous verrou):
+    la version correspond toujours aux données retournées, même si le fichier change
+    entre-temps.
+    
+    Args:
+        chemin_fichier (str): Chemin vers le fichier CSV. Si None, utilise le fichier par défaut.
+        seulement_actuelles (bool): Si True, ne charge que les crises en cours (en_cours=True)
+    
+    Returns:
+        tuple: (DataFrame des crises, version (hash) du fichier)
+    """
+    # Si aucun chemin n'est fourni, utilise le fichier par défaut dans le dossier data
+    if chemin_fichier is None:
+        # Obtient le chemin du répertoire parent (racine du projet)
+        dossier_projet = Path(__file__).parent.parent
+        chemin_fichier = dossier_projet / "data" / "Base_Crises_TresTres_Enrichie_CGenial.csv"
+    
+    # Vérifie que le fichier existe
+    if not os.path.exists(chemin_fichier):
+        raise FileNotFoundError(f"Le fichier {chemin_fichier} n'existe pas.")
+    
+    # Récupère le DataFrame complet depuis le cache (snapshot ou CSV si nécessaire)
+    df_cache, version, recharge = _charger_avec_cache(
+        chemin_fichier,
+        lambda chemin, empreinte: _charger_avec_snapshot(
+            chemin, lambda chemin_csv: appliquer_schema_crises(_lire_csv_crises(chemin_csv)), empreinte
+        )
+    )
+    df_crises = df_cache.copy()
+    
     # Filtre les crises actuelles si demandé
     if seulement_actuelles:
         if 'en_cours' in df_crises.columns:
@@ -53,19 +418,323 @@ def charger_crises(chemin_fichier=None, seulement_actuelles=False):
             date_limite = datetime.now() - pd.Timedelta(days=365)
             df_crises = df_crises[df_crises['date'] >= date_limite].copy()
     
-    # Affiche un message de confirmation
-    if seulement_actuelles:
-        print(f"✓ {len(df_crises)} crises actuelles chargées depuis {chemin_fichier}")
-    else:
-        print(f"✓ {len(df_crises)} crises chargées depuis {chemin_fichier}")
+    # Affiche un message de confirmation lors d'une lecture effective du fichier
+    if recharge:
+        if seulement_actuelles:
+            print(f"✓ {len(df_crises)} crises actuelles chargées depuis {chemin_fichier}")
+        else:
+            print(f"✓ {len(df_crises)} crises chargées depuis {chemin_fichier}")
+    
+    return df_crises, version
+
+
+def _filtrer_crises(df_crises, type_crise=None, en_cours=None, bbox=None, date_min=None, date_max=None):
+    """
+    Applique les filtres de iterer_crises à un DataFrame (ou à un morceau de fichier)
+    
+    Args:
+        df_crises (pandas.DataFrame): DataFrame des crises (dates déjà converties)
+        type_crise (str ou list): Type(s) de crise à conserver
+        en_cours (bool): Statut à conserver (None = tous)
+        bbox (tuple): (lat_min, lon_min, lat_max, lon_max) zone géographique à conserver
+        date_min (str ou datetime): Date minimale incluse
+        date_max (str ou datetime): Date maximale incluse
+    
+    Returns:
+        pandas.DataFrame: Lignes qui respectent tous les filtres
+    """
+    masque = pd.Series(True, index=df_crises.index)
+    
+    if type_crise is not None:
+        types = [type_crise] if isinstance(type_crise, str) else list(type_crise)
+        masque &= df_crises['type_crise'].isin(types)
+    
+    if en_cours is not None:
+        if 'en_cours' in df_crises.columns:
+            masque &= df_crises['en_cours'] == en_cours
+        else:
+            # Comme charger_crises: sans colonne en_cours, une crise récente est considérée actuelle
+            date_limite = datetime.now() - pd.Timedelta(days=365)
+            masque &= (df_crises['date'] >= date_limite) == en_cours
+    
+    if bbox is not None:
+        lat_min, lon_min, lat_max, lon_max = bbox
+        masque &= df_crises['latitude'].between(lat_min, lat_max)
+        masque &= df_crises['longitude'].between(lon_min, lon_max)
+    
+    if date_min is not None:
+        masque &= df_crises['date'] >= pd.to_datetime(date_min)
+    
+    if date_max is not None:
+        masque &= df_crises['date'] <= pd.to_datetime(date_max)
+    
+    return df_crises[masque]
+
+
+def iterer_crises(chemin_fichier=None, chunksize=100000, type_crise=None, en_cours=None,
+                  bbox=None, date_min=None, date_max=None):
+    """
+    Parcourt un fichier de crises morceau par morceau en appliquant les filtres sur chaque morceau
+    
+    Seules les lignes retenues sont converties au schéma compact: un catalogue de plusieurs
+    Go n'est jamais entièrement chargé en mémoire.
+    
+    Args:
+        chemin_fichier (str): Chemin vers le fichier CSV. Si None, utilise le fichier par défaut.
+        chunksize (int): Nombre de lignes lues par morceau
+        type_crise (str ou list): Type(s) de crise à conserver (None = tous)
+        en_cours (bool): True pour les crises actuelles, False pour les passées (None = toutes)
+        bbox (tuple): (lat_min, lon_min, lat_max, lon_max) zone géographique à conserver
+        date_min (str ou datetime): Date minimale incluse
+        date_max (str ou datetime): Date maximale incluse
+    
+    Yields:
+        pandas.DataFrame: Morceaux filtrés et typés (les morceaux vides sont ignorés)
+    """
+    if chemin_fichier is None:
+        dossier_projet = Path(__file__).parent.parent
+        chemin_fichier = dossier_projet / "data" / "Base_Crises_TresTres_Enrichie_CGenial.csv"
+    
+    if not os.path.exists(chemin_fichier):
+        raise FileNotFoundError(f"Le fichier {chemin_fichier} n'existe pas.")
+    
+    with pd.read_csv(chemin_fichier, encoding='utf-8', chunksize=chunksize) as lecteur:
+        for morceau in lecteur:
+            morceau = _convertir_colonnes_crises(morceau)
+            morceau = _filtrer_crises(morceau, type_crise, en_cours, bbox, date_min, date_max)
+            if len(morceau) > 0:
+                yield appliquer_schema_crises(morceau)
+
+
+def concatener_morceaux_crises(morceaux):
+    """
+    Rassemble des morceaux produits par iterer_crises en un seul DataFrame
+    
+    Les colonnes catégorielles sont reconstruites sur l'union des catégories de tous les morceaux.
+    
+    Args:
+        morceaux (iterable): Morceaux de DataFrame des crises
+    
+    Returns:
+        pandas.DataFrame: DataFrame unique (vide si aucun morceau)
+    """
+    morceaux = list(morceaux)
+    if not morceaux:
+        return pd.DataFrame(columns=list(SCHEMA_CRISES))
+    
+    df_crises = pd.concat(morceaux, ignore_index=True)
+    for colonne, type_cible in SCHEMA_CRISES.items():
+        if type_cible == 'category' and colonne in df_crises.columns:
+            df_crises[colonne] = df_crises[colonne].astype('category')
     
     return df_crises
 
 
+class EntrepotCrises:
+    """
+    Crises indexées une fois pour toutes à partir du DataFrame chargé
+    
+    Garde, pour chaque type de crise, chaque pays et chaque statut (en_cours),
+    les positions des lignes correspondantes, ainsi qu'un index trié des dates.
+    Les recherches par type/pays/statut se font en O(1) (plus la copie des lignes
+    retournées) et les recherches par plage de dates en O(log n).
+    
+    Attributes:
+        df (pandas.DataFrame): DataFrame complet des crises (partagé, ne pas modifier)
+        version (str): Identifiant de la version du jeu de données (hash du fichier), ou None
+        caches (dict): Résultats dérivés mis en cache pour cette version (index spatiaux, etc.)
+    """
+    
+    def __init__(self, df_crises, version=None):
+        """
+        Construit les index à partir du DataFrame des crises
+        
+        Args:
+            df_crises (pandas.DataFrame): DataFrame des crises
+            version (str): Identifiant de la version du jeu de données (optionnel)
+        """
+        self.df = df_crises
+        self.version = version
+        self.caches = {}
+        
+        # Positions des lignes par valeur (groupby().indices retourne des tableaux d'entiers)
+        self._index_type = self._indexer('type_crise')
+        self._index_pays = self._indexer('pays')
+        self._index_statut = self._indexer('en_cours') if 'en_cours' in df_crises.columns else None
+        
+        # Index des dates: positions triées par date pour les recherches par plage
+        dates = df_crises['date'].to_numpy()
+        self._ordre_dates = np.argsort(dates, kind='stable')
+        self._dates_triees = dates[self._ordre_dates]
+    
+    def _indexer(self, colonne):
+        """Retourne {valeur: positions des lignes} pour une colonne"""
+        if len(self.df) == 0:
+            return {}
+        return self.df.groupby(colonne, observed=True, sort=False).indices
+    
+    def __len__(self):
+        return len(self.df)
+    
+    def _lignes(self, positions):
+        """Retourne les lignes du DataFrame situées aux positions données"""
+        return self.df.iloc[positions]
+    
+    def positions_type(self, type_crise):
+        """Positions des crises d'un type donné"""
+        return self._index_type.get(type_crise, np.empty(0, dtype=np.intp))
+    
+    def positions_pays(self, pays):
+        """Positions des crises d'un pays donné"""
+        return self._index_pays.get(pays, np.empty(0, dtype=np.intp))
+    
+    def positions_statut(self, en_cours=True):
+        """Positions des crises actuelles (en_cours=True) ou passées (en_cours=False)"""
+        if self._index_statut is None:
+            # Comme charger_crises: sans colonne en_cours, une crise récente est considérée actuelle
+            date_limite = np.datetime64(datetime.now() - pd.Timedelta(days=365))
+            recentes = self.df['date'].to_numpy() >= date_limite
+            return np.flatnonzero(recentes == en_cours)
+        return self._index_statut.get(bool(en_cours), np.empty(0, dtype=np.intp))
+    
+    def positions_dates(self, date_min=None, date_max=None):
+        """Positions des crises dont la date est comprise entre date_min et date_max (incluses)"""
+        debut = 0
+        fin = len(self._dates_triees)
+        if date_min is not None:
+            debut = np.searchsorted(self._dates_triees, pd.to_datetime(date_min).to_datetime64(), side='left')
+        if date_max is not None:
+            fin = np.searchsorted(self._dates_triees, pd.to_datetime(date_max).to_datetime64(), side='right')
+        return np.sort(self._ordre_dates[debut:fin])
+    
+    def par_type(self, type_crise):
+        """
+        Retourne les crises d'un type donné
+        
+        Args:
+            type_crise (str): Type de crise
+        
+        Returns:
+            pandas.DataFrame: Crises de ce type
+        """
+        return self._lignes(self.positions_type(type_crise))
+    
+    def par_pays(self, pays):
+        """
+        Retourne les crises d'un pays donné
+        
+        Args:
+            pays (str): Nom du pays
+        
+        Returns:
+            pandas.DataFrame: Crises de ce pays
+        """
+        return self._lignes(self.positions_pays(pays))
+    
+    def par_statut(self, en_cours=True):
+        """
+        Retourne les crises actuelles ou passées
+        
+        Args:
+            en_cours (bool): True pour les crises actuelles, False pour les passées
+        
+        Returns:
+            pandas.DataFrame: Crises ayant ce statut
+        """
+        return self._lignes(self.positions_statut(en_cours))
+    
+    def entre_dates(self, date_min=None, date_max=None):
+        """
+        Retourne les crises survenues entre deux dates (incluses)
+        
+        Args:
+            date_min (str ou datetime): Date minimale (None = pas de borne)
+            date_max (str ou datetime): Date maximale (None = pas de borne)
+        
+        Returns:
+            pandas.DataFrame: Crises de la période, dans l'ordre du fichier
+        """
+        return self._lignes(self.positions_dates(date_min, date_max))
+    
+    def filtrer(self, type_crise=None, pays=None, en_cours=None, date_min=None, date_max=None):
+        """
+        Combine plusieurs critères en intersectant les index correspondants
+        
+        Args:
+            type_crise (str): Type de crise (optionnel)
+            pays (str): Pays (optionnel)
+            en_cours (bool): Statut (optionnel)
+            date_min (str ou datetime): Date minimale (optionnel)
+            date_max (str ou datetime): Date maximale (optionnel)
+        
+        Returns:
+            pandas.DataFrame: Crises respectant tous les critères
+        """
+        positions = None
+        criteres = []
+        if type_crise is not None:
+            criteres.append(self.positions_type(type_crise))
+        if pays is not None:
+            criteres.append(self.positions_pays(pays))
+        if en_cours is not None:
+            criteres.append(self.positions_statut(en_cours))
+        if date_min is not None or date_max is not None:
+            criteres.append(self.positions_dates(date_min, date_max))
+        
+        # Commence par l'index le plus sélectif pour limiter le coût des intersections
+        for positions_critere in sorted(criteres, key=len):
+            if positions is None:
+                positions = positions_critere
+            else:
+                positions = np.intersect1d(positions, positions_critere, assume_unique=True)
+        
+        if positions is None:
+            return self.df
+        return self._lignes(positions)
+    
+    def compter_par_type(self):
+        """
+        Retourne le nombre de crises par type (sans parcourir le DataFrame)
+        
+        Returns:
+            dict: {type_crise: nombre de crises}
+        """
+        return {type_crise: len(positions) for type_crise, positions in self._index_type.items()}
+
+
+def obtenir_entrepot_crises(chemin_fichier=None):
+    """
+    Retourne l'entrepôt indexé des crises du fichier, construit une seule fois
+    par version du fichier (reconstruit uniquement si le fichier change)
+    
+    Args:
+        chemin_fichier (str): Chemin vers le fichier CSV. Si None, utilise le fichier par défaut.
+    
+    Returns:
+        EntrepotCrises: Entrepôt indexé des crises
+    """
+    if chemin_fichier is None:
+        dossier_projet = Path(__file__).parent.parent
+        chemin_fichier = dossier_projet / "data" / "Base_Crises_TresTres_Enrichie_CGenial.csv"
+    
+    df_crises, version = _charger_crises_versionnees(chemin_fichier)
+    cle = str(Path(chemin_fichier).resolve())
+    
+    with _verrou_cache:
+        entrepot = _cache_entrepots.get(cle)
+        if entrepot is None or entrepot.version != version:
+            entrepot = EntrepotCrises(df_crises, version=version)
+            _cache_entrepots[cle] = entrepot
+    
+    return entrepot
+
+
 def charger_besoins(chemin_fichier=None):
     """
     Charge les besoins en ressources par type de crise depuis un fichier CSV
     
+    Comme pour charger_crises, le fichier est mis en cache et n'est relu que s'il change.
+    
     Args:
         chemin_fichier (str): Chemin vers le fichier CSV. Si None, utilise le fichier par défaut.
     
@@ -81,15 +750,309 @@ def charger_besoins(chemin_fichier=None):
     if not os.path.exists(chemin_fichier):
         raise FileNotFoundError(f"Le fichier {chemin_fichier} n'existe pas.")
     
-    # Charge le fichier CSV
-    df_besoins = pd.read_csv(chemin_fichier, encoding='utf-8')
+    # Charge le fichier CSV (ou le récupère depuis le cache)
+    df_cache, version, recharge = _charger_avec_cache(
+        chemin_fichier, lambda chemin, empreinte: pd.read_csv(chemin, encoding='utf-8')
+    )
+    df_besoins = df_cache.copy()
     
     # Affiche un message de confirmation
-    print(f"✓ Besoins chargés pour {len(df_besoins)} types de crises depuis {chemin_fichier}")
+    if recharge:
+        print(f"✓ Besoins chargés pour {len(df_besoins)} types de crises depuis {chemin_fichier}")
     
     return df_besoins
 
 
+def appliquer_schema_crises(df_crises):
+    """
+    Valide le DataFrame des crises et le convertit vers le schéma compact SCHEMA_CRISES
+    
+    - type_crise et pays deviennent des catégories
+    - latitude, longitude, intensité et accessibilité passent en float32
+    - population_touchee utilise le plus petit entier signé suffisant
+    
+    Args:
+        df_crises (pandas.DataFrame): DataFrame des crises (tel que lu depuis le CSV)
+    
+    Returns:
+        pandas.DataFrame: Nouveau DataFrame respectant le schéma
+    
+    Raises:
+        ValueError: Si une colonne obligatoire manque ou si des valeurs sont invalides
+    """
+    colonnes_manquantes = [col for col in SCHEMA_CRISES if col not in df_crises.columns]
+    if colonnes_manquantes:
+        raise ValueError(f"Colonnes obligatoires manquantes dans les crises: {colonnes_manquantes}")
+    
+    # Vérifie les valeurs manquantes et les bornes des colonnes numériques
+    for colonne, (borne_min, borne_max) in BORNES_CRISES.items():
+        valeurs = pd.to_numeric(df_crises[colonne], errors='coerce')
+        nb_manquants = int(valeurs.isna().sum())
+        if nb_manquants > 0:
+            raise ValueError(f"{nb_manquants} valeur(s) manquante(s) ou non numérique(s) dans '{colonne}'")
+        hors_bornes = pd.Series(False, index=valeurs.index)
+        if borne_min is not None:
+            hors_bornes |= valeurs < borne_min
+        if borne_max is not None:
+            hors_bornes |= valeurs > borne_max
+        if hors_bornes.any():
+            raise ValueError(
+                f"{int(hors_bornes.sum())} valeur(s) de '{colonne}' hors de [{borne_min}, {borne_max}]"
+            )
+    
+    if df_crises['date'].isna().any():
+        raise ValueError(f"{int(df_crises['date'].isna().sum())} date(s) de crise manquante(s)")
+    
+    # Convertit chaque colonne vers son type cible
+    schema = dict(SCHEMA_CRISES)
+    schema.update({col: type_cible for col, type_cible in SCHEMA_CRISES_OPTIONNEL.items()
+                   if col in df_crises.columns})
+    
+    df_type = df_crises.copy()
+    for colonne, type_cible in schema.items():
+        if type_cible == 'datetime':
+            if not pd.api.types.is_datetime64_any_dtype(df_type[colonne]):
+                df_type[colonne] = pd.to_datetime(df_type[colonne], errors='coerce')
+        elif type_cible == 'entier':
+            valeurs = df_type[colonne].to_numpy()
+            minimum, maximum = valeurs.min(initial=0), valeurs.max(initial=0)
+            type_entier = next(type_entier for type_entier in (np.int8, np.int16, np.int32, np.int64)
+                               if np.iinfo(type_entier).min <= minimum and maximum <= np.iinfo(type_entier).max)
+            df_type[colonne] = valeurs.astype(type_entier)
+        elif type_cible == 'str':
+            # Textes quasi uniques: une catégorie n'apporterait rien, on garde le type texte
+            continue
+        else:
+            df_type[colonne] = df_type[colonne].astype(type_cible)
+    
+    return df_type
+
+
+def elargir_float32(valeurs):
+    """
+    Convertit des valeurs float32 en float64 en conservant leur écriture décimale
+    (7.3 en float32 redonne 7.3 et non 7.300000190734863)
+    
+    Jusqu'à neuf arrondis successifs: réservé à l'affichage, aux exports (JSON, Excel) et aux
+    colonnes des scores d'urgence (valeurs_float64). Les autres calculs utilisent une simple
+    conversion (convertir_colonnes_float64).
+    
+    Args:
+        valeurs (array-like): Valeurs en float32
+    
+    Returns:
+        numpy.ndarray: Valeurs en float64
+    """
+    valeurs = np.asarray(valeurs, dtype=np.float32)
+    resultat = valeurs.astype(np.float64)
+    a_traiter = np.isfinite(valeurs)
+    
+    # Cherche, pour chaque valeur, le plus petit nombre de décimales qui redonne le même float32
+    for decimales in range(9):
+        if not a_traiter.any():
+            break
+        indices = np.flatnonzero(a_traiter)
+        arrondi = np.round(resultat[indices], decimales)
+        exact = arrondi.astype(np.float32) == valeurs[indices]
+        resultat[indices[exact]] = arrondi[exact]
+        a_traiter[indices[exact]] = False
+    
+    return resultat
+
+
+def elargir_colonnes_float32(df):
+    """
+    Retourne une copie du DataFrame où les colonnes float32 sont converties en float64
+    en conservant leur écriture décimale (pour l'affichage et les exports JSON ou Excel)
+    
+    Args:
+        df (pandas.DataFrame): DataFrame à convertir
+    
+    Returns:
+        pandas.DataFrame: DataFrame avec des colonnes float64
+    """
+    colonnes_float32 = [col for col in df.columns if df[col].dtype == np.float32]
+    if not colonnes_float32:
+        return df
+    
+    df_large = df.copy()
+    for colonne in colonnes_float32:
+        df_large[colonne] = elargir_float32(df_large[colonne].to_numpy())
+    return df_large
+
+
+def valeurs_float64(valeurs):
+    """
+    Retourne des valeurs en float64 pour un calcul de score ou de besoins: des valeurs float32
+    retrouvent leur écriture décimale (0.4 et non 0.4000000059604645), pour que les scores et
+    les besoins soient exactement ceux calculés à partir du fichier CSV
+    
+    Args:
+        valeurs (pandas.Series ou array-like): Valeurs à convertir
+    
+    Returns:
+        numpy.ndarray: Valeurs en float64
+    """
+    valeurs = valeurs.to_numpy() if isinstance(valeurs, pd.Series) else np.asarray(valeurs)
+    if valeurs.dtype == np.float32:
+        return elargir_float32(valeurs)
+    return valeurs.astype(np.float64)
+
+
+def convertir_colonnes_float64(df):
+    """
+    Retourne le DataFrame avec ses colonnes float32 converties en float64 par simple
+    conversion (sans arrondi décimal), pour les calculs en double précision
+    
+    Args:
+        df (pandas.DataFrame): DataFrame à convertir
+    
+    Returns:
+        pandas.DataFrame: DataFrame avec des colonnes float64
+    """
+    colonnes_float32 = [col for col in df.columns if df[col].dtype == np.float32]
+    if not colonnes_float32:
+        return df
+    return df.astype({colonne: np.float64 for colonne in colonnes_float32})
+
+
+def rapport_memoire_crises(df_crises, afficher=True):
+    """
+    Calcule l'occupation mémoire de chaque colonne du DataFrame des crises
+    
+    Args:
+        df_crises (pandas.DataFrame): DataFrame des crises
+        afficher (bool): Si True, affiche le rapport dans la console
+    
+    Returns:
+        pandas.DataFrame: Type et nombre d'octets par colonne (ligne 'TOTAL' incluse)
+    """
+    octets = df_crises.memory_usage(deep=True, index=False)
+    rapport = pd.DataFrame({
+        'type': [str(df_crises[col].dtype) for col in octets.index],
+        'octets': octets.values
+    }, index=octets.index)
+    rapport.loc['TOTAL'] = ['', int(octets.sum())]
+    
+    if afficher:
+        print("\n" + "="*60)
+        print("OCCUPATION MÉMOIRE DES CRISES")
+        print("="*60)
+        for colonne, ligne in rapport.iterrows():
+            print(f"  {colonne:<22} {ligne['type']:<16} {ligne['octets'] / 1024:>10.1f} Ko")
+        print("="*60 + "\n")
+    
+    return rapport
+
+
+def _lire_csv_seismes(chemin_fichier):
+    """
+    Lit le fichier CSV des séismes (séparateur ';') et construit une colonne date
+    
+    Args:
+        chemin_fichier (str): Chemin vers le fichier CSV
+    
+    Returns:
+        pandas.DataFrame: DataFrame complet des séismes
+    """
+    df_seismes = pd.read_csv(chemin_fichier, sep=';', encoding='utf-8', on_bad_lines='skip')
+    
+    # Construit la date à partir des colonnes Year/Month/Day
+    df_seismes['date'] = pd.to_datetime(
+        pd.DataFrame({'year': df_seismes['Year'], 'month': df_seismes['Month'], 'day': df_seismes['Day']}),
+        errors='coerce'
+    )
+    
+    return df_seismes
+
+
+def charger_seismes(chemin_fichier=None):
+    """
+    Charge le catalogue des séismes depuis un fichier CSV
+    
+    Comme pour charger_crises, le fichier passe par le snapshot binaire et le cache.
+    
+    Args:
+        chemin_fichier (str): Chemin vers le fichier CSV. Si None, utilise le fichier par défaut.
+    
+    Returns:
+        pandas.DataFrame: DataFrame contenant les séismes
+    """
+    if chemin_fichier is None:
+        dossier_projet = Path(__file__).parent.parent
+        chemin_fichier = dossier_projet / "data" / "seismes1950-2026.csv"
+    
+    if not os.path.exists(chemin_fichier):
+        raise FileNotFoundError(f"Le fichier {chemin_fichier} n'existe pas.")
+    
+    df_cache, version, recharge = _charger_avec_cache(
+        chemin_fichier, lambda chemin, empreinte: _charger_avec_snapshot(chemin, _lire_csv_seismes, empreinte)
+    )
+    df_seismes = df_cache.copy()
+    
+    if recharge:
+        print(f"✓ {len(df_seismes)} séismes chargés depuis {chemin_fichier}")
+    
+    return df_seismes
+
+
+def construire_matrice_besoins(df_besoins):
+    """
+    Transforme le tableau des besoins en une matrice type de crise × ressource
+    
+    Args:
+        df_besoins (pandas.DataFrame): DataFrame des besoins par type
+    
+    Returns:
+        tuple: (types, ressources, matrice)
+               - types (pandas.Index): types de crise (une ligne de la matrice par type)
+               - ressources (list): noms des ressources (une colonne par ressource)
+               - matrice (numpy.ndarray): besoins de base, dimensions (nb_types, nb_ressources)
+    """
+    ressources = [col for col in df_besoins.columns if col != 'type_crise']
+    
+    # Comme calculer_besoins_crise: seule la première ligne d'un type est utilisée
+    df_unique = df_besoins.drop_duplicates('type_crise', keep='first')
+    types = pd.Index(df_unique['type_crise'].astype(str))
+    matrice = df_unique[ressources].to_numpy(dtype=np.float64)
+    
+    return types, ressources, matrice
+
+
+def calculer_besoins_lot(types_crise, facteurs, df_besoins):
+    """
+    Calcule en une seule opération les besoins de N crises
+    
+    Équivalent vectorisé de calculer_besoins_crise: besoin = int(besoin_base × facteur),
+    les types absents du tableau des besoins donnant des besoins nuls.
+    
+    Args:
+        types_crise (array-like): Type de chaque crise (N valeurs)
+        facteurs (array-like): Facteur d'ajustement de chaque crise (N valeurs),
+                               par ex. intensité / 5 ou score d'urgence normalisé
+        df_besoins (pandas.DataFrame): DataFrame des besoins par type
+    
+    Returns:
+        tuple: (besoins, ressources)
+               - besoins (numpy.ndarray): entiers de dimensions (N, nb_ressources)
+               - ressources (list): noms des ressources (ordre des colonnes)
+    """
+    types, ressources, matrice = construire_matrice_besoins(df_besoins)
+    
+    # Passe par les codes catégoriels: la correspondance texte -> ligne n'est faite qu'une fois par type
+    categories = pd.Categorical(types_crise)
+    lignes_categories = types.get_indexer(categories.categories.astype(str))
+    codes = categories.codes
+    lignes = np.where(codes >= 0, lignes_categories[codes], -1) if len(lignes_categories) else np.full(len(codes), -1)
+    
+    # Ajoute une ligne de zéros: l'indice -1 (type inconnu) la sélectionne
+    matrice_etendue = np.vstack([matrice, np.zeros((1, len(ressources)))])
+    facteurs = valeurs_float64(facteurs)
+    besoins = np.trunc(matrice_etendue[lignes] * facteurs[:, None]).astype(np.int64)
+    
+    return besoins, ressources
+
+
 def calculer_besoins_crise(crise, df_besoins):
     """
     Calcule les besoins en ressources pour une crise spécifique
@@ -149,10 +1112,11 @@ def afficher_statistiques_crises(df_crises):
         print(f"Nombre de crises actuelles: {nb_actuelles}")
         print(f"Nombre de crises passées: {len(df_crises) - nb_actuelles}")
     
+    # Les catégories absentes (effectif nul) sont écartées des répartitions
     print(f"\nRépartition par type de crise:")
-    print(df_crises['type_crise'].value_counts())
+    print(df_crises['type_crise'].value_counts().loc[lambda effectifs: effectifs > 0])
     print(f"\nRépartition par pays:")
-    print(df_crises['pays'].value_counts().head(10))
+    print(df_crises['pays'].value_counts().loc[lambda effectifs: effectifs > 0].head(10))
     print(f"\nIntensité moyenne: {df_crises['intensite'].mean():.2f}")
     print(f"Intensité minimale: {df_crises['intensite'].min():.2f}")
     print(f"Intensité maximale: {df_crises['intensite'].max():.2f}")
@@ -166,6 +1130,7 @@ if __name__ == "__main__":
     crises = charger_crises()
     besoins = charger_besoins()
     afficher_statistiques_crises(crises)
+    rapport_memoire_crises(crises)
     
     print("\nCrises actuelles uniquement:")
     crises_actuelles = charger_crises(seulement_actuelles=True)
@@ -81,7 +81,8 @@ def lancer_allocation():
     try:
         from src.chargement_donnees import charger_crises, charger_besoins
         from src.allocation_gloutonne import allouer_ressources_glouton, afficher_resume_allocation
-        from src.allocation_gloutonne import exporter_allocation_csv, exporter_allocation_excel
+        from src.allocation_gloutonne import (exporter_allocation_csv, exporter_allocation_excel,
+                                              exporter_allocation_parquet)
         
         # Charge les données
         print("\nChargement des données...")
@@ -136,9 +137,10 @@ def lancer_allocation():
         print("  1. CSV")
         print("  2. Excel")
         print("  3. Les deux")
-        print("  4. Non")
+        print("  4. Parquet")
+        print("  5. Non")
         
-        choix_export = input("Votre choix (1-4): ").strip()
+        choix_export = input("Votre choix (1-5): ").strip()
         
         if choix_export in ['1', '3']:
             exporter_allocation_csv(allocation)
@@ -148,6 +150,12 @@ def lancer_allocation():
             except Exception as e:
                 print(f"⚠ Erreur lors de l'export Excel: {e}")
                 print("   (Assurez-vous que openpyxl est installé: pip install openpyxl)")
+        if choix_export == '4':
+            try:
+                exporter_allocation_parquet(allocation)
+            except Exception as e:
+                print(f"⚠ Erreur lors de l'export Parquet: {e}")
+                print("   (Assurez-vous que pyarrow est installé: pip install pyarrow)")
         
     except Exception as e:
         print(f"❌ Erreur lors de l'allocation: {e}")
@@ -440,7 +448,7 @@ def afficher_statistiques():
         besoins = charger_besoins()
         
         print("\n[1] Analyse par type de crise:")
-        stats_type = crises.groupby('type_crise').agg({
+        stats_type = crises.groupby('type_crise', observed=True).agg({
             'intensite': ['mean', 'min', 'max'],
             'population_touchee': ['sum', 'mean'],
             'accessibilite': 'mean'
@@ -469,7 +477,7 @@ def afficher_statistiques():
             print(f"  Crises passées: {len(crises_passees)}")
             if len(crises_actuelles) > 0:
                 print("\n  Répartition des crises actuelles par type:")
-                print(crises_actuelles['type_crise'].value_counts())
+                print(crises_actuelles['type_crise'].value_counts().loc[lambda effectifs: effectifs > 0])
         
     except Exception as e:
         print(f"❌ Erreur lors de l'analyse: {e}")
@@ -12,12 +12,41 @@ import numpy as np
 from sklearn.model_selection import train_test_split
 from sklearn.svm import SVC, SVR
 from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
+from sklearn.neighbors import BallTree
 from sklearn.preprocessing import StandardScaler, LabelEncoder
 from sklearn.metrics import accuracy_score, classification_report, mean_squared_error, r2_score
 from pathlib import Path
+import hashlib
 import warnings
+
+from src.chargement_donnees import concatener_morceaux_crises, EntrepotCrises
 warnings.filterwarnings('ignore')
 
+# Rayon moyen de la Terre en kilomètres (formule de Haversine)
+RAYON_TERRE_KM = 6371.0
+
+# Seuils de distance (km) des crises proches comptées par calculer_probabilite_evenement
+SEUILS_DISTANCE_KM = np.array([100.0, 500.0, 1000.0])
+
+# Nombre maximal de distances (points × crises) calculées en un bloc par calculer_probabilites_points
+TAILLE_BLOC_DISTANCES = 2_000_000
+
+# Coûts unitaires approximatifs des ressources (en euros/dollars)
+COUTS_UNITAIRES = {
+    'eau_potable_litres': 0.001,  # 1€ pour 1000 litres
+    'tentes': 200,  # 200€ par tente
+    'medicaments_doses': 5,  # 5€ par dose
+    'hopitaux_campagne': 50000,  # 50000€ par hôpital
+    'generateurs': 3000,  # 3000€ par générateur
+    'vehicules_urgence': 25000,  # 25000€ par véhicule
+    'personnel_medical': 5000,  # 5000€ par personne (salaire/mois)
+    'denrees_alimentaires_kg': 2  # 2€ par kg
+}
+
+# Matrices de distances déjà calculées: clé (empreinte des coordonnées) -> matrice
+_cache_distances = {}
+TAILLE_CACHE_DISTANCES = 32
+
 
 def preparer_donnees_prediction(df_crises):
     """
@@ -458,28 +487,20 @@ def calculer_besoins_ressources(type_crise, intensite, population, df_besoins):
     return besoins_ajustes
 
 
-def calculer_couts_pourcentages(besoins, budget_total=100000000):
+def calculer_couts_pourcentages(besoins, budget_total=100000000, couts_unitaires=None):
     """
     Calcule les coûts et pourcentages du budget pour chaque ressource
     
     Args:
         besoins (dict): Dictionnaire des besoins en ressources
         budget_total (float): Budget total disponible (par défaut 100 millions)
+        couts_unitaires (dict): Coût unitaire de chaque ressource (défaut: COUTS_UNITAIRES)
     
     Returns:
         dict: Dictionnaire avec les coûts et pourcentages
     """
-    # Coûts unitaires approximatifs (en euros/dollars)
-    couts_unitaires = {
-        'eau_potable_litres': 0.001,  # 1€ pour 1000 litres
-        'tentes': 200,  # 200€ par tente
-        'medicaments_doses': 5,  # 5€ par dose
-        'hopitaux_campagne': 50000,  # 50000€ par hôpital
-        'generateurs': 3000,  # 3000€ par générateur
-        'vehicules_urgence': 25000,  # 25000€ par véhicule
-        'personnel_medical': 5000,  # 5000€ par personne (salaire/mois)
-        'denrees_alimentaires_kg': 2  # 2€ par kg
-    }
+    if couts_unitaires is None:
+        couts_unitaires = COUTS_UNITAIRES
     
     resultats = {}
     cout_total = 0
@@ -537,6 +558,313 @@ def calculer_distance_geographique(lat1, lon1, lat2, lon2):
     return distance
 
 
+def calculer_matrice_distances(lat_origines, lon_origines, lat_destinations, lon_destinations):
+    """
+    Calcule toutes les distances entre des origines et des destinations en une seule
+    opération (version vectorisée de calculer_distance_geographique)
+    
+    Args:
+        lat_origines, lon_origines (array-like): Coordonnées des M origines (ex: dépôts)
+        lat_destinations, lon_destinations (array-like): Coordonnées des N destinations (ex: crises)
+    
+    Returns:
+        numpy.ndarray: Distances en kilomètres, dimensions (M, N)
+    """
+    return calculer_distances_paires(
+        np.asarray(lat_origines, dtype=np.float64)[:, None], np.asarray(lon_origines, dtype=np.float64)[:, None],
+        np.asarray(lat_destinations, dtype=np.float64)[None, :], np.asarray(lon_destinations, dtype=np.float64)[None, :]
+    )
+
+
+def calculer_distances_paires(lat1, lon1, lat2, lon2):
+    """
+    Calcule élément par élément la distance entre les points (lat1, lon1) et (lat2, lon2)
+    (tableaux de même forme ou compatibles par broadcasting)
+    
+    Returns:
+        numpy.ndarray: Distances en kilomètres
+    """
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(valeurs, dtype=np.float64)) for valeurs in (lat1, lon1, lat2, lon2))
+    
+    # Formule de Haversine
+    a = np.sin((lat2 - lat1) / 2)**2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2)**2
+    c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+    
+    return RAYON_TERRE_KM * c
+
+
+def obtenir_matrice_distances(lat_origines, lon_origines, lat_destinations, lon_destinations):
+    """
+    Comme calculer_matrice_distances, mais réutilise la matrice d'un appel précédent
+    avec les mêmes coordonnées (cache mémoire limité à TAILLE_CACHE_DISTANCES matrices)
+    
+    Returns:
+        numpy.ndarray: Distances en kilomètres, dimensions (M, N), en lecture seule
+    """
+    coordonnees = [np.ascontiguousarray(valeurs, dtype=np.float64)
+                   for valeurs in (lat_origines, lon_origines, lat_destinations, lon_destinations)]
+    empreinte = hashlib.sha1()
+    for valeurs in coordonnees:
+        empreinte.update(len(valeurs).to_bytes(8, 'little'))
+        empreinte.update(valeurs.tobytes())
+    cle = empreinte.hexdigest()
+    
+    matrice = _cache_distances.get(cle)
+    if matrice is None:
+        matrice = calculer_matrice_distances(*coordonnees)
+        matrice.flags.writeable = False
+        if len(_cache_distances) >= TAILLE_CACHE_DISTANCES:
+            # Retire la matrice la plus ancienne
+            del _cache_distances[next(iter(_cache_distances))]
+        _cache_distances[cle] = matrice
+    return matrice
+
+
+class IndexSpatialCrises:
+    """
+    Index spatial sphérique (BallTree haversine de scikit-learn) des crises d'un entrepôt,
+    construit une fois par type de crise et par version du jeu de données (voir obtenir_index_spatial)
+    
+    Les k plus proches voisins et les crises dans un rayon sont trouvés en O(log n) plus le nombre
+    de crises retournées; les distances retournées sont recalculées avec calculer_matrice_distances
+    pour être identiques au calcul direct. Les intensités triées permettent de compter les crises
+    d'intensité similaire par recherche dichotomique.
+    
+    Attributes:
+        positions (numpy.ndarray): Position dans l'entrepôt (lignes de entrepot.df) de chaque crise indexée
+        latitudes, longitudes (numpy.ndarray): Coordonnées en degrés des crises indexées
+        intensites_triees (numpy.ndarray): Intensités des crises indexées, triées
+    """
+    
+    def __init__(self, df_crises, positions):
+        """
+        Args:
+            df_crises (pandas.DataFrame): Crises (colonnes latitude, longitude et intensite)
+            positions (numpy.ndarray): Positions des crises à indexer dans df_crises
+        """
+        lignes = df_crises[['latitude', 'longitude', 'intensite']].iloc[positions]
+        self.positions = np.asarray(positions)
+        self.latitudes = lignes['latitude'].to_numpy(dtype=np.float64)
+        self.longitudes = lignes['longitude'].to_numpy(dtype=np.float64)
+        self.intensites_triees = np.sort(lignes['intensite'].to_numpy(dtype=np.float64))
+        
+        # Le BallTree haversine attend (latitude, longitude) en radians
+        self._arbre = BallTree(np.radians(np.column_stack([self.latitudes, self.longitudes])), metric='haversine') \
+            if len(lignes) else None
+    
+    def __len__(self):
+        return len(self.positions)
+    
+    def _points(self, lat, lon):
+        """Points de requête (N, 2) en radians"""
+        return np.radians(np.column_stack([np.atleast_1d(lat).astype(np.float64), np.atleast_1d(lon).astype(np.float64)]))
+    
+    def plus_proches(self, lat, lon, k=1):
+        """
+        Retourne les k crises les plus proches d'un point
+        
+        Args:
+            lat, lon (float): Coordonnées du point
+            k (int): Nombre de crises
+        
+        Returns:
+            tuple: (distances en km, indices dans l'index), triés par distance croissante
+        """
+        k = min(int(k), len(self))
+        if k <= 0:
+            return np.zeros(0), np.zeros(0, dtype=np.intp)
+        _, indices = self._arbre.query(self._points(lat, lon), k=k)
+        indices = indices[0]
+        distances = calculer_matrice_distances([lat], [lon], self.latitudes[indices], self.longitudes[indices])[0]
+        ordre = np.argsort(distances, kind='stable')
+        return distances[ordre], indices[ordre]
+    
+    def dans_rayon(self, lat, lon, rayon_km):
+        """
+        Retourne les crises situées à moins de rayon_km d'un point
+        
+        Args:
+            lat, lon (float): Coordonnées du point
+            rayon_km (float): Rayon en kilomètres
+        
+        Returns:
+            tuple: (distances en km, indices dans l'index), triés par distance croissante
+        """
+        if len(self) == 0:
+            return np.zeros(0), np.zeros(0, dtype=np.intp)
+        # Marge sur le rayon pour ne manquer aucune crise malgré les arrondis, puis filtre exact
+        indices = self._arbre.query_radius(self._points(lat, lon), r=rayon_km * (1 + 1e-9) / RAYON_TERRE_KM)[0]
+        distances = calculer_matrice_distances([lat], [lon], self.latitudes[indices], self.longitudes[indices])[0]
+        dedans = distances < rayon_km
+        ordre = np.argsort(distances[dedans], kind='stable')
+        return distances[dedans][ordre], indices[dedans][ordre]
+    
+    def distances_dans_rayon(self, lats, lons, rayon_km):
+        """
+        Retourne, pour plusieurs points à la fois, les distances aux crises situées à au plus rayon_km
+        
+        Args:
+            lats, lons (array-like): Coordonnées des N points
+            rayon_km (float): Rayon en kilomètres
+        
+        Returns:
+            tuple: (numéro du point de chaque paire, distances en km), paires groupées par point
+        """
+        lats = np.atleast_1d(np.asarray(lats, dtype=np.float64))
+        lons = np.atleast_1d(np.asarray(lons, dtype=np.float64))
+        if len(self) == 0 or len(lats) == 0:
+            return np.zeros(0, dtype=np.intp), np.zeros(0)
+        voisins = self._arbre.query_radius(self._points(lats, lons), r=rayon_km * (1 + 1e-9) / RAYON_TERRE_KM)
+        numeros = np.repeat(np.arange(len(lats)), [len(indices) for indices in voisins])
+        indices = np.concatenate(voisins)
+        distances = calculer_distances_paires(lats[numeros], lons[numeros], self.latitudes[indices], self.longitudes[indices])
+        dedans = distances <= rayon_km
+        return numeros[dedans], distances[dedans]
+    
+    def compter_dans_rayons(self, lats, lons, rayons_km):
+        """
+        Compte, pour plusieurs points à la fois, les crises situées à au plus chaque rayon
+        
+        Args:
+            lats, lons (array-like): Coordonnées des N points
+            rayons_km (array-like): Rayons en kilomètres (R)
+        
+        Returns:
+            numpy.ndarray: Nombres de crises, dimensions (N, R)
+        """
+        points = self._points(lats, lons)
+        comptes = np.zeros((len(points), len(rayons_km)), dtype=np.int64)
+        if len(self) and len(points):
+            for j, rayon in enumerate(rayons_km):
+                comptes[:, j] = self._arbre.query_radius(points, r=rayon / RAYON_TERRE_KM, count_only=True)
+        return comptes
+    
+    def compter_intensites_proches(self, intensite, ecart=2.0):
+        """
+        Compte les crises dont l'intensité est à au plus ecart de intensite (|i - intensite| <= ecart)
+        
+        Returns:
+            int: Nombre de crises d'intensité similaire
+        """
+        valeurs = self.intensites_triees
+        # Les valeurs nettement à l'intérieur de l'intervalle sont comptées par dichotomie,
+        # celles à la limite (arrondis) sont vérifiées avec la comparaison exacte
+        marge = 1e-9 * max(1.0, abs(intensite) + ecart)
+        debut, interieur_debut, interieur_fin, fin = np.searchsorted(
+            valeurs, [intensite - ecart - marge, intensite - ecart + marge, intensite + ecart - marge, intensite + ecart + marge]
+        )
+        interieur_fin = max(interieur_fin, interieur_debut)
+        bords = np.concatenate([valeurs[debut:interieur_debut], valeurs[interieur_fin:fin]])
+        return int(interieur_fin - interieur_debut) + int(np.count_nonzero(np.abs(bords - intensite) <= ecart))
+
+
+def obtenir_index_spatial(entrepot, type_crise=None):
+    """
+    Retourne l'index spatial des crises d'un type (toutes les crises si type_crise est None),
+    construit une seule fois puis gardé dans entrepot.caches (donc par version du jeu de données)
+    
+    Args:
+        entrepot (EntrepotCrises): Entrepôt indexé des crises
+        type_crise (str): Type de crise (optionnel)
+    
+    Returns:
+        IndexSpatialCrises: Index spatial
+    """
+    cle = ('index_spatial', type_crise)
+    index = entrepot.caches.get(cle)
+    if index is None:
+        positions = np.arange(len(entrepot)) if type_crise is None else entrepot.positions_type(type_crise)
+        index = entrepot.caches.setdefault(cle, IndexSpatialCrises(entrepot.df, positions))
+    return index
+
+
+def _extraire_crises_type(df_crises, type_crise, intensite):
+    """
+    Extrait les coordonnées des crises historiques d'un type et compte celles d'intensité similaire (±2)
+    
+    Args:
+        df_crises (pandas.DataFrame, EntrepotCrises ou iterable): Crises historiques
+        type_crise (str): Type de crise
+        intensite (float): Intensité de la crise (0-10)
+    
+    Returns:
+        tuple: (nombre total de crises, latitudes, longitudes, nombre de crises d'intensité similaire,
+                index spatial du type ou None si df_crises n'est pas un entrepôt)
+    """
+    if isinstance(df_crises, EntrepotCrises):
+        # Entrepôt indexé: index spatial du type (construit une fois par version des données)
+        index = obtenir_index_spatial(df_crises, type_crise)
+        return (len(df_crises), index.latitudes, index.longitudes,
+                index.compter_intensites_proches(intensite, 2.0), index)
+    
+    # Filtre les crises du même type
+    if isinstance(df_crises, pd.DataFrame):
+        nb_crises_total = len(df_crises)
+        crises_meme_type = df_crises[df_crises['type_crise'] == type_crise].copy()
+    else:
+        # Lecture en flux: compte toutes les crises mais ne garde que celles du type demandé
+        nb_crises_total = 0
+        morceaux_type = []
+        for morceau in df_crises:
+            nb_crises_total += len(morceau)
+            morceaux_type.append(morceau[morceau['type_crise'] == type_crise])
+        crises_meme_type = concatener_morceaux_crises(morceaux_type)
+    
+    # Nombre de crises d'intensité similaire (±2)
+    diff_intensite = np.abs(crises_meme_type['intensite'].to_numpy(dtype=np.float64) - intensite)
+    nb_intensites_proches = int(np.count_nonzero(diff_intensite <= 2.0))
+    
+    return (nb_crises_total,
+            crises_meme_type['latitude'].to_numpy(dtype=np.float64),
+            crises_meme_type['longitude'].to_numpy(dtype=np.float64),
+            nb_intensites_proches, None)
+
+
+def _calculer_probabilites_brutes(distance_min, nb_crises_proches_500, nb_crises_proches_1000,
+                                  frequence_type, facteur_intensite, intensite):
+    """
+    Applique la formule de probabilité à un ou plusieurs points (tableaux numpy)
+    
+    Args:
+        distance_min (numpy.ndarray): Distance à la crise la plus proche (km)
+        nb_crises_proches_500, nb_crises_proches_1000 (numpy.ndarray): Crises à moins de 500 et 1000 km
+        frequence_type (float): Part des crises historiques du type demandé
+        facteur_intensite (float): Facteur d'intensité similaire
+        intensite (float): Intensité de la crise (0-10)
+    
+    Returns:
+        numpy.ndarray: Probabilités (%) entre 1 et 95, non arrondies
+    """
+    # Calcule le facteur de proximité avec une décroissance rapide
+    # Impact maximal pour crises très proches (< 100 km): 1.0
+    # Crises moyennement proches (100-500 km): décroissance linéaire de 1.0 à 0.3
+    # Crises éloignées (500-1000 km): décroissance rapide de 0.3 à 0.0
+    # Au-delà de 1000 km : impact nul
+    facteur_proximite = np.where(
+        distance_min <= 100, 1.0,
+        np.where(distance_min <= 500, 1.0 - ((distance_min - 100) / 400) * 0.7,
+                 np.where(distance_min <= 1000, 0.3 * (1 - (distance_min - 500) / 500), 0.0))
+    )
+    
+    # Bonus si plusieurs crises proches (mais limité)
+    facteur_proximite = np.where(
+        nb_crises_proches_500 >= 3, np.minimum(1.0, facteur_proximite * 1.2),
+        np.where(nb_crises_proches_1000 >= 5, np.minimum(1.0, facteur_proximite * 1.1), facteur_proximite)
+    )
+    
+    # Facteur 4: Intensité demandée (plus intense = moins probable)
+    facteur_intensite_demandee = 1 - (intensite / 10) * 0.3  # Réduit de 0-30%
+    
+    # Calcule la probabilité de base
+    probabilite_base = 50.0  # 50% de base
+    
+    # Ajuste selon les facteurs
+    probabilite = probabilite_base * facteur_proximite * (1 + frequence_type * 2) * facteur_intensite * facteur_intensite_demandee
+    
+    # Limite entre 1% et 95%
+    return np.maximum(1.0, np.minimum(95.0, probabilite))
+
+
 def calculer_probabilite_evenement(pays_lat, pays_lon, type_crise, intensite, df_crises):
     """
     Calcule la probabilité qu'un événement d'un type et d'une intensité donnés
@@ -547,15 +875,17 @@ def calculer_probabilite_evenement(pays_lat, pays_lon, type_crise, intensite, df
         pays_lon (float): Longitude du pays
         type_crise (str): Type de crise
         intensite (float): Intensité de la crise (0-10)
-        df_crises (pandas.DataFrame): DataFrame des crises historiques
+        df_crises (pandas.DataFrame, EntrepotCrises ou iterable): DataFrame des crises historiques,
+            entrepôt indexé, ou morceaux produits par iterer_crises
     
     Returns:
         dict: Dictionnaire avec la probabilité et les détails
     """
-    # Filtre les crises du même type
-    crises_meme_type = df_crises[df_crises['type_crise'] == type_crise].copy()
+    nb_crises_total, latitudes, longitudes, nb_intensites_proches, index = \
+        _extraire_crises_type(df_crises, type_crise, intensite)
+    nb_crises_meme_type = len(latitudes)
     
-    if crises_meme_type.empty:
+    if nb_crises_meme_type == 0:
         # Si aucune crise de ce type dans l'historique, probabilité faible
         return {
             'probabilite': 5.0,
@@ -563,85 +893,41 @@ def calculer_probabilite_evenement(pays_lat, pays_lon, type_crise, intensite, df
             'explication': f'Aucune crise de type {type_crise} dans l historique'
         }
     
-    # Calcule la distance entre le pays et chaque crise historique
-    distances = []
-    intensites_proches = []
-    
-    for idx, crise in crises_meme_type.iterrows():
-        distance = calculer_distance_geographique(
-            pays_lat, pays_lon,
-            crise['latitude'], crise['longitude']
-        )
-        distances.append(distance)
-        
-        # Vérifie si l'intensité est proche
-        diff_intensite = abs(crise['intensite'] - intensite)
-        if diff_intensite <= 2.0:  # Intensité similaire (±2)
-            intensites_proches.append(crise)
+    if index is not None:
+        # Seules les crises à moins du plus grand seuil de distance sont examinées
+        distances, _ = index.dans_rayon(pays_lat, pays_lon, SEUILS_DISTANCE_KM[-1])
+        if len(distances) == 0:
+            distances, _ = index.plus_proches(pays_lat, pays_lon, k=1)
+    else:
+        # Calcule en une opération la distance entre le pays et chaque crise historique du type
+        distances = calculer_matrice_distances([pays_lat], [pays_lon], latitudes, longitudes)[0]
     
     # Facteur 1: Proximité géographique
     # Plus il y a de crises proches, plus la probabilité est élevée
     # Au-delà de 1000 km, l'impact devient négligeable
-    if distances:
-        distance_min = min(distances)
-        distance_moyenne = np.mean(distances)
-        
-        # Calcule le facteur de proximité avec une décroissance rapide
-        # Impact maximal pour crises très proches (< 100 km)
-        # Décroissance rapide entre 100 et 1000 km
-        # Impact nul au-delà de 1000 km
-        
-        if distance_min <= 100:
-            # Crises très proches : impact maximal (1.0)
-            facteur_proximite = 1.0
-        elif distance_min <= 500:
-            # Crises moyennement proches : décroissance linéaire de 1.0 à 0.3
-            facteur_proximite = 1.0 - ((distance_min - 100) / 400) * 0.7
-        elif distance_min <= 1000:
-            # Crises éloignées : décroissance rapide de 0.3 à 0.0
-            facteur_proximite = 0.3 * (1 - (distance_min - 500) / 500)
-        else:
-            # Au-delà de 1000 km : impact nul
-            facteur_proximite = 0.0
-        
-        # Ajuste également selon le nombre de crises proches
-        # Compte les crises à moins de 500 km
-        nb_crises_proches_500 = sum(1 for d in distances if d < 500)
-        nb_crises_proches_1000 = sum(1 for d in distances if d < 1000)
-        
-        # Bonus si plusieurs crises proches (mais limité)
-        if nb_crises_proches_500 >= 3:
-            facteur_proximite = min(1.0, facteur_proximite * 1.2)
-        elif nb_crises_proches_1000 >= 5:
-            facteur_proximite = min(1.0, facteur_proximite * 1.1)
-    else:
-        facteur_proximite = 0.05  # Impact très faible si aucune crise historique
-        distance_min = 10000
-        distance_moyenne = 10000
-        nb_crises_proches_500 = 0
-        nb_crises_proches_1000 = 0
+    distance_min = float(distances.min())
+    
+    # Compte en une passe les crises à moins de 100, 500 et 1000 km
+    # (classe de chaque distance parmi [0, 100[, [100, 500[, [500, 1000[ et au-delà)
+    classes = np.searchsorted(SEUILS_DISTANCE_KM, distances, side='right')
+    nb_crises_proches_100, nb_crises_proches_500, nb_crises_proches_1000 = (
+        int(nb) for nb in np.bincount(classes, minlength=len(SEUILS_DISTANCE_KM) + 1).cumsum()[:len(SEUILS_DISTANCE_KM)]
+    )
     
     # Facteur 2: Fréquence du type de crise
-    frequence_type = len(crises_meme_type) / len(df_crises)
+    frequence_type = nb_crises_meme_type / nb_crises_total
     
     # Facteur 3: Intensité similaire
-    if intensites_proches:
-        facteur_intensite = len(intensites_proches) / len(crises_meme_type)
+    if nb_intensites_proches:
+        facteur_intensite = nb_intensites_proches / nb_crises_meme_type
     else:
         # Si aucune crise d'intensité similaire, réduit la probabilité
         facteur_intensite = 0.3
     
-    # Facteur 4: Intensité demandée (plus intense = moins probable)
-    facteur_intensite_demandee = 1 - (intensite / 10) * 0.3  # Réduit de 0-30%
-    
-    # Calcule la probabilité de base
-    probabilite_base = 50.0  # 50% de base
-    
-    # Ajuste selon les facteurs
-    probabilite = probabilite_base * facteur_proximite * (1 + frequence_type * 2) * facteur_intensite * facteur_intensite_demandee
-    
-    # Limite entre 1% et 95%
-    probabilite = max(1.0, min(95.0, probabilite))
+    probabilite = float(_calculer_probabilites_brutes(
+        np.float64(distance_min), nb_crises_proches_500, nb_crises_proches_1000,
+        frequence_type, facteur_intensite, intensite
+    ))
     
     # Détermine le niveau de probabilité
     if probabilite >= 70:
@@ -656,16 +942,7 @@ def calculer_probabilite_evenement(pays_lat, pays_lon, type_crise, intensite, df
         niveau = 'Très faible'
     
     # Crée l'explication
-    if distances:
-        nb_crises_proches_100 = sum(1 for d in distances if d < 100)
-        nb_crises_proches_500 = sum(1 for d in distances if d < 500)
-        nb_crises_proches_1000 = sum(1 for d in distances if d < 1000)
-    else:
-        nb_crises_proches_100 = 0
-        nb_crises_proches_500 = 0
-        nb_crises_proches_1000 = 0
-    
-    explication = f"{len(crises_meme_type)} crise(s) de type {type_crise} dans l historique"
+    explication = f"{nb_crises_meme_type} crise(s) de type {type_crise} dans l historique"
     if distance_min < 1000:
         if nb_crises_proches_100 > 0:
             explication += f", {nb_crises_proches_100} crise(s) à moins de 100 km"
@@ -675,21 +952,83 @@ def calculer_probabilite_evenement(pays_lat, pays_lon, type_crise, intensite, df
     else:
         explication += f", crise la plus proche à {distance_min:.0f} km (au-delà de 1000 km, impact négligeable)"
     
-    if intensites_proches:
-        explication += f", {len(intensites_proches)} crise(s) d intensite similaire"
+    if nb_intensites_proches:
+        explication += f", {nb_intensites_proches} crise(s) d intensite similaire"
     
     return {
         'probabilite': round(probabilite, 2),
         'niveau': niveau,
         'explication': explication,
         'distance_min': round(distance_min, 0),
-        'nb_crises_historiques': len(crises_meme_type),
-        'nb_crises_proches_100': nb_crises_proches_100 if distances else 0,
-        'nb_crises_proches_500': nb_crises_proches_500 if distances else 0,
-        'nb_crises_proches_1000': nb_crises_proches_1000 if distances else 0
+        'nb_crises_historiques': nb_crises_meme_type,
+        'nb_crises_proches_100': nb_crises_proches_100,
+        'nb_crises_proches_500': nb_crises_proches_500,
+        'nb_crises_proches_1000': nb_crises_proches_1000
     }
 
 
+def calculer_probabilites_points(lats, lons, type_crise, intensite, df_crises, taille_bloc=TAILLE_BLOC_DISTANCES):
+    """
+    Calcule la probabilité d'un événement en de nombreux points à la fois (ex: grille d'une heatmap)
+    
+    Donne les mêmes probabilités que calculer_probabilite_evenement appelée point par point, mais
+    les distances points × crises sont calculées par blocs d'au plus taille_bloc valeurs, ce qui
+    borne la mémoire utilisée.
+    
+    Args:
+        lats, lons (array-like): Coordonnées des points
+        type_crise (str): Type de crise
+        intensite (float): Intensité de la crise (0-10)
+        df_crises (pandas.DataFrame, EntrepotCrises ou iterable): Crises historiques
+        taille_bloc (int): Nombre maximal de distances calculées par bloc
+    
+    Returns:
+        numpy.ndarray: Probabilités (%) arrondies à 2 décimales, une par point
+    """
+    lats = np.asarray(lats, dtype=np.float64)
+    lons = np.asarray(lons, dtype=np.float64)
+    nb_crises_total, latitudes, longitudes, nb_intensites_proches, index = \
+        _extraire_crises_type(df_crises, type_crise, intensite)
+    nb_crises_meme_type = len(latitudes)
+    
+    if nb_crises_meme_type == 0:
+        # Si aucune crise de ce type dans l'historique, probabilité faible
+        return np.full(len(lats), 5.0)
+    
+    # Distance minimale et nombre de crises à moins de 500 et 1000 km, bloc de points par bloc de points
+    distance_min = np.empty(len(lats))
+    nb_crises_proches_500 = np.empty(len(lats), dtype=np.int64)
+    nb_crises_proches_1000 = np.empty(len(lats), dtype=np.int64)
+    taille = max(1, int(taille_bloc) // nb_crises_meme_type)
+    for debut in range(0, len(lats), taille):
+        bloc = slice(debut, debut + taille)
+        if index is not None:
+            # Index spatial: seules les crises à moins de 1000 km sont examinées. Sans crise dans
+            # ce rayon, le facteur de proximité est nul quelle que soit la distance exacte (infinie ici)
+            numeros, distances = index.distances_dans_rayon(lats[bloc], lons[bloc], SEUILS_DISTANCE_KM[-1])
+            nb_points = len(lats[bloc])
+            minimum = np.full(nb_points, np.inf)
+            np.minimum.at(minimum, numeros, distances)
+            distance_min[bloc] = minimum
+            nb_crises_proches_500[bloc] = np.bincount(numeros[distances < SEUILS_DISTANCE_KM[1]], minlength=nb_points)
+            nb_crises_proches_1000[bloc] = np.bincount(numeros[distances < SEUILS_DISTANCE_KM[2]], minlength=nb_points)
+        else:
+            distances = calculer_matrice_distances(lats[bloc], lons[bloc], latitudes, longitudes)
+            distance_min[bloc] = distances.min(axis=1)
+            nb_crises_proches_500[bloc] = np.count_nonzero(distances < SEUILS_DISTANCE_KM[1], axis=1)
+            nb_crises_proches_1000[bloc] = np.count_nonzero(distances < SEUILS_DISTANCE_KM[2], axis=1)
+    
+    frequence_type = nb_crises_meme_type / nb_crises_total
+    facteur_intensite = nb_intensites_proches / nb_crises_meme_type if nb_intensites_proches else 0.3
+    
+    probabilites = _calculer_probabilites_brutes(
+        distance_min, nb_crises_proches_500, nb_crises_proches_1000,
+        frequence_type, facteur_intensite, intensite
+    )
+    # Même arrondi que calculer_probabilite_evenement (round de Python, pas np.round)
+    return np.array([round(probabilite, 2) for probabilite in probabilites.tolist()])
+
+
 if __name__ == "__main__":
     # Test du module
     print("Test du module de prédiction...")
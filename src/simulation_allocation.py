@@ -0,0 +1,488 @@
+"""
+Module de simulation de l'allocation des ressources dans le temps
+Auteur: Projet CGénial 2025
+
+Simulation par périodes (jours, semaines...) au-dessus de l'allocation gloutonne:
+- les crises sont actives entre leur date de début (date) et leur date de fin (date_fin)
+- chaque crise garde son besoin restant d'une période à l'autre (besoin moins ce qu'elle a déjà reçu)
+- le stock est réapprovisionné selon un calendrier et consommé par les allocations
+- la réserve (25% par défaut du stock reçu depuis le début) est libérée selon une politique choisie
+
+Analyse de robustesse Monte Carlo (analyser_robustesse_monte_carlo): les besoins, la population
+et l'intensité des crises sont tirés au hasard autour de leurs valeurs, l'allocation est recalculée
+pour chaque tirage et les tirages sont répartis entre plusieurs processus.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+import numpy as np
+
+from src.chargement_donnees import construire_matrice_besoins, valeurs_float64
+from src.allocation_gloutonne import (RATIO_RESERVE, MODES_ALLOCATION, _selectionner_crises,
+                                      calculer_scores_urgence, calculer_pourcentages_satisfaits)
+
+
+# Politiques de libération de la réserve (paramètre politique_reserve de simuler_allocation_periodes)
+POLITIQUES_RESERVE = ('fixe', 'lineaire', 'si_penurie')
+
+
+def _calculer_ratios_reserve(politique_reserve, nb_periodes, nb_ressources):
+    """
+    Construit le ratio de réserve de chaque période et ressource
+    
+    Returns:
+        numpy.ndarray ou None: Ratios (nb_periodes, nb_ressources), None pour la politique 'si_penurie'
+                               (décidée période par période selon le stock)
+    """
+    if isinstance(politique_reserve, str):
+        if politique_reserve not in POLITIQUES_RESERVE:
+            raise ValueError(f"Politique de réserve inconnue: '{politique_reserve}'. "
+                             f"Politiques disponibles: {list(POLITIQUES_RESERVE)}")
+        if politique_reserve == 'fixe':
+            ratios = np.full(nb_periodes, RATIO_RESERVE)
+        elif politique_reserve == 'lineaire':
+            # La réserve diminue régulièrement jusqu'à être entièrement libérée à la dernière période
+            ratios = RATIO_RESERVE * np.linspace(1.0, 0.0, nb_periodes) if nb_periodes > 1 else np.zeros(nb_periodes)
+        else:
+            return None
+    else:
+        ratios = np.asarray(politique_reserve, dtype=np.float64)
+    
+    if ratios.ndim == 1:
+        ratios = ratios[:, None]
+    ratios = np.broadcast_to(ratios, (nb_periodes, nb_ressources))
+    if ((ratios < 0) | (ratios > 1)).any():
+        raise ValueError("Les ratios de réserve doivent être compris entre 0 et 1")
+    return ratios
+
+
+def _calculer_reapprovisionnements(reapprovisionnement, intervalle, periodes, ressources):
+    """
+    Construit les quantités reçues au début de chaque période (nb_periodes, nb_ressources)
+    
+    Args:
+        reapprovisionnement: None, dict {ressource: quantité} livré toutes les `intervalle` périodes
+                             (à partir de la deuxième), DataFrame indexé par date de période
+                             (colonnes = ressources) ou tableau (nb_periodes, nb_ressources)
+    """
+    nb_periodes = len(periodes)
+    if reapprovisionnement is None:
+        return np.zeros((nb_periodes, len(ressources)))
+    
+    if isinstance(reapprovisionnement, dict):
+        inconnues = [ressource for ressource in reapprovisionnement if ressource not in ressources]
+        if inconnues:
+            raise ValueError(f"Ressources de réapprovisionnement inconnues: {inconnues}. "
+                             f"Ressources disponibles: {list(ressources)}")
+        livraison = np.array([reapprovisionnement.get(ressource, 0) for ressource in ressources], dtype=np.float64)
+        calendrier = np.zeros(nb_periodes)
+        calendrier[intervalle::intervalle] = 1.0
+        quantites = calendrier[:, None] * livraison[None, :]
+    elif isinstance(reapprovisionnement, pd.DataFrame):
+        quantites = (reapprovisionnement.reindex(index=periodes, columns=ressources, fill_value=0)
+                     .fillna(0).to_numpy(dtype=np.float64))
+    else:
+        quantites = np.asarray(reapprovisionnement, dtype=np.float64).reshape(nb_periodes, len(ressources))
+    
+    if (quantites < 0).any():
+        raise ValueError("Les quantités réapprovisionnées doivent être positives")
+    return np.trunc(quantites)
+
+
+def simuler_allocation_periodes(df_crises, df_besoins, stock_initial, date_debut=None, nb_periodes=365,
+                                frequence='D', reapprovisionnement=None, intervalle_reapprovisionnement=1,
+                                politique_reserve='fixe', mode='proportionnel', **options):
+    """
+    Simule l'allocation des ressources sur un horizon de plusieurs périodes
+    
+    À chaque période:
+    - les crises actives sont celles commencées avant la fin de la période et non terminées
+      avant son début (date_fin vide = crise toujours en cours)
+    - le besoin de chaque crise est calculé comme dans allouer_ressources_glouton
+      (score d'urgence normalisé par le score moyen des crises actives), moins ce qu'elle a déjà reçu
+    - le stock reçoit le réapprovisionnement prévu; la réserve vaut le ratio de la politique
+      appliqué à tout le stock reçu depuis le début (stock initial + réapprovisionnements),
+      dans la limite du stock présent, et le reste est réparti selon le mode choisi
+    - les quantités allouées quittent le stock; la réserve reste disponible pour les périodes suivantes
+    - en mode 'budget', seules les quantités prises dans le stock allouable quittent le stock, le reste
+      est acheté: le budget (option budget) est un budget total pour tout l'horizon, diminué du coût
+      des achats de chaque période
+    
+    L'activité des crises, les scores moyens, les réapprovisionnements, les entrées cumulées et
+    les ratios de réserve sont calculés pour toutes les périodes en une seule opération; seule la
+    récurrence du stock est parcourue période par période, vectorisée sur les crises et les ressources.
+    
+    Args:
+        df_crises (pandas.DataFrame, EntrepotCrises ou iterable): Crises (colonnes date et date_fin utilisées)
+        df_besoins (pandas.DataFrame): DataFrame des besoins par type de crise
+        stock_initial (dict): Stock disponible au début de la simulation
+        date_debut (str ou datetime): Début de la première période (défaut: aujourd'hui)
+        nb_periodes (int): Nombre de périodes simulées
+        frequence (str): Durée d'une période (alias pandas: 'D' jour, 'W' semaine, 'MS' mois...)
+        reapprovisionnement: Quantités reçues: dict {ressource: quantité} livré toutes les
+                             intervalle_reapprovisionnement périodes, DataFrame indexé par date de
+                             période ou tableau (nb_periodes, nb_ressources). Défaut: aucun
+        intervalle_reapprovisionnement (int): Nombre de périodes entre deux livraisons (si dict)
+        politique_reserve (str ou array-like): Libération de la réserve:
+                                               - 'fixe': 25% des entrées gardés jusqu'à la fin
+                                               - 'lineaire': réserve libérée progressivement jusqu'à 0
+                                               - 'si_penurie': réserve libérée pour une ressource dès que
+                                                 le stock allouable ne couvre plus les besoins restants
+                                               - ratios par période (nb_periodes) ou par période et ressource
+        mode (str): Mode de répartition, une clé de MODES_ALLOCATION
+        **options: Options propres au mode (voir allouer_ressources_glouton)
+    
+    Returns:
+        tuple: (df_periodes, df_allocations)
+               - df_periodes: une ligne par période (periode, nb_crises_actives, puis pour chaque
+                 ressource: reapprovisionnement_*, stock_reserve_*, allocation_*, besoin_restant_*,
+                 stock_fin_*; en mode 'budget', aussi achat_* et budget_restant en fin de période)
+               - df_allocations: une ligne par crise servie et par période (periode, nom_crise,
+                 type_crise, allocation_* de chaque ressource)
+    """
+    if mode not in MODES_ALLOCATION:
+        raise ValueError(f"Mode d'allocation inconnu: '{mode}'. Modes disponibles: {list(MODES_ALLOCATION)}")
+    
+    # Périodes: la période t couvre [periodes[t], periodes[t + 1])
+    date_debut = pd.Timestamp.today().normalize() if date_debut is None else pd.Timestamp(date_debut)
+    bornes = pd.date_range(date_debut, periods=nb_periodes + 1, freq=frequence)
+    periodes = bornes[:-1]
+    
+    types, ressources, matrice = construire_matrice_besoins(df_besoins)
+    nb_ressources = len(ressources)
+    
+    ratios_reserve = _calculer_ratios_reserve(politique_reserve, nb_periodes, nb_ressources)
+    reapprovisionnements = _calculer_reapprovisionnements(reapprovisionnement, intervalle_reapprovisionnement,
+                                                          periodes, ressources)
+    
+    # Crises triées par urgence décroissante (ordre de service du mode 'priorite')
+    df_simulation = _selectionner_crises(df_crises, False)
+    df_simulation = df_simulation.copy()
+    df_simulation['score_urgence'] = calculer_scores_urgence(df_simulation)
+    df_simulation = df_simulation.sort_values('score_urgence', ascending=False).reset_index(drop=True)
+    scores = df_simulation['score_urgence'].to_numpy()
+    nb_crises = len(df_simulation)
+    
+    # Besoins de base de chaque crise (ligne de zéros pour un type inconnu)
+    lignes = types.get_indexer(df_simulation['type_crise'].astype(str))
+    besoins_base = np.vstack([matrice, np.zeros((1, nb_ressources))])[lignes]
+    
+    # Activité de chaque crise à chaque période (nb_periodes, nb_crises)
+    debuts = df_simulation['date'].to_numpy(dtype='datetime64[ns]')
+    if 'date_fin' in df_simulation.columns:
+        fins = pd.to_datetime(df_simulation['date_fin']).to_numpy(dtype='datetime64[ns]')
+    else:
+        fins = np.full(nb_crises, np.datetime64('NaT'), dtype='datetime64[ns]')
+    debuts_periodes = bornes[:-1].to_numpy(dtype='datetime64[ns]')[:, None]
+    fins_periodes = bornes[1:].to_numpy(dtype='datetime64[ns]')[:, None]
+    actives = (debuts[None, :] < fins_periodes) & (np.isnat(fins)[None, :] | (fins[None, :] >= debuts_periodes))
+    
+    # Score moyen des crises actives de chaque période (facteur d'ajustement des besoins)
+    nb_actives = actives.sum(axis=1)
+    somme_scores = actives.astype(np.float64) @ scores
+    scores_moyens = np.divide(somme_scores, nb_actives, out=np.zeros(nb_periodes), where=nb_actives > 0)
+    
+    stock = np.trunc(np.array([stock_initial.get(ressource, 0) for ressource in ressources], dtype=np.float64))
+    recu = np.zeros((nb_crises, nb_ressources))
+    
+    # Stock reçu depuis le début à chaque période (base de calcul de la réserve)
+    entrees = stock[None, :] + np.cumsum(reapprovisionnements, axis=0)
+    
+    resume = {nom: np.zeros((nb_periodes, nb_ressources)) for nom in
+              ('reapprovisionnement', 'stock_reserve', 'allocation', 'besoin_restant', 'stock_fin')}
+    allocations_periodes = []
+    
+    # Mode 'budget': budget restant sur tout l'horizon, diminué du coût des achats de chaque période
+    achat_budget = mode == 'budget'
+    if achat_budget:
+        options = dict(options)
+        budget_restant = max(float(options.pop('budget', 0.0)), 0.0)
+        resume['achat'] = np.zeros((nb_periodes, nb_ressources))
+        budgets_restants = np.zeros(nb_periodes)
+    
+    for t in range(nb_periodes):
+        stock = stock + reapprovisionnements[t]
+        
+        # Besoins restants des crises actives à cette période
+        if scores_moyens[t] > 0:
+            facteurs = scores / scores_moyens[t]
+        else:
+            facteurs = np.ones(nb_crises)
+        besoins = np.trunc(besoins_base * (facteurs * actives[t])[:, None])
+        restants = np.maximum(besoins - recu, 0).astype(np.int64)
+        besoin_restant_total = restants.sum(axis=0)
+        
+        # Réserve de la période
+        if ratios_reserve is None:
+            reserve_normale = np.minimum(np.trunc(entrees[t] * RATIO_RESERVE), stock)
+            ratio = np.where(stock - reserve_normale < besoin_restant_total, 0.0, RATIO_RESERVE)
+        else:
+            ratio = ratios_reserve[t]
+        reserve = np.minimum(np.trunc(entrees[t] * ratio), stock)
+        stock_allouable = (stock - reserve).astype(np.int64)
+        
+        if achat_budget:
+            diagnostics = {}
+            allocations = MODES_ALLOCATION[mode](restants, stock_allouable, scores, crises=df_simulation,
+                                                 ressources=ressources, budget=budget_restant,
+                                                 diagnostics=diagnostics, **options)
+            # Seul ce qui est pris dans le stock allouable quitte le stock; le reste est acheté
+            stock = stock - diagnostics['pris_stock']
+            budget_restant = max(budget_restant - diagnostics['cout_achats'], 0.0)
+            resume['achat'][t] = diagnostics['achats']
+            budgets_restants[t] = budget_restant
+        else:
+            allocations = MODES_ALLOCATION[mode](restants, stock_allouable, scores, crises=df_simulation,
+                                                 ressources=ressources, **options)
+            stock = stock - allocations.sum(axis=0)
+        recu += allocations
+        
+        resume['reapprovisionnement'][t] = reapprovisionnements[t]
+        resume['stock_reserve'][t] = reserve
+        resume['allocation'][t] = allocations.sum(axis=0)
+        resume['besoin_restant'][t] = besoin_restant_total
+        resume['stock_fin'][t] = stock
+        
+        servies = np.flatnonzero(allocations.any(axis=1))
+        if len(servies):
+            allocations_periodes.append((t, servies, allocations[servies]))
+    
+    # Tableau récapitulatif par période
+    colonnes = {'periode': periodes, 'nb_crises_actives': nb_actives}
+    for nom, valeurs in resume.items():
+        for j, ressource in enumerate(ressources):
+            colonnes[f'{nom}_{ressource}'] = valeurs[:, j].astype(np.int64)
+    if achat_budget:
+        colonnes['budget_restant'] = budgets_restants
+    df_periodes = pd.DataFrame(colonnes)
+    
+    # Tableau des allocations (uniquement les crises servies à chaque période)
+    if allocations_periodes:
+        indices_periodes = np.concatenate([np.full(len(servies), t) for t, servies, _ in allocations_periodes])
+        indices_crises = np.concatenate([servies for _, servies, _ in allocations_periodes])
+        quantites = np.vstack([allocations for _, _, allocations in allocations_periodes])
+    else:
+        indices_periodes = indices_crises = np.zeros(0, dtype=np.intp)
+        quantites = np.zeros((0, nb_ressources), dtype=np.int64)
+    
+    colonnes = {
+        'periode': periodes[indices_periodes],
+        'nom_crise': df_simulation['nom_crise'].to_numpy()[indices_crises],
+        'type_crise': df_simulation['type_crise'].astype(str).to_numpy()[indices_crises],
+    }
+    for j, ressource in enumerate(ressources):
+        colonnes[f'allocation_{ressource}'] = quantites[:, j]
+    df_allocations = pd.DataFrame(colonnes)
+    
+    return df_periodes, df_allocations
+
+
+# Nombre de tirages Monte Carlo par lot (un lot = une tâche d'un processus, avec sa propre graine)
+TAILLE_LOT_MONTE_CARLO = 250
+
+# Largeur (en points de pourcentage) des classes des histogrammes de satisfaction
+PAS_HISTOGRAMME_SATISFACTION = 0.5
+
+# Données communes aux tirages d'un processus (envoyées une seule fois par processus)
+_contexte_monte_carlo = None
+
+
+def _initialiser_processus_monte_carlo(contexte):
+    """Reçoit les données communes à tous les tirages (initialisation d'un processus du pool)"""
+    global _contexte_monte_carlo
+    _contexte_monte_carlo = contexte
+
+
+def _executer_lot_monte_carlo(graine, nb_tirages):
+    """
+    Exécute un lot de tirages Monte Carlo avec un générateur initialisé par sa graine
+    
+    Returns:
+        tuple: (histogrammes, nb_penuries, nb_penuries_ressources, somme_satisfaction)
+               - histogrammes: effectifs de satisfaction par crise et par classe (nb_crises, nb_classes)
+               - nb_penuries: nombre de tirages où chaque crise manque d'au moins une ressource (nb_crises)
+               - nb_penuries_ressources: nombre de tirages où chaque crise manque de chaque ressource
+                 (nb_crises, nb_ressources)
+               - somme_satisfaction: somme des satisfactions de chaque crise (pour la moyenne)
+    """
+    contexte = _contexte_monte_carlo
+    generateur = np.random.default_rng(graine)
+    besoins_base = contexte['besoins_base']
+    intensites = contexte['intensite']
+    populations = contexte['population']
+    accessibilites = contexte['accessibilite']
+    nb_crises, nb_ressources = besoins_base.shape
+    repartir = MODES_ALLOCATION[contexte['mode']]
+    nb_classes = len(contexte['bornes_classes']) - 1
+    
+    histogrammes = np.zeros((nb_crises, nb_classes), dtype=np.int64)
+    nb_penuries = np.zeros(nb_crises, dtype=np.int64)
+    nb_penuries_ressources = np.zeros((nb_crises, nb_ressources), dtype=np.int64)
+    somme_satisfaction = np.zeros(nb_crises)
+    lignes = np.arange(nb_crises)
+    
+    for _ in range(nb_tirages):
+        # Tirages: multiplicateurs log-normaux (médiane 1) pour la population et les besoins,
+        # bruit gaussien sur l'intensité (bornée à [0, 10])
+        population = populations * generateur.lognormal(0.0, contexte['incertitude_population'], nb_crises)
+        intensite = np.clip(intensites + generateur.normal(0.0, contexte['incertitude_intensite'], nb_crises), 0, 10)
+        multiplicateurs = generateur.lognormal(0.0, contexte['incertitude_besoins'], (nb_crises, nb_ressources))
+        
+        # Même calcul des besoins qu'allouer_ressources_glouton, avec les valeurs tirées
+        scores = intensite * population * (1 - accessibilites)
+        score_moyen = scores.mean()
+        facteurs = scores / score_moyen if score_moyen > 0 else np.ones(nb_crises)
+        besoins = np.trunc(besoins_base * facteurs[:, None] * multiplicateurs).astype(np.int64)
+        
+        allocations = repartir(besoins, contexte['stock_allouable'], scores, crises=contexte['crises'],
+                               ressources=contexte['ressources'], **contexte['options'])
+        
+        # Satisfaction d'une crise: pourcentage moyen sur les ressources dont elle a besoin
+        pourcentages = calculer_pourcentages_satisfaits(allocations, besoins)
+        besoin_positif = besoins > 0
+        nb_positifs = besoin_positif.sum(axis=1)
+        satisfaction = np.divide(pourcentages.sum(axis=1), nb_positifs, out=np.full(nb_crises, 100.0),
+                                 where=nb_positifs > 0)
+        
+        classes = np.clip(np.searchsorted(contexte['bornes_classes'], satisfaction, side='right') - 1, 0, nb_classes - 1)
+        histogrammes[lignes, classes] += 1
+        penuries = allocations < besoins
+        nb_penuries += penuries.any(axis=1)
+        nb_penuries_ressources += penuries
+        somme_satisfaction += satisfaction
+    
+    return histogrammes, nb_penuries, nb_penuries_ressources, somme_satisfaction
+
+
+def _quantiles_histogrammes(histogrammes, bornes_classes, quantiles):
+    """
+    Calcule les quantiles de chaque ligne d'histogrammes (interpolation linéaire dans la classe)
+    
+    Returns:
+        numpy.ndarray: Quantiles, dimensions (nb_lignes, nb_quantiles)
+    """
+    cumul = np.cumsum(histogrammes, axis=1)
+    total = cumul[:, -1:]
+    resultats = np.zeros((len(histogrammes), len(quantiles)))
+    largeurs = np.diff(bornes_classes)
+    
+    for k, quantile in enumerate(quantiles):
+        rang = quantile * total[:, 0]
+        # Première classe dont l'effectif cumulé atteint le rang
+        classes = np.minimum((cumul < rang[:, None]).sum(axis=1), histogrammes.shape[1] - 1)
+        lignes = np.arange(len(histogrammes))
+        avant = np.where(classes > 0, cumul[lignes, np.maximum(classes - 1, 0)], 0)
+        effectif = histogrammes[lignes, classes]
+        position = np.divide(rang - avant, effectif, out=np.zeros(len(rang)), where=effectif > 0)
+        resultats[:, k] = bornes_classes[classes] + np.clip(position, 0, 1) * largeurs[classes]
+    
+    return resultats
+
+
+def analyser_robustesse_monte_carlo(df_crises, df_besoins, stock_disponible, nb_tirages=1000,
+                                    seulement_actuelles=True, mode='proportionnel', incertitude_besoins=0.2,
+                                    incertitude_population=0.2, incertitude_intensite=0.5,
+                                    quantiles=(0.05, 0.5, 0.95), nb_processus=None, graine=None, **options):
+    """
+    Mesure la robustesse de l'allocation face à l'incertitude sur les besoins réels
+    
+    Pour chaque tirage, la population, l'intensité et les besoins de chaque crise sont tirés
+    autour de leurs valeurs, puis l'allocation est recalculée avec le mode choisi
+    (stock et réserve de 25% inchangés). Les tirages sont regroupés en lots de
+    TAILLE_LOT_MONTE_CARLO, chacun avec sa propre graine issue de SeedSequence(graine).spawn:
+    le résultat ne dépend que de la graine, pas du nombre de processus. Chaque processus
+    reçoit les données une seule fois et renvoie des histogrammes et des compteurs, si bien
+    que le temps de calcul décroît linéairement avec le nombre de cœurs.
+    
+    Args:
+        df_crises (pandas.DataFrame, EntrepotCrises ou iterable): Crises (voir allouer_ressources_glouton)
+        df_besoins (pandas.DataFrame): DataFrame des besoins par type de crise
+        stock_disponible (dict): Dictionnaire des ressources disponibles
+        nb_tirages (int): Nombre de tirages
+        seulement_actuelles (bool): Si True, ne considère que les crises en cours
+        mode (str): Mode de répartition, une clé de MODES_ALLOCATION
+        incertitude_besoins (float): Écart-type du logarithme du multiplicateur de chaque besoin
+        incertitude_population (float): Écart-type du logarithme du multiplicateur de population
+        incertitude_intensite (float): Écart-type (en points d'intensité) du bruit sur l'intensité
+        quantiles (tuple): Quantiles de satisfaction calculés pour chaque crise
+        nb_processus (int): Nombre de processus (défaut: nombre de cœurs, 1 = sans pool)
+        graine (int): Graine du générateur aléatoire (résultats reproductibles)
+        **options: Options propres au mode (voir allouer_ressources_glouton). En mode 'budget',
+                   chaque tirage est une allocation indépendante du même stock avec le budget complet
+    
+    Returns:
+        pandas.DataFrame: Une ligne par crise (nom_crise, type_crise, satisfaction_moyenne,
+                          satisfaction_q05, satisfaction_q50..., probabilite_penurie, puis
+                          probabilite_penurie_* par ressource). La satisfaction d'un tirage est le
+                          pourcentage satisfait moyen sur les ressources nécessaires à la crise;
+                          les quantiles sont estimés à PAS_HISTOGRAMME_SATISFACTION point près.
+    """
+    if mode not in MODES_ALLOCATION:
+        raise ValueError(f"Mode d'allocation inconnu: '{mode}'. Modes disponibles: {list(MODES_ALLOCATION)}")
+    if nb_tirages <= 0:
+        raise ValueError("Le nombre de tirages doit être positif")
+    
+    df_analyse = _selectionner_crises(df_crises, seulement_actuelles)
+    types, ressources, matrice = construire_matrice_besoins(df_besoins)
+    if df_analyse is None or len(df_analyse) == 0:
+        return pd.DataFrame(columns=['nom_crise', 'type_crise', 'satisfaction_moyenne', 'probabilite_penurie'])
+    df_analyse = df_analyse.reset_index(drop=True)
+    
+    stock_total = np.array([stock_disponible.get(ressource, 0) for ressource in ressources], dtype=np.float64)
+    stock_allouable = np.trunc(stock_total - np.trunc(stock_total * RATIO_RESERVE)).astype(np.int64)
+    lignes = types.get_indexer(df_analyse['type_crise'].astype(str))
+    
+    bornes_classes = np.arange(0.0, 100.0 + PAS_HISTOGRAMME_SATISFACTION, PAS_HISTOGRAMME_SATISFACTION)
+    contexte = {
+        'besoins_base': np.vstack([matrice, np.zeros((1, len(ressources)))])[lignes],
+        'intensite': valeurs_float64(df_analyse['intensite']),
+        'population': valeurs_float64(df_analyse['population_touchee']),
+        'accessibilite': valeurs_float64(df_analyse['accessibilite']),
+        'stock_allouable': stock_allouable,
+        'mode': mode,
+        'options': options,
+        'crises': df_analyse[['nom_crise']],
+        'ressources': ressources,
+        'incertitude_besoins': incertitude_besoins,
+        'incertitude_population': incertitude_population,
+        'incertitude_intensite': incertitude_intensite,
+        'bornes_classes': bornes_classes,
+    }
+    
+    # Lots de taille fixe, chacun avec sa graine: résultat indépendant du nombre de processus
+    tailles_lots = [TAILLE_LOT_MONTE_CARLO] * (nb_tirages // TAILLE_LOT_MONTE_CARLO)
+    if nb_tirages % TAILLE_LOT_MONTE_CARLO:
+        tailles_lots.append(nb_tirages % TAILLE_LOT_MONTE_CARLO)
+    graines = np.random.SeedSequence(graine).spawn(len(tailles_lots))
+    
+    nb_processus = min(nb_processus or os.cpu_count() or 1, len(tailles_lots))
+    if nb_processus <= 1:
+        _initialiser_processus_monte_carlo(contexte)
+        resultats = [_executer_lot_monte_carlo(graine_lot, taille) for graine_lot, taille in zip(graines, tailles_lots)]
+    else:
+        with ProcessPoolExecutor(max_workers=nb_processus, initializer=_initialiser_processus_monte_carlo,
+                                 initargs=(contexte,)) as pool:
+            resultats = list(pool.map(_executer_lot_monte_carlo, graines, tailles_lots))
+    
+    histogrammes = sum(resultat[0] for resultat in resultats)
+    nb_penuries = sum(resultat[1] for resultat in resultats)
+    nb_penuries_ressources = sum(resultat[2] for resultat in resultats)
+    somme_satisfaction = sum(resultat[3] for resultat in resultats)
+    
+    colonnes = {
+        'nom_crise': df_analyse['nom_crise'].to_numpy(),
+        'type_crise': df_analyse['type_crise'].astype(str).to_numpy(),
+        'satisfaction_moyenne': np.round(somme_satisfaction / nb_tirages, 2),
+    }
+    valeurs_quantiles = _quantiles_histogrammes(histogrammes, bornes_classes, quantiles)
+    for k, quantile in enumerate(quantiles):
+        colonnes[f'satisfaction_q{round(quantile * 100):02d}'] = np.round(valeurs_quantiles[:, k], 2)
+    
+    # Probabilité de pénurie: part des tirages où la crise ne reçoit pas tout son besoin
+    colonnes['probabilite_penurie'] = np.round(nb_penuries / nb_tirages, 4)
+    for j, ressource in enumerate(ressources):
+        colonnes[f'probabilite_penurie_{ressource}'] = np.round(nb_penuries_ressources[:, j] / nb_tirages, 4)
+    
+    return pd.DataFrame(colonnes)
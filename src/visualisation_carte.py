@@ -8,6 +8,12 @@ from folium import plugins
 import pandas as pd
 import numpy as np
 from pathlib import Path
+import hashlib
+import os
+import base64
+import bisect
+
+from src.chargement_donnees import convertir_colonnes_float64, EntrepotCrises
 
 
 # Dictionnaire des couleurs et icônes par type de crise
@@ -39,6 +45,25 @@ ICONES_CRISES = {
     'Guerre': 'shield'
 }
 
+# Seuils de probabilité (%) et couleurs des heatmaps de probabilité
+# Ces seuils sont absolus et ne dépendent pas des valeurs min/max
+SEUILS_PROBABILITE = [15, 30, 50, 70]
+COULEURS_PROBABILITE = [
+    '#00ff00',  # Vert clair - Très faible probabilité (< 15%)
+    '#80ff00',  # Vert-jaune - Faible probabilité (15-30%)
+    '#ffff00',  # Jaune - Probabilité modérée (30-50%)
+    '#ff8000',  # Orange - Probabilité élevée (50-70%)
+    '#8b0000'   # Rouge foncé - Très élevée probabilité (> 70%)
+]
+
+# Carte du monde utilisée pour distinguer la terre de la mer
+CHEMIN_IMAGE_MAPMONDE = Path(__file__).parent.parent / 'data' / 'mapmonde.jpg'
+
+# Matrices terre/mer déjà calculées, en mémoire et sur disque (.npy)
+# Clé: (résolution, limites de la grille, version de l'image) -> matrice
+_cache_masques_terre_mer = {}
+DOSSIER_CACHE_MASQUES = Path(__file__).parent.parent / 'outputs' / 'cache_masques'
+
 
 def creer_carte_interactive(df_crises, df_allocation=None, titre="Crises et Allocation de Ressources"):
     """
@@ -52,6 +77,9 @@ def creer_carte_interactive(df_crises, df_allocation=None, titre="Crises et Allo
     Returns:
         folium.Map: Objet carte Folium
     """
+    # Colonnes float32 repassées en float64 (coordonnées des marqueurs); l'intensité est arrondie à l'affichage
+    df_crises = convertir_colonnes_float64(df_crises)
+    
     # Calcule le centre de la carte (moyenne des latitudes et longitudes)
     centre_lat = df_crises['latitude'].mean()
     centre_lon = df_crises['longitude'].mean()
@@ -96,7 +124,7 @@ def creer_carte_interactive(df_crises, df_allocation=None, titre="Crises et Allo
             <p><b>Type:</b> {type_crise}</p>
             <p><b>Pays:</b> {crise['pays']}</p>
             <p><b>Date:</b> {crise['date']}</p>
-            <p><b>Intensité:</b> {crise['intensite']}</p>
+            <p><b>Intensité:</b> {round(crise['intensite'], 2)}</p>
             <p><b>Population touchée:</b> {crise['population_touchee']:,}</p>
             <p><b>Accessibilité:</b> {crise['accessibilite']:.2f}</p>
         """
@@ -527,7 +555,7 @@ def creer_carte_filtree(df_crises, type_crise=None, pays=None, date_min=None, da
     Crée une carte filtrée selon des critères spécifiques
     
     Args:
-        df_crises (pandas.DataFrame): DataFrame des crises
+        df_crises (pandas.DataFrame ou EntrepotCrises): DataFrame des crises ou entrepôt indexé
         type_crise (str): Filtrer par type de crise (optionnel)
         pays (str): Filtrer par pays (optionnel)
         date_min (str): Date minimale (format 'YYYY-MM-DD', optionnel)
@@ -536,21 +564,14 @@ def creer_carte_filtree(df_crises, type_crise=None, pays=None, date_min=None, da
     Returns:
         folium.Map: Carte filtrée
     """
-    # Crée une copie du DataFrame pour ne pas modifier l'original
-    df_filtre = df_crises.copy()
-    
-    # Applique les filtres
-    if type_crise:
-        df_filtre = df_filtre[df_filtre['type_crise'] == type_crise]
-    
-    if pays:
-        df_filtre = df_filtre[df_filtre['pays'] == pays]
-    
-    if date_min:
-        df_filtre = df_filtre[df_filtre['date'] >= pd.to_datetime(date_min)]
-    
-    if date_max:
-        df_filtre = df_filtre[df_filtre['date'] <= pd.to_datetime(date_max)]
+    # Applique les filtres en combinant les index de l'entrepôt
+    entrepot = df_crises if isinstance(df_crises, EntrepotCrises) else EntrepotCrises(df_crises)
+    df_filtre = entrepot.filtrer(
+        type_crise=type_crise or None,
+        pays=pays or None,
+        date_min=date_min or None,
+        date_max=date_max or None
+    )
     
     # Crée la carte avec les données filtrées
     titre = f"Crises filtrées ({len(df_filtre)} crises)"
@@ -564,6 +585,10 @@ def generer_matrice_terre_mer(resolution, lat_min=-60, lat_max=80, lon_min=-180,
     Génère une matrice binaire (1=terre, 0=mer) à partir de l'image mapmonde.jpg
     La matrice est adaptée à la résolution spécifiée
     
+    L'image est réduite aux dimensions de la grille par moyenne des pixels couverts par chaque
+    case, puis seuillée. La matrice est mise en cache en mémoire et dans DOSSIER_CACHE_MASQUES
+    pour chaque résolution et limites de grille: les appels suivants ne relisent pas l'image.
+    
     Args:
         resolution (float): Résolution de la grille en degrés
         lat_min (float): Latitude minimale (défaut: -60)
@@ -572,101 +597,16 @@ def generer_matrice_terre_mer(resolution, lat_min=-60, lat_max=80, lon_min=-180,
         lon_max (float): Longitude maximale (défaut: 180)
     
     Returns:
-        numpy.ndarray: Matrice 2D de 1 (terre) et 0 (mer), dimensions (nb_lat, nb_lon)
+        numpy.ndarray: Matrice 2D de 1 (terre) et 0 (mer), dimensions (nb_lat, nb_lon), en lecture seule
         dict: Dictionnaire avec les informations de la grille (lat_min, lat_max, lon_min, lon_max, resolution)
     """
-    from PIL import Image
-    import numpy as np
-    from pathlib import Path
-    
-    # Chemin vers l'image
-    chemin_image = Path(__file__).parent.parent / 'data' / 'mapmonde.jpg'
-    
-    if not chemin_image.exists():
-        raise FileNotFoundError(f"Image non trouvée: {chemin_image}")
-    
-    # Charge l'image
-    img = Image.open(chemin_image)
-    img_array = np.array(img)
-    
-    # Convertit en niveaux de gris si nécessaire
-    if len(img_array.shape) == 3:
-        # Prend la moyenne des canaux RGB pour obtenir un niveau de gris
-        img_gray = np.mean(img_array, axis=2)
-    else:
-        img_gray = img_array
-    
-    # Normalise entre 0 et 1
-    img_gray = img_gray / 255.0
-    
-    # Seuil pour déterminer terre/mer
-    # Les pixels sombres (océans) < 0.5, les pixels clairs (terres) >= 0.5
-    # On inverse car généralement les océans sont bleus (sombre) et les terres sont claires
-    seuil = 0.5
-    matrice_binaire = (img_gray > seuil).astype(int)
+    if not CHEMIN_IMAGE_MAPMONDE.exists():
+        raise FileNotFoundError(f"Image non trouvée: {CHEMIN_IMAGE_MAPMONDE}")
     
     # Calcule les dimensions de la grille pour la résolution donnée
     nb_lat = int((lat_max - lat_min) / resolution) + 1
     nb_lon = int((lon_max - lon_min) / resolution) + 1
     
-    # Obtient les dimensions de l'image originale
-    img_width, img_height = img.size
-    ratio_original = img_width / img_height
-    
-    # Calcule les dimensions cibles en préservant le ratio d'origine
-    # On choisit la dimension qui limite pour préserver les proportions
-    ratio_cible = nb_lon / nb_lat
-    
-    if ratio_original > ratio_cible:
-        # L'image est plus large que la grille, on limite par la largeur
-        target_width = nb_lon
-        target_height = int(nb_lon / ratio_original)
-    else:
-        # L'image est plus haute que la grille, on limite par la hauteur
-        target_height = nb_lat
-        target_width = int(nb_lat * ratio_original)
-    
-    # Redimensionne l'image en préservant les proportions
-    from PIL import Image as PILImage
-    img_resized = img.resize((target_width, target_height), PILImage.LANCZOS)
-    img_resized_array = np.array(img_resized)
-    
-    # Convertit en niveaux de gris si nécessaire
-    if len(img_resized_array.shape) == 3:
-        img_resized_gray = np.mean(img_resized_array, axis=2)
-    else:
-        img_resized_gray = img_resized_array
-    
-    # Normalise et applique le seuil
-    img_resized_gray = img_resized_gray / 255.0
-    matrice_intermediaire = (img_resized_gray > seuil).astype(int)
-    
-    # Étire la matrice pour correspondre exactement aux dimensions de la grille
-    # En ajoutant des lignes/colonnes par interpolation
-    if matrice_intermediaire.shape[0] != nb_lat or matrice_intermediaire.shape[1] != nb_lon:
-        # Crée une matrice de la taille cible
-        matrice_redimensionnee = np.zeros((nb_lat, nb_lon), dtype=int)
-        
-        # Calcule les indices pour étirer la matrice
-        for i in range(nb_lat):
-            for j in range(nb_lon):
-                # Mappe les indices de la grille vers les indices de l'image redimensionnée
-                src_i = int(i * matrice_intermediaire.shape[0] / nb_lat)
-                src_j = int(j * matrice_intermediaire.shape[1] / nb_lon)
-                
-                # Assure que les indices sont dans les limites
-                src_i = min(src_i, matrice_intermediaire.shape[0] - 1)
-                src_j = min(src_j, matrice_intermediaire.shape[1] - 1)
-                
-                matrice_redimensionnee[i, j] = matrice_intermediaire[src_i, src_j]
-    else:
-        matrice_redimensionnee = matrice_intermediaire
-    
-    # Inverse la matrice verticalement (pôle nord en haut, pôle sud en bas)
-    # Les images sont généralement stockées avec le nord en haut, mais les matrices numpy
-    # peuvent avoir besoin d'être inversées selon la convention de coordonnées
-    matrice_redimensionnee = np.flipud(matrice_redimensionnee)
-    
     info_grille = {
         'lat_min': lat_min,
         'lat_max': lat_max,
@@ -677,7 +617,69 @@ def generer_matrice_terre_mer(resolution, lat_min=-60, lat_max=80, lon_min=-180,
         'nb_lon': nb_lon
     }
     
-    return matrice_redimensionnee, info_grille
+    # La version de l'image (date de modification, taille) fait partie de la clé du cache
+    infos_image = os.stat(CHEMIN_IMAGE_MAPMONDE)
+    cle = (float(resolution), float(lat_min), float(lat_max), float(lon_min), float(lon_max),
+           infos_image.st_mtime_ns, infos_image.st_size)
+    matrice = _cache_masques_terre_mer.get(cle)
+    if matrice is not None:
+        return matrice, info_grille
+    
+    chemin_cache = DOSSIER_CACHE_MASQUES / f"masque_{hashlib.sha1(repr(cle).encode()).hexdigest()[:16]}.npy"
+    if chemin_cache.exists():
+        try:
+            matrice = np.load(chemin_cache)
+            if matrice.shape != (nb_lat, nb_lon):
+                matrice = None
+        except Exception as e:
+            print(f"⚠ Matrice terre/mer en cache illisible, recalcul: {e}")
+            matrice = None
+    
+    if matrice is None:
+        matrice = _calculer_matrice_terre_mer(nb_lat, nb_lon)
+        try:
+            # Écriture atomique: un fichier temporaire remplace le fichier final une fois complet
+            DOSSIER_CACHE_MASQUES.mkdir(parents=True, exist_ok=True)
+            chemin_temporaire = chemin_cache.with_name(f'{chemin_cache.name}.{os.getpid()}.tmp')
+            with open(chemin_temporaire, 'wb') as fichier:
+                np.save(fichier, matrice)
+            os.replace(chemin_temporaire, chemin_cache)
+        except OSError as e:
+            print(f"⚠ Impossible d'enregistrer la matrice terre/mer: {e}")
+    
+    # La matrice est partagée par tous les appels: elle ne doit pas être modifiée
+    matrice.flags.writeable = False
+    _cache_masques_terre_mer[cle] = matrice
+    return matrice, info_grille
+
+
+def _calculer_matrice_terre_mer(nb_lat, nb_lon):
+    """
+    Calcule la matrice terre/mer (nb_lat, nb_lon) à partir de l'image mapmonde.jpg
+    
+    Returns:
+        numpy.ndarray: Matrice 2D de 1 (terre) et 0 (mer), ligne 0 = latitude minimale
+    """
+    from PIL import Image
+    
+    # Charge l'image en niveaux de gris (moyenne des canaux RGB), normalisée entre 0 et 1
+    img_array = np.asarray(Image.open(CHEMIN_IMAGE_MAPMONDE), dtype=np.float32)
+    if img_array.ndim == 3:
+        img_array = img_array[:, :, :3].mean(axis=2)
+    img_gray = Image.fromarray(img_array / 255.0)
+    
+    # Réduit l'image aux dimensions de la grille: chaque case reçoit la moyenne des pixels
+    # qu'elle couvre (filtre BOX), l'image couvrant toute l'étendue de la grille
+    img_grille = np.asarray(img_gray.resize((nb_lon, nb_lat), Image.BOX))
+    
+    # Seuil pour déterminer terre/mer
+    # Les pixels sombres (océans) < 0.5, les pixels clairs (terres) >= 0.5
+    seuil = 0.5
+    matrice = (img_grille > seuil).astype(np.uint8)
+    
+    # Inverse la matrice verticalement: l'image a le nord en haut, la ligne 0 de la matrice
+    # correspond à la latitude minimale
+    return np.flipud(matrice).copy()
 
 
 def obtenir_valeur_terre_mer(lat, lon, matrice, info_grille):
@@ -704,6 +706,29 @@ def obtenir_valeur_terre_mer(lat, lon, matrice, info_grille):
     return int(matrice[lat_idx, lon_idx])
 
 
+def obtenir_valeurs_terre_mer(lats, lons, matrice, info_grille):
+    """
+    Version vectorisée de obtenir_valeur_terre_mer pour de nombreux points à la fois
+    
+    Args:
+        lats, lons (array-like): Latitudes et longitudes des points
+        matrice (numpy.ndarray): Matrice binaire terre/mer
+        info_grille (dict): Informations sur la grille
+    
+    Returns:
+        numpy.ndarray: 1 si terre, 0 si mer, pour chaque point
+    """
+    # Convertit les coordonnées en indices de la matrice (troncature comme int())
+    lat_idx = np.trunc((np.asarray(lats, dtype=np.float64) - info_grille['lat_min']) / info_grille['resolution'])
+    lon_idx = np.trunc((np.asarray(lons, dtype=np.float64) - info_grille['lon_min']) / info_grille['resolution'])
+    
+    # Vérifie les limites
+    lat_idx = np.clip(lat_idx, 0, matrice.shape[0] - 1).astype(np.intp)
+    lon_idx = np.clip(lon_idx, 0, matrice.shape[1] - 1).astype(np.intp)
+    
+    return matrice[lat_idx, lon_idx].astype(int)
+
+
 def est_sur_continent_approximatif(lat, lon):
     """
     Méthode approximative de détection (fallback si reverse-geocoding échoue)
@@ -790,7 +815,7 @@ def est_sur_continent_approximatif(lat, lon):
     return True
 
 
-def ajouter_heatmap_probabilite(carte, df_crises, type_crise, intensite=7.0, resolution=3.0):
+def ajouter_heatmap_probabilite(carte, df_crises, type_crise, intensite=7.0, resolution=3.0, rendu='cercles'):
     """
     Ajoute une carte de chaleur (heatmap) montrant la probabilité qu'une crise se produise
     à différents endroits du globe (uniquement sur les continents)
@@ -803,15 +828,24 @@ def ajouter_heatmap_probabilite(carte, df_crises, type_crise, intensite=7.0, res
     
     Args:
         carte (folium.Map): Carte Folium à modifier
-        df_crises (pandas.DataFrame): DataFrame des crises historiques
+        df_crises (pandas.DataFrame ou EntrepotCrises): DataFrame des crises historiques ou entrepôt indexé
         type_crise (str): Type de crise à analyser
         intensite (float): Intensité de la crise (0-10)
         resolution (float): Résolution de la grille en degrés (plus petit = plus précis mais plus lent)
+        rendu (str): 'cercles' (un cercle par point, avec popup) ou 'image' (une seule image colorée
+            de la grille, valeur affichée au clic: page HTML beaucoup plus légère)
     
     Returns:
         folium.Map: Carte avec la heatmap ajoutée
     """
-    from src.prediction_crises import calculer_probabilite_evenement
+    from src.prediction_crises import calculer_probabilites_points
+    
+    if rendu not in ('cercles', 'image'):
+        raise ValueError(f"Rendu de heatmap inconnu: '{rendu}'. Rendus disponibles: ['cercles', 'image']")
+    
+    # Indexe les crises une seule fois pour toute la grille
+    if not isinstance(df_crises, EntrepotCrises):
+        df_crises = EntrepotCrises(df_crises)
     
     print(f"Calcul de la heatmap de probabilité pour {type_crise} (intensité {intensite})...")
     print("Utilisation de la logique de calcul de probabilité avec décroissance rapide de la distance...")
@@ -832,46 +866,41 @@ def ajouter_heatmap_probabilite(carte, df_crises, type_crise, intensite=7.0, res
         matrice_terre_mer = None
         info_grille = None
     
-    # Génère les points de la grille
-    points_heatmap = []
-    total_points = 0
-    points_filtres = 0
+    # Génère les points de la grille (ligne par ligne de latitude)
+    grille_lat, grille_lon = np.meshgrid(np.arange(lat_min, lat_max, resolution),
+                                         np.arange(lon_min, lon_max, resolution), indexing='ij')
+    grille_lat, grille_lon = grille_lat.ravel(), grille_lon.ravel()
+    total_points = len(grille_lat)
     
-    for lat in np.arange(lat_min, lat_max, resolution):
-        for lon in np.arange(lon_min, lon_max, resolution):
-            total_points += 1
-            
-            # Obtient la valeur terre/mer (1 ou 0) depuis la matrice
-            if matrice_terre_mer is not None:
-                valeur_terre_mer = obtenir_valeur_terre_mer(lat, lon, matrice_terre_mer, info_grille)
-            else:
-                # Fallback vers la méthode approximative
-                valeur_terre_mer = 1 if est_sur_continent_approximatif(lat, lon) else 0
-            
-            # Si c'est la mer (0), on ignore ce point
-            if valeur_terre_mer == 0:
-                points_filtres += 1
-                continue
-            
-            # Calcule la probabilité pour ce point en utilisant la fonction calculer_probabilite_evenement
-            # Cette fonction utilise la nouvelle logique avec décroissance rapide de la distance :
-            # - Impact maximal < 100 km
-            # - Décroissance 100-500 km et 500-1000 km
-            # - Impact nul > 1000 km
-            resultat = calculer_probabilite_evenement(lat, lon, type_crise, intensite, df_crises)
-            probabilite = resultat['probabilite']
-            
-            # Multiplie la probabilité par la valeur terre/mer (1 pour terre, 0 pour mer)
-            # Cela garantit que les zones marines ont une probabilité de 0
-            probabilite_finale = probabilite * valeur_terre_mer
-            
-            # Si la probabilité finale est 0 (mer), on n'ajoute pas le point
-            if probabilite_finale == 0:
-                points_filtres += 1
-                continue
-            
-            # Stocke le point avec sa probabilité réelle (0-100)
-            points_heatmap.append([lat, lon, probabilite_finale])
+    # Obtient la valeur terre/mer (1 ou 0) de chaque point
+    if matrice_terre_mer is not None:
+        valeurs_terre_mer = obtenir_valeurs_terre_mer(grille_lat, grille_lon, matrice_terre_mer, info_grille)
+    else:
+        # Fallback vers la méthode approximative
+        valeurs_terre_mer = np.array([1 if est_sur_continent_approximatif(lat, lon) else 0
+                                      for lat, lon in zip(grille_lat.tolist(), grille_lon.tolist())], dtype=int)
+    
+    # Si c'est la mer (0), on ignore ce point
+    terre = valeurs_terre_mer != 0
+    
+    # Calcule en blocs vectorisés la probabilité de tous les points terrestres, avec la même logique
+    # que calculer_probabilite_evenement (décroissance rapide de la distance) :
+    # - Impact maximal < 100 km
+    # - Décroissance 100-500 km et 500-1000 km
+    # - Impact nul > 1000 km
+    probabilites = calculer_probabilites_points(grille_lat[terre], grille_lon[terre], type_crise, intensite, df_crises)
+    
+    # Multiplie la probabilité par la valeur terre/mer (1 pour terre, 0 pour mer)
+    # Cela garantit que les zones marines ont une probabilité de 0
+    probabilites_finales = probabilites * valeurs_terre_mer[terre]
+    
+    # Si la probabilité finale est 0 (mer), on n'ajoute pas le point
+    gardes = probabilites_finales != 0
+    points_filtres = total_points - int(np.count_nonzero(gardes))
+    
+    # Stocke les points avec leur probabilité réelle (0-100)
+    points_heatmap = list(zip(grille_lat[terre][gardes].tolist(), grille_lon[terre][gardes].tolist(),
+                              probabilites_finales[gardes].tolist()))
     
     print(f"✓ {total_points} points analysés, {points_filtres} points océaniques exclus, {len(points_heatmap)} points continentaux calculés")
     
@@ -879,23 +908,25 @@ def ajouter_heatmap_probabilite(carte, df_crises, type_crise, intensite=7.0, res
         print("⚠ Aucun point à afficher")
         return carte
     
-    # Définit les seuils de probabilité avec des couleurs fixes
-    # Ces seuils sont absolus et ne dépendent pas des valeurs min/max
+    if rendu == 'image':
+        # Grille des probabilités (NaN hors des points affichés), ligne 0 = latitude minimale
+        grille_probabilites = np.full(total_points, np.nan)
+        grille_probabilites[np.flatnonzero(terre)[gardes]] = probabilites_finales[gardes]
+        nb_lat = len(np.arange(lat_min, lat_max, resolution))
+        grille_probabilites = grille_probabilites.reshape(nb_lat, -1)
+        
+        _ajouter_image_probabilite(carte, grille_probabilites, lat_min, lon_min, resolution, type_crise)
+        _ajouter_legende_probabilite(carte, type_crise)
+        print(f"✓ Image de probabilité {grille_probabilites.shape[0]}x{grille_probabilites.shape[1]} ajoutée à la carte (uniquement sur les continents)")
+        return carte
+    
+    # Couleurs selon des seuils de probabilité fixes (SEUILS_PROBABILITE)
     def obtenir_couleur_probabilite(prob):
         """
         Retourne la couleur en fonction de la probabilité absolue
         Utilise des seuils fixes pour garantir la cohérence visuelle
         """
-        if prob < 15:
-            return '#00ff00'  # Vert clair - Très faible probabilité
-        elif prob < 30:
-            return '#80ff00'  # Vert-jaune - Faible probabilité
-        elif prob < 50:
-            return '#ffff00'  # Jaune - Probabilité modérée
-        elif prob < 70:
-            return '#ff8000'  # Orange - Probabilité élevée
-        else:
-            return '#8b0000'  # Rouge foncé - Très élevée probabilité
+        return COULEURS_PROBABILITE[bisect.bisect_right(SEUILS_PROBABILITE, prob)]
     
     def obtenir_opacite_probabilite(prob):
         """
@@ -941,6 +972,17 @@ def ajouter_heatmap_probabilite(carte, df_crises, type_crise, intensite=7.0, res
     groupe_probabilite.add_to(carte)
     
     # Ajoute une légende pour les probabilités
+    _ajouter_legende_probabilite(carte, type_crise)
+    
+    print(f"✓ {len(points_heatmap)} cercles de probabilité ajoutés à la carte (uniquement sur les continents)")
+    
+    return carte
+
+
+def _ajouter_legende_probabilite(carte, type_crise):
+    """
+    Ajoute la légende des seuils de probabilité à la carte
+    """
     legende_prob_html = f"""
     <div style="position: fixed; 
                 bottom: 50px; left: 50px; width: 200px; height: auto; 
@@ -956,29 +998,113 @@ def ajouter_heatmap_probabilite(carte, df_crises, type_crise, intensite=7.0, res
     </div>
     """
     carte.get_root().html.add_child(folium.Element(legende_prob_html))
+
+
+def _ajouter_image_probabilite(carte, grille_probabilites, lat_min, lon_min, resolution, type_crise):
+    """
+    Ajoute la grille de probabilités à la carte sous forme d'une seule image PNG colorée
+    (mêmes couleurs et opacités que les cercles), avec la valeur de la case affichée au clic
     
-    print(f"✓ {len(points_heatmap)} cercles de probabilité ajoutés à la carte (uniquement sur les continents)")
-    
-    return carte
+    Args:
+        carte (folium.Map): Carte Folium à modifier
+        grille_probabilites (numpy.ndarray): Probabilités (%) de la grille (NaN = rien à afficher),
+            ligne 0 = latitude lat_min, colonne 0 = longitude lon_min
+        lat_min, lon_min (float): Coordonnées du premier point de la grille
+        resolution (float): Résolution de la grille en degrés
+        type_crise (str): Type de crise (nom de la couche)
+    """
+    from branca.element import MacroElement
+    from jinja2 import Template
+    
+    nb_lat, nb_lon = grille_probabilites.shape
+    affiches = ~np.isnan(grille_probabilites)
+    probabilites = np.where(affiches, grille_probabilites, 0.0)
+    
+    # Couleur (mêmes seuils que les cercles) et opacité de chaque case, cases vides transparentes
+    palette = np.array([[int(couleur[i:i + 2], 16) for i in (1, 3, 5)] for couleur in COULEURS_PROBABILITE],
+                       dtype=np.uint8)
+    image = np.zeros((nb_lat, nb_lon, 4), dtype=np.uint8)
+    image[..., :3] = palette[np.searchsorted(SEUILS_PROBABILITE, probabilites, side='right')]
+    opacite = np.minimum(0.8, np.maximum(0.2, probabilites / 100.0 * 0.6 + 0.2))
+    image[..., 3] = np.where(affiches, np.round(opacite * 255), 0).astype(np.uint8)
+    
+    # Chaque case est centrée sur son point de grille
+    lat_sud = lat_min - resolution / 2
+    lat_nord = min(85.0, lat_min + (nb_lat - 0.5) * resolution)
+    lon_ouest = lon_min - resolution / 2
+    lon_est = lon_min + (nb_lon - 0.5) * resolution
+    
+    # Leaflet étire l'image linéairement en projection Mercator: les lignes de l'image sont
+    # rééchantillonnées (case la plus proche, sans mélange de couleurs) à intervalles réguliers
+    # de l'ordonnée Mercator, du nord au sud, avec au moins 2 pixels par case à l'équateur
+    y_nord = np.log(np.tan(np.pi / 4 + np.radians(lat_nord) / 2))
+    y_sud = np.log(np.tan(np.pi / 4 + np.radians(lat_sud) / 2))
+    nb_lignes = max(nb_lat, int(np.ceil(2 * (y_nord - y_sud) / np.radians(resolution))))
+    y = y_nord - (np.arange(nb_lignes) + 0.5) * (y_nord - y_sud) / nb_lignes
+    latitudes = np.degrees(2 * np.arctan(np.exp(y)) - np.pi / 2)
+    lignes = np.clip(np.floor((latitudes - lat_sud) / resolution).astype(int), 0, nb_lat - 1)
+    
+    folium.raster_layers.ImageOverlay(
+        image=image[lignes],
+        bounds=[[lat_sud, lon_ouest], [lat_nord, lon_est]],
+        mercator_project=False,
+        pixelated=True,
+        name=f'Probabilité {type_crise}'
+    ).add_to(carte)
+    
+    # Valeur au clic: grille des probabilités en centièmes de % + 1 (0 = rien à afficher),
+    # entiers 16 bits little-endian encodés en base64
+    valeurs = np.where(affiches, np.round(probabilites * 100) + 1, 0).astype('<u2')
+    consultation = MacroElement()
+    consultation._template = Template("""
+        {% macro script(this, kwargs) %}
+        (function() {
+            var carte = {{ this._parent.get_name() }};
+            var octets = atob("{{ this.valeurs }}");
+            var vue = new DataView(new ArrayBuffer(octets.length));
+            for (var k = 0; k < octets.length; k++) { vue.setUint8(k, octets.charCodeAt(k)); }
+            carte.on('click', function(e) {
+                var lon = ((e.latlng.lng + 180) % 360 + 360) % 360 - 180;
+                var i = Math.round((e.latlng.lat - {{ this.lat_min }}) / {{ this.resolution }});
+                var j = Math.round((lon - {{ this.lon_min }}) / {{ this.resolution }});
+                if (i < 0 || i >= {{ this.nb_lat }} || j < 0 || j >= {{ this.nb_lon }}) { return; }
+                var valeur = vue.getUint16(2 * (i * {{ this.nb_lon }} + j), true);
+                if (valeur === 0) { return; }
+                L.popup().setLatLng(e.latlng)
+                    .setContent("Probabilité: " + ((valeur - 1) / 100).toFixed(1) + "%")
+                    .openOn(carte);
+            });
+        })();
+        {% endmacro %}
+    """)
+    consultation.valeurs = base64.b64encode(valeurs.tobytes()).decode('ascii')
+    consultation.lat_min, consultation.lon_min = float(lat_min), float(lon_min)
+    consultation.resolution = float(resolution)
+    consultation.nb_lat, consultation.nb_lon = nb_lat, nb_lon
+    carte.add_child(consultation)
 
 
-def creer_carte_avec_heatmap(df_crises, type_crise, intensite=7.0, resolution=3.0, titre="Carte de Probabilité de Crise"):
+def creer_carte_avec_heatmap(df_crises, type_crise, intensite=7.0, resolution=3.0, titre="Carte de Probabilité de Crise",
+                             rendu='cercles'):
     """
     Crée une carte interactive avec une heatmap de probabilité pour un type de crise
     
     Args:
-        df_crises (pandas.DataFrame): DataFrame des crises historiques
+        df_crises (pandas.DataFrame ou EntrepotCrises): DataFrame des crises historiques ou entrepôt indexé
         type_crise (str): Type de crise à analyser
         intensite (float): Intensité de la crise (0-10)
         resolution (float): Résolution de la grille en degrés
         titre (str): Titre de la carte
+        rendu (str): Rendu de la heatmap, 'cercles' ou 'image' (voir ajouter_heatmap_probabilite)
     
     Returns:
         folium.Map: Carte avec heatmap
     """
+    entrepot = df_crises if isinstance(df_crises, EntrepotCrises) else EntrepotCrises(df_crises)
+    
     # Calcule le centre de la carte
-    centre_lat = df_crises['latitude'].mean()
-    centre_lon = df_crises['longitude'].mean()
+    centre_lat = entrepot.df['latitude'].mean()
+    centre_lon = entrepot.df['longitude'].mean()
     
     # Crée la carte
     carte = folium.Map(
@@ -991,10 +1117,10 @@ def creer_carte_avec_heatmap(df_crises, type_crise, intensite=7.0, resolution=3.
     folium.TileLayer('CartoDB positron').add_to(carte)
     
     # Ajoute la heatmap de probabilité
-    ajouter_heatmap_probabilite(carte, df_crises, type_crise, intensite, resolution)
+    ajouter_heatmap_probabilite(carte, entrepot, type_crise, intensite, resolution, rendu)
     
     # Ajoute les crises historiques du même type comme marqueurs
-    crises_type = df_crises[df_crises['type_crise'] == type_crise].copy()
+    crises_type = convertir_colonnes_float64(entrepot.par_type(type_crise))
     if not crises_type.empty:
         for idx, crise in crises_type.iterrows():
             couleur = COULEURS_CRISES.get(type_crise, 'gray')
@@ -1006,7 +1132,7 @@ def creer_carte_avec_heatmap(df_crises, type_crise, intensite=7.0, resolution=3.
                 <p><b>Type:</b> {type_crise}</p>
                 <p><b>Pays:</b> {crise['pays']}</p>
                 <p><b>Date:</b> {crise['date']}</p>
-                <p><b>Intensité:</b> {crise['intensite']}</p>
+                <p><b>Intensité:</b> {round(crise['intensite'], 2)}</p>
             </div>
             """
             
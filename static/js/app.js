@@ -158,7 +158,7 @@ function loadStockInputs() {
         { key: 'medicaments_doses', label: 'Médicaments (doses)', defaut: 500000 },
         { key: 'hopitaux_campagne', label: 'Hôpitaux de campagne', defaut: 100 },
         { key: 'generateurs', label: 'Générateurs', defaut: 300 },
-        { key: 'vehicules_urgence', label: 'Véhicules d urgence', defaut: 200 },
+        { key: 'vehicules_urgence', label: 'Véhicules d’urgence', defaut: 200 },
         { key: 'personnel_medical', label: 'Personnel médical', defaut: 3000 },
         { key: 'denrees_alimentaires_kg', label: 'Denrées alimentaires (kg)', defaut: 10000000 }
     ];
@@ -188,12 +188,14 @@ async function calculerAllocation() {
     
     // Par défaut, on ne considère que les crises actuelles
     const seulementActuelles = true;
+    const mode = document.getElementById('mode-allocation').value;
+    const topK = parseInt(document.getElementById('top-k-allocation').value) || null;
     
     try {
         const response = await fetch('/api/allocation', {
             method: 'POST',
             headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({ stock, seulement_actuelles: seulementActuelles })
+            body: JSON.stringify({ stock, seulement_actuelles: seulementActuelles, mode, top_k: topK })
         });
         
         const result = await response.json();
@@ -214,6 +216,21 @@ function afficherResultatsAllocation(result) {
     const container = document.getElementById('allocation-results');
     container.style.display = 'block';
     
+    // Description de la répartition des 75% allouables selon le mode choisi
+    const descriptionsModes = {
+        'proportionnel': 'si le stock est suffisant, chaque crise reçoit son besoin complet. ' +
+            'Sinon, toutes les allocations sont réduites proportionnellement par un coefficient unique.',
+        'priorite': 'les crises sont servies par score d’urgence décroissant, chacune jusqu’à son besoin complet, ' +
+            'jusqu’à épuisement du stock (la dernière crise servie peut l’être partiellement).',
+        'optimal': 'chaque crise reçoit la même fraction de son besoin pour toutes les ressources, ' +
+            'fraction choisie par programme linéaire pour maximiser la satisfaction pondérée par l’urgence ; ' +
+            'le stock resté libre va ensuite aux crises les plus urgentes qui en manquent encore.',
+        'equitable': 'le pourcentage satisfait de chaque crise est proportionnel à son score d’urgence (plafonné à 100%), ' +
+            'au niveau le plus élevé que permet le stock : le stock est distribué jusqu’à épuisement ' +
+            'ou jusqu’à ce que tous les besoins soient couverts.'
+    };
+    const descriptionMode = descriptionsModes[result.mode] || descriptionsModes['proportionnel'];
+    
     let html = `
         <div class="alert alert-info alert-custom">
             <i class="fas fa-info-circle"></i> 
@@ -222,8 +239,7 @@ function afficherResultatsAllocation(result) {
         <div class="alert alert-warning alert-custom">
             <i class="fas fa-exclamation-triangle"></i> 
             <strong>Mécanique d'allocation :</strong> 25% des ressources sont réservées (non utilisées). 
-            Les 75% restants sont alloués selon les besoins réels : si le stock est suffisant, chaque crise reçoit son besoin complet. 
-            Sinon, toutes les allocations sont réduites proportionnellement par un coefficient unique.
+            Les 75% restants sont alloués selon les besoins réels : ${descriptionMode}
         </div>
     `;
     
@@ -236,7 +252,7 @@ function afficherResultatsAllocation(result) {
             html += `
                 <li class="list-group-item">
                     <strong>${idx + 1}. ${crise.nom_crise}</strong> (${crise.type_crise})<br>
-                    <small>Score d urgence: ${crise.score_urgence_normalise.toFixed(2)}%</small>
+                    <small>Score d’urgence: ${crise.score_urgence_normalise.toFixed(2)}%</small>
                 </li>
             `;
         });
@@ -285,7 +301,7 @@ function afficherResultatsAllocation(result) {
                     'allocation_medicaments_doses': 'Médicaments (doses)',
                     'allocation_personnel_medical': 'Personnel médical',
                     'allocation_tentes': 'Tentes',
-                    'allocation_vehicules_urgence': 'Véhicules d urgence'
+                    'allocation_vehicules_urgence': 'Véhicules d’urgence'
                 };
                 
                 // Affiche les ressources allouées
@@ -532,7 +548,7 @@ async function rechercherPays() {
 // Calcule la prédiction
 async function calculerPrediction() {
     if (!paysData) {
-        alert('Veuillez d abord rechercher un pays');
+        alert('Veuillez d’abord rechercher un pays');
         return;
     }
     
@@ -589,7 +605,7 @@ function afficherResultatsPrediction(result) {
     let html = `
         <div class="card mt-3">
             <div class="card-header bg-info text-white">
-                <i class="fas fa-chart-line"></i> Probabilité de l Événement
+                <i class="fas fa-chart-line"></i> Probabilité de l’Événement
             </div>
             <div class="card-body">
                 <h3>${result.probabilite.probabilite}%</h3>
@@ -0,0 +1,8 @@
+"""
+Configuration des tests: rend le paquet src importable depuis la racine du projet
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
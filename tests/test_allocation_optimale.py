@@ -0,0 +1,66 @@
+"""
+Tests du mode d'allocation 'optimal': aucun stock allouable ne doit rester inutilisé
+tant qu'une crise manque encore de la ressource
+"""
+
+import numpy as np
+import pytest
+
+from src.allocation_gloutonne import repartir_optimal, allouer_ressources_glouton
+from src.chargement_donnees import charger_crises, charger_besoins
+
+
+STOCK_DEFAUT = {
+    'eau_potable_litres': 50000000,
+    'tentes': 10000,
+    'medicaments_doses': 500000,
+    'hopitaux_campagne': 100,
+    'generateurs': 300,
+    'vehicules_urgence': 200,
+    'personnel_medical': 3000,
+    'denrees_alimentaires_kg': 10000000
+}
+
+
+def _verifier_stock_utilise(allocations, besoins, stock):
+    """Pour chaque ressource: stock respecté, et stock restant nul ou besoins tous couverts"""
+    assert (allocations >= 0).all()
+    assert (allocations <= besoins).all()
+    utilise = allocations.sum(axis=0)
+    assert (utilise <= stock).all()
+    manque = (besoins - allocations).sum(axis=0)
+    assert ((utilise == stock) | (manque == 0)).all()
+
+
+def test_stock_non_limitant_distribue():
+    # La crise 0 est limitée par la ressource 0: la ressource 1 laissée libre doit être distribuée
+    besoins = np.array([[100, 10], [0, 50], [10, 100]], dtype=np.int64)
+    stock = np.array([50, 120], dtype=np.int64)
+    poids = np.array([1.0, 0.5, 0.8])
+    
+    allocations = repartir_optimal(besoins, stock, poids)
+    
+    _verifier_stock_utilise(allocations, besoins, stock)
+    assert allocations[:, 1].sum() == 120
+
+
+def test_plafonds_respectes():
+    besoins = np.array([[100, 100], [100, 100]], dtype=np.int64)
+    stock = np.array([1000, 1000], dtype=np.int64)
+    
+    allocations = repartir_optimal(besoins, stock, np.ones(2), plafonds=np.array([0.5, 1.0]))
+    
+    assert allocations.tolist() == [[50, 50], [100, 100]]
+
+
+@pytest.mark.parametrize('seulement_actuelles', [True, False])
+def test_catalogue_complet_sans_stock_inutilise(seulement_actuelles):
+    crises, besoins = charger_crises(), charger_besoins()
+    
+    df_allocation, stock_restant, stock_reserve = allouer_ressources_glouton(
+        crises, besoins, STOCK_DEFAUT, seulement_actuelles, mode='optimal'
+    )
+    
+    for ressource, restant in stock_restant.items():
+        manque = (df_allocation[f'besoin_{ressource}'] - df_allocation[f'allocation_{ressource}']).sum()
+        assert restant == 0 or manque == 0, ressource